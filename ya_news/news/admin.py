@@ -1,6 +1,41 @@
 from django.contrib import admin
+from django.contrib.auth import admin as auth_admin
+from django.contrib.auth import get_user_model
 
-from .models import Comment, News
+from .models import BadWord, Comment, News, PurgeTask
+from .purge import dependents, schedule_purge, start_purge
+
+User = get_user_model()
+
+
+class PurgeAdminMixin:
+    """
+    Удаление через news.purge: пачками и в фоне.
+
+    Страница подтверждения не собирает зависимые объекты сборщиком
+    Django, а только считает комментарии.
+    """
+    purge_target = None
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        comments = sum(
+            dependents(self.purge_target, obj.pk).count() for obj in objs
+        )
+        perms_needed = set()
+        if comments and not request.user.has_perm('news.delete_comment'):
+            perms_needed.add(Comment._meta.verbose_name)
+        model_count = {self.model._meta.verbose_name_plural: len(objs)}
+        if comments:
+            model_count[Comment._meta.verbose_name_plural] = comments
+        return [str(obj) for obj in objs], model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        start_purge(schedule_purge(self.purge_target, obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        for pk in queryset.values_list('pk', flat=True):
+            start_purge(schedule_purge(self.purge_target, pk))
 
 
 class CommentInline(admin.StackedInline):
@@ -9,7 +44,34 @@ class CommentInline(admin.StackedInline):
 
 
 @admin.register(News)
-class NewsAdmin(admin.ModelAdmin):
+class NewsAdmin(PurgeAdminMixin, admin.ModelAdmin):
+    purge_target = PurgeTask.NEWS
     inlines = [
         CommentInline,
     ]
+
+
+@admin.register(BadWord)
+class BadWordAdmin(admin.ModelAdmin):
+    list_display = ('word', 'updated')
+    search_fields = ('word',)
+
+
+@admin.register(PurgeTask)
+class PurgeTaskAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'deleted', 'total', 'created', 'finished')
+    list_filter = ('target',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class UserAdmin(PurgeAdminMixin, auth_admin.UserAdmin):
+    purge_target = PurgeTask.USER
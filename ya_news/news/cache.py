@@ -0,0 +1,208 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import caches
+
+from yanews.routers import reads_from_replica
+
+HOME_VERSION_KEY = 'news:pages:version:home'
+DETAIL_VERSION_KEY = 'news:pages:version:detail:{pk}'
+PAGE_KEY = 'news:pages:{digest}'
+LAST_WRITE_KEY = 'news:pages:version:last_write'
+REPLICA_SYNCED_KEY = 'news:pages:replica_synced:{alias}'
+HITS_KEY = 'news:pages:stats:hits'
+MISSES_KEY = 'news:pages:stats:misses'
+CACHE_HEADER = 'X-Page-Cache'
+
+
+def get_cache():
+    return caches[settings.NEWS_PAGE_CACHE_ALIAS]
+
+
+def detail_version_key(news_id):
+    return DETAIL_VERSION_KEY.format(pk=news_id)
+
+
+def version_timeout(key):
+    """
+    Версия живёт не дольше страниц, которые от неё зависят.
+
+    Иначе процесс с собственным кешем годами отвечал бы 304 по версии,
+    которую другой процесс давно сменил. Время последней записи не
+    входит в ETag и хранится, пока реплики его не догонят.
+    """
+    if key == LAST_WRITE_KEY:
+        return None
+    return settings.NEWS_PAGE_CACHE_TIMEOUT
+
+
+def get_versions(*keys):
+    """
+    Версии страниц — время последнего изменения их данных.
+
+    Если версии нет в кеше, она создаётся заново: прежние
+    закешированные страницы при этом просто перестают находиться.
+    """
+    cache = get_cache()
+    versions = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in versions}
+    for key, version in missing.items():
+        if not cache.add(key, version, version_timeout(key)):
+            version = cache.get(key, version)
+        versions[key] = version
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*keys):
+    """
+    Инвалидирует страницы, зависящие от переданных версий.
+
+    Заодно запоминается время последней записи: до него реплики
+    должны догнать основную базу, см. `replica_is_stale`.
+    """
+    now = time.time()
+    cache = get_cache()
+    cache.set_many(
+        {key: now for key in keys}, settings.NEWS_PAGE_CACHE_TIMEOUT
+    )
+    cache.set(LAST_WRITE_KEY, now, version_timeout(LAST_WRITE_KEY))
+
+
+def invalidate_news(*news_ids):
+    """Сбрасывает главную и страницы переданных новостей."""
+    bump_versions(
+        HOME_VERSION_KEY, *(detail_version_key(pk) for pk in news_ids)
+    )
+
+
+def mark_replica_synced(alias, synced_at):
+    """Реплика `alias` содержит все записи, сделанные до `synced_at`."""
+    get_cache().set(REPLICA_SYNCED_KEY.format(alias=alias), synced_at, None)
+
+
+def replica_is_stale(request):
+    """
+    Страница будет прочитана с реплики, отставшей от последней записи.
+
+    Версии страниц меняются сразу при записи, а данные на реплике —
+    только после синхронизации. Отрисованную с неё страницу нельзя
+    ни кешировать, ни подтверждать по ETag: под новой версией остались
+    бы старые данные. Пока о реплике ничего не известно, она считается
+    отставшей.
+    """
+    if not reads_from_replica(request):
+        return False
+    last_write, = get_versions(LAST_WRITE_KEY)
+    aliases = settings.REPLICA_DATABASES
+    synced = get_cache().get_many(
+        [REPLICA_SYNCED_KEY.format(alias=alias) for alias in aliases]
+    )
+    return len(synced) < len(aliases) or min(synced.values()) < last_write
+
+
+def page_etag(request, version_keys):
+    """
+    Валидатор страницы для условных GET-запросов.
+
+    Кроме версий данных учитывает пользователя и его CSRF-cookie:
+    авторизованный пользователь видит свои ссылки и форму комментария.
+    Для страницы с отставшей реплики валидатора нет.
+    """
+    if replica_is_stale(request):
+        return None
+    parts = list(map(repr, get_versions(*version_keys)))
+    if request.user.is_authenticated:
+        parts += [
+            str(request.user.pk),
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        ]
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def page_last_modified(request, version_keys):
+    """
+    `Last-Modified` отдаётся только анонимам.
+
+    Для авторизованных страница зависит от пользователя, и по одной
+    дате нельзя понять, что разметка не устарела.
+    """
+    if request.user.is_authenticated or replica_is_stale(request):
+        return None
+    return datetime.fromtimestamp(
+        max(get_versions(*version_keys)), tz=timezone.utc
+    )
+
+
+def _count(key):
+    cache = get_cache()
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Счётчик вытеснили между `add` и `incr`.
+        cache.set(key, 1, None)
+
+
+def get_stats():
+    cache = get_cache()
+    counters = cache.get_many((HITS_KEY, MISSES_KEY))
+    hits = counters.get(HITS_KEY, 0)
+    misses = counters.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_stats():
+    get_cache().delete_many((HITS_KEY, MISSES_KEY))
+
+
+class AnonymousPageCacheMixin:
+    """
+    Кеширует страницу целиком для анонимных пользователей.
+
+    Авторизованные пользователи всегда получают свежую страницу
+    со ссылками на редактирование и формой комментария. Страница,
+    прочитанная с отставшей реплики, отдаётся без сохранения в кеш.
+    """
+
+    def get_page_cache_version_keys(self):
+        return (HOME_VERSION_KEY,)
+
+    def get_page_cache_key(self):
+        versions = get_versions(*self.get_page_cache_version_keys())
+        raw = '|'.join(
+            [self.request.get_full_path(), *map(repr, versions)]
+        )
+        return PAGE_KEY.format(digest=hashlib.md5(raw.encode()).hexdigest())
+
+    def dispatch(self, request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            return super().dispatch(request, *args, **kwargs)
+        cache = get_cache()
+        key = self.get_page_cache_key()
+        response = cache.get(key)
+        if response is not None:
+            _count(HITS_KEY)
+            response[CACHE_HEADER] = 'HIT'
+            return response
+        _count(MISSES_KEY)
+        stale = replica_is_stale(request)
+        response = super().dispatch(request, *args, **kwargs)
+        response[CACHE_HEADER] = 'MISS'
+        if (response.status_code == 200 and not response.streaming
+                and not stale):
+            timeout = settings.NEWS_PAGE_CACHE_TIMEOUT
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.add_post_render_callback(
+                    lambda rendered: cache.set(key, rendered, timeout)
+                )
+            else:
+                cache.set(key, response, timeout)
+        return response
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+from yanews.auth import check_user_cache_is_shared
+
+register(check_user_cache_is_shared, Tags.caches)
+
+
+@register(Tags.caches)
+def check_page_cache_is_shared(app_configs, **kwargs):
+    """
+    Версии страниц должны быть общими для всех процессов.
+
+    Запись в одном процессе сбрасывает версии только в его кеше
+    в памяти: остальные до `NEWS_PAGE_CACHE_TIMEOUT` секунд отдают
+    старые страницы и отвечают 304 на старый ETag. При отладке
+    обычно работает один процесс, поэтому предупреждение выводится
+    только без `DEBUG`.
+    """
+    alias = settings.NEWS_PAGE_CACHE_ALIAS
+    if settings.DEBUG or not isinstance(caches[alias], LocMemCache):
+        return []
+    return [Warning(
+        f'Страничный кеш {alias!r} хранится в памяти процесса.',
+        hint=(
+            'При нескольких процессах укажите в NEWS_PAGE_CACHE_ALIAS '
+            'общий кеш, например FileBasedCache.'
+        ),
+        obj=alias,
+        id='news.W001',
+    )]
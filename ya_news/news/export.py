@@ -0,0 +1,70 @@
+import json
+from datetime import datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Comment, News
+
+NEWS_FIELDS = ('id', 'title', 'text', 'date', 'comment_count')
+COMMENT_FIELDS = ('id', 'author__username', 'text', 'created')
+
+
+def parse_since(value, as_datetime=False):
+    """Разбирает фильтр `since`: дату или дату со временем в ISO 8601."""
+    if not value:
+        return None
+    if not as_datetime:
+        parsed = parse_date(value)
+    else:
+        parsed = parse_datetime(value)
+        if parsed is None and parse_date(value) is not None:
+            parsed = datetime.combine(parse_date(value), time.min)
+        if parsed is not None and timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+    if parsed is None:
+        raise ValueError(f'Неверная дата: {value}')
+    return parsed
+
+
+def _dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def iter_news_ndjson(since=None, comments_since=None, chunk_size=2000):
+    """
+    Новости с комментариями в формате NDJSON: одна строка на новость.
+
+    Новости и комментарии читаются двумя потоковыми запросами
+    в порядке `news_id` и склеиваются слиянием, поэтому память
+    не зависит ни от числа новостей, ни от длины веток.
+    Даже строка новости отдаётся по частям, по комментарию за раз.
+    """
+    news_rows = News.objects.order_by('pk').values(*NEWS_FIELDS)
+    comments = Comment.objects.order_by('news_id', 'created', 'pk').values(
+        'news_id', *COMMENT_FIELDS
+    )
+    if since is not None:
+        news_rows = news_rows.filter(date__gte=since)
+        comments = comments.filter(news__date__gte=since)
+    if comments_since is not None:
+        comments = comments.filter(created__gte=comments_since)
+
+    comment_rows = comments.iterator(chunk_size=chunk_size)
+    comment = next(comment_rows, None)
+    for news in news_rows.iterator(chunk_size=chunk_size):
+        yield _dumps(news)[:-1] + ', "comments": ['
+        while comment is not None and comment['news_id'] < news['id']:
+            comment = next(comment_rows, None)
+        separator = ''
+        while comment is not None and comment['news_id'] == news['id']:
+            yield separator + _dumps({
+                'id': comment['id'],
+                'author': comment['author__username'],
+                'text': comment['text'],
+                'created': comment['created'],
+            })
+            separator = ', '
+            comment = next(comment_rows, None)
+        yield ']}\n'
@@ -0,0 +1,134 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from yanews.auth import forget_user
+from yanews.metrics import WRITES, register_cache
+
+from .cache import get_stats, invalidate_news
+from .live import comment_data, hub
+from .models import BadWord, Comment, News
+from .moderation import bad_words
+from .signals import comments_bulk_created
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Comment)
+def increase_comment_count(sender, instance, created, using, **kwargs):
+    """Новый комментарий увеличивает счётчик новости."""
+    if created:
+        News.objects.using(using).filter(pk=instance.news_id).update(
+            comment_count=F('comment_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def decrease_comment_count(sender, instance, using, **kwargs):
+    """
+    Удалённый комментарий уменьшает счётчик новости.
+
+    Срабатывает и при каскадном удалении, например вместе с автором.
+    """
+    News.objects.using(using).filter(
+        pk=instance.news_id, comment_count__gt=0
+    ).update(comment_count=F('comment_count') - 1)
+
+
+@receiver(comments_bulk_created, sender=Comment)
+def recount_bulk_comments(sender, news_ids, using, **kwargs):
+    News.objects.using(using).filter(pk__in=news_ids).recount_comments()
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def invalidate_news_pages(sender, instance, **kwargs):
+    invalidate_news(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    """Покрывает и формы на сайте, и правки через админку."""
+    invalidate_news(instance.news_id)
+
+
+@receiver(comments_bulk_created, sender=Comment)
+def invalidate_bulk_comment_pages(sender, news_ids, **kwargs):
+    invalidate_news(*news_ids)
+
+
+@receiver(post_save, sender=Comment)
+def publish_comment_save(sender, instance, created, using, **kwargs):
+    """
+    Событие уходит подписчикам после фиксации транзакции.
+
+    Для правки автор не нужен: клиент меняет только текст,
+    а обращение к `author` стоило бы лишнего запроса.
+    """
+    if created:
+        event_type, data = 'created', comment_data(instance)
+    else:
+        event_type, data = 'updated', comment_data(instance, author=False)
+    transaction.on_commit(
+        lambda: hub.publish(instance.news_id, event_type, data), using=using
+    )
+
+
+@receiver(post_delete, sender=Comment)
+def publish_comment_delete(sender, instance, using, **kwargs):
+    data = {'id': instance.pk}
+    transaction.on_commit(
+        lambda: hub.publish(instance.news_id, 'deleted', data), using=using
+    )
+
+
+# Массовое создание (сидинг, импорт) в живые обновления не попадает:
+# такие комментарии появятся при следующей загрузке страницы.
+
+
+@receiver(post_save, sender=BadWord)
+@receiver(post_delete, sender=BadWord)
+def reload_bad_words(sender, **kwargs):
+    """Остальные процессы заметят изменения при плановой проверке."""
+    bad_words.expire()
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_save(sender, created, **kwargs):
+    WRITES.inc('comment', 'create' if created else 'update')
+
+
+@receiver(post_delete, sender=Comment)
+def count_comment_delete(sender, **kwargs):
+    WRITES.inc('comment', 'delete')
+
+
+@receiver(comments_bulk_created, sender=Comment)
+def count_bulk_comments(sender, count, **kwargs):
+    WRITES.inc('comment', 'create', amount=count)
+
+
+def page_cache_stats():
+    """Счётчики страничного кеша общие для процессов: они в самом кеше."""
+    stats = get_stats()
+    return stats['hits'], stats['misses']
+
+
+register_cache('news_pages', page_cache_stats)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    """Покрывает и смену пароля: `set_password` сохраняется через `save`."""
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
@@ -0,0 +1,190 @@
+"""
+Очередь записи комментариев для единственного писателя SQLite.
+
+При `NEWS_COMMENT_INGEST = True` представление `NewsComment` проверяет
+форму в потоке запроса, а сохранение передаёт `CommentWriter`.
+Фоновый поток собирает до `NEWS_COMMENT_INGEST_BATCH_SIZE`
+комментариев, ожидая не дольше `NEWS_COMMENT_INGEST_FLUSH_INTERVAL`
+секунд после первого, и записывает пачку одной транзакцией. Так
+блокировка записи берётся один раз на пачку, а не на каждый
+комментарий. Отправитель ждёт фиксации своей пачки и только потом
+получает редирект.
+
+В очереди не больше `NEWS_COMMENT_INGEST_MAX_PENDING` комментариев.
+Если места нет `NEWS_COMMENT_INGEST_TIMEOUT` секунд, `submit`
+выбрасывает `IngestBusy`: комментарий не принят, и его можно
+отправить снова. Попавший в очередь комментарий будет записан, поэтому
+после того же ожидания фиксации `submit` просто сообщает, что запись
+ещё не закончена, — повторная отправка создала бы дубль.
+
+Если пачка не записалась, например новость удалили, пока комментарий
+ждал, её комментарии записываются по одному. Ошибку получает только
+отправитель проблемного комментария.
+
+`post_save` срабатывает для каждого комментария как обычно, а
+колбэки `on_commit` выполняются после фиксации пачки.
+"""
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, router, transaction
+
+from yanews.metrics import Histogram
+
+from .models import Comment
+
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+INGEST_BATCH_SIZE = Histogram(
+    'news_comment_ingest_batch_size',
+    'Комментариев в одной транзакции очереди записи.',
+    buckets=BATCH_SIZE_BUCKETS,
+)
+
+STOP = object()
+
+
+class IngestBusy(Exception):
+    """Очередь переполнена, и комментарий не принят."""
+
+
+class PendingComment:
+    __slots__ = ('comment', 'done', 'error')
+
+    def __init__(self, comment):
+        self.comment = comment
+        self.done = threading.Event()
+        self.error = None
+
+
+class CommentWriter:
+    """
+    Фоновый поток, записывающий комментарии пачками.
+
+    Параметры, не переданные явно, берутся из настроек при каждом
+    обращении. Поток запускается первым `submit`.
+    """
+
+    def __init__(self, batch_size=None, flush_interval=None,
+                 max_pending=None, timeout=None):
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+
+    @property
+    def batch_size(self):
+        return self._batch_size or settings.NEWS_COMMENT_INGEST_BATCH_SIZE
+
+    @property
+    def flush_interval(self):
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return settings.NEWS_COMMENT_INGEST_FLUSH_INTERVAL
+
+    @property
+    def timeout(self):
+        return self._timeout or settings.NEWS_COMMENT_INGEST_TIMEOUT
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._queue = queue.Queue(
+                    self._max_pending
+                    or settings.NEWS_COMMENT_INGEST_MAX_PENDING
+                )
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,),
+                    name='comment-writer', daemon=True,
+                )
+                self._thread.start()
+            return self._queue
+
+    def stop(self):
+        """Дописывает очередь и останавливает поток."""
+        with self._lock:
+            thread, pending = self._thread, self._queue
+            self._thread = self._queue = None
+        if thread is not None:
+            pending.put(STOP)
+            thread.join()
+
+    def submit(self, comment):
+        """
+        Ставит комментарий в очередь и ждёт фиксации его пачки.
+
+        Возвращает `False`, если комментарий принят, но за отведённое
+        время ещё не записан.
+        """
+        pending = PendingComment(comment)
+        timeout = self.timeout
+        try:
+            self.start().put(pending, timeout=timeout)
+        except queue.Full:
+            raise IngestBusy('Очередь комментариев переполнена.') from None
+        if not pending.done.wait(timeout):
+            return False
+        if pending.error is not None:
+            raise pending.error
+        return True
+
+    def _collect(self, pending_queue, first):
+        """
+        Пачка начинается с `first` и ждёт остальных до конца интервала.
+
+        Возвращает пачку и признак остановки.
+        """
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        batch_size = self.batch_size
+        while len(batch) < batch_size:
+            try:
+                item = pending_queue.get(
+                    timeout=max(deadline - time.monotonic(), 0)
+                )
+            except queue.Empty:
+                break
+            if item is STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self, pending_queue):
+        stopping = False
+        try:
+            while not stopping:
+                item = pending_queue.get()
+                if item is STOP:
+                    break
+                batch, stopping = self._collect(pending_queue, item)
+                close_old_connections()
+                self.write(batch)
+        finally:
+            close_old_connections()
+
+    def write(self, batch):
+        using = router.db_for_write(Comment)
+        try:
+            with transaction.atomic(using=using):
+                for pending in batch:
+                    pending.comment.save(using=using)
+        except Exception:
+            for pending in batch:
+                # Номера из откаченной транзакции недействительны.
+                pending.comment.pk = None
+                try:
+                    with transaction.atomic(using=using):
+                        pending.comment.save(using=using)
+                except Exception as error:
+                    pending.error = error
+        INGEST_BATCH_SIZE.observe(len(batch))
+        for pending in batch:
+            pending.done.set()
+
+
+comment_writer = CommentWriter()
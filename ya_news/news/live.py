@@ -0,0 +1,375 @@
+"""
+Живые обновления комментариев через Server-Sent Events.
+
+`CommentHub` раздаёт события внутри процесса. Обработчики сигналов
+(news.handlers) публикуют созданные, изменённые и удалённые
+комментарии после фиксации транзакции, а открытые потоки `news:live`
+получают их в свои очереди asyncio. Последние `LIVE_COMMENTS_HISTORY`
+событий каждой новости хранятся в памяти: клиент, переподключившись
+с `Last-Event-ID` или `?since=`, получает пропущенное. Если вытеснена
+история именно этой новости, клиент получает `reset` и перезагружает
+страницу. Если номер клиента к истории не относится (другой процесс,
+перезапуск, у новости не было событий), — `resync` с текущим номером.
+
+Страница номер не содержит: она может лежать в страничном кеше.
+Клиент подключается без номера и берёт его из первого сообщения.
+
+Под ASGI поток обслуживает `LiveCommentsApplication` прямо в цикле
+событий, минуя middleware Django: простаивающее соединение стоит
+одной корутины и очереди, и один асинхронный воркер держит тысячи
+клиентов. Под WSGI тот же URL обслуживает `news.views.LiveComments`:
+отдаёт накопленные события и закрывает ответ, а браузер
+переподключается через `retry` миллисекунд.
+
+Хаб у каждого процесса свой, и события видны только в процессе,
+через который прошла запись. Для нескольких процессов нужен общий
+канал, например Redis pub/sub.
+"""
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import Resolver404, resolve
+
+from .models import News
+
+LIVE_VIEW_NAME = 'news:live'
+# Номер клиента не относится к истории новости: пропуски не восстановить,
+# но и перезагрузка ничего не даст.
+RESYNC = object()
+
+
+class Event:
+    __slots__ = ('id', 'news_id', 'type', 'data')
+
+    def __init__(self, id, news_id, type, data):
+        self.id = id
+        self.news_id = news_id
+        self.type = type
+        self.data = data
+
+
+class Subscription:
+    """Очередь одного потока; живёт в цикле событий подписчика."""
+
+    def __init__(self, news_id, maxsize):
+        self.news_id = news_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.closed = False
+        self.replay = []
+        self.last_id = 0
+
+    def push(self, event):
+        """
+        Вызывается в цикле подписчика.
+
+        Переполненная очередь означает, что клиент не успевает читать:
+        поток закрывается, и клиент догонит по истории после
+        переподключения.
+        """
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.close()
+
+    def close(self):
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self):
+        """Следующее событие или None, если поток закрыт."""
+        return await self.queue.get()
+
+
+def deliver(subscriptions, event):
+    for subscription in subscriptions:
+        subscription.push(event)
+
+
+class History:
+    __slots__ = ('events', 'floor')
+
+    def __init__(self, size, floor):
+        self.events = deque(maxlen=size)
+        # События с id не больше `floor` могли быть вытеснены.
+        self.floor = floor
+
+
+class CommentHub:
+    """
+    Потокобезопасная раздача событий подписчикам одного процесса.
+
+    Номера событий начинаются с текущего времени в миллисекундах,
+    поэтому номера разных запусков процесса почти не пересекаются.
+    """
+
+    def __init__(self, history_size=100, max_news=1000, queue_size=100):
+        self.history_size = history_size
+        self.max_news = max_news
+        self.queue_size = queue_size
+        start = int(time.time() * 1000)
+        self._ids = itertools.count(start + 1)
+        self._lock = threading.Lock()
+        self._history = OrderedDict()
+        # Последний номер вытесненной истории новости.
+        self._evicted = OrderedDict()
+        self._subscribers = {}
+        self._start = start
+        self.last_id = start
+
+    def _missed(self, news_id, since):
+        """
+        События новости после `since`.
+
+        None — вытеснена часть собственной истории новости,
+        `RESYNC` — номер клиента к истории новости не относится.
+        Повтор уже полученных событий безвреден: клиент их узнаёт.
+        """
+        if since is None:
+            return []
+        if since > self.last_id:
+            return RESYNC
+        history = self._history.get(news_id)
+        if history is None:
+            lost = self._evicted.get(news_id)
+            return None if lost is not None and since < lost else RESYNC
+        if since < history.floor and history.floor > self._start:
+            return None
+        return [event for event in history.events if event.id > since]
+
+    def replay(self, news_id, since):
+        """Пропущенные события и номер последнего события процесса."""
+        with self._lock:
+            return self._missed(news_id, since), self.last_id
+
+    def subscribe(self, news_id, since=None):
+        """
+        Подписка на события новости; вызывается из цикла событий.
+
+        Пропущенные события (`replay`) и регистрация подписчика берутся
+        под одной блокировкой, поэтому между ними ничего не теряется.
+        """
+        subscription = Subscription(news_id, self.queue_size)
+        with self._lock:
+            subscription.replay = self._missed(news_id, since)
+            subscription.last_id = self.last_id
+            self._subscribers.setdefault(news_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.news_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.news_id]
+
+    def subscriber_count(self, news_id=None):
+        with self._lock:
+            if news_id is not None:
+                return len(self._subscribers.get(news_id, ()))
+            return sum(map(len, self._subscribers.values()))
+
+    def publish(self, news_id, type, data):
+        """Можно вызывать из любого потока."""
+        with self._lock:
+            event = Event(next(self._ids), news_id, type, data)
+            self.last_id = event.id
+            history = self._history.get(news_id)
+            if history is None:
+                history = self._history[news_id] = History(
+                    self.history_size,
+                    self._evicted.pop(news_id, self._start),
+                )
+            else:
+                self._history.move_to_end(news_id)
+            if len(history.events) == history.events.maxlen:
+                history.floor = history.events[0].id
+            history.events.append(event)
+            if len(self._history) > self.max_news:
+                evicted_id, evicted = self._history.popitem(last=False)
+                self._evicted[evicted_id] = evicted.events[-1].id
+                if len(self._evicted) > self.max_news:
+                    self._evicted.popitem(last=False)
+            subscribers = list(self._subscribers.get(news_id, ()))
+        by_loop = {}
+        for subscription in subscribers:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+        # Одно пробуждение на цикл событий, а не на каждого подписчика.
+        for loop, group in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(deliver, group, event)
+            except RuntimeError:
+                # Цикл подписчиков уже закрыт.
+                for subscription in group:
+                    self.unsubscribe(subscription)
+        return event
+
+
+hub = CommentHub(
+    history_size=settings.LIVE_COMMENTS_HISTORY,
+    max_news=settings.LIVE_COMMENTS_MAX_NEWS,
+    queue_size=settings.LIVE_COMMENTS_QUEUE_SIZE,
+)
+
+
+def comment_data(comment, author=True):
+    data = {'id': comment.pk, 'text': comment.text}
+    if author:
+        data.update(
+            author=str(comment.author),
+            author_id=comment.author_id,
+            created=comment.created.isoformat(),
+        )
+    return data
+
+
+def parse_event_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_event(event):
+    data = json.dumps(event.data, ensure_ascii=False)
+    return f'id: {event.id}\nevent: {event.type}\ndata: {data}\n\n'.encode()
+
+
+def format_opening(events, last_id):
+    """
+    Начало потока: интервал переподключения и пропущенные события.
+
+    Если событий нет, клиенту сообщается текущий номер, чтобы
+    следующее переподключение продолжило с него.
+    """
+    chunks = [f'retry: {settings.LIVE_COMMENTS_RETRY}\n\n'.encode()]
+    if events is None:
+        chunks.append(f'id: {last_id}\nevent: reset\ndata: {{}}\n\n'.encode())
+    elif events is RESYNC:
+        chunks.append(
+            f'id: {last_id}\nevent: resync\ndata: {{}}\n\n'.encode()
+        )
+    elif events:
+        chunks.extend(map(format_event, events))
+    else:
+        chunks.append(f'id: {last_id}\n\n'.encode())
+    return b''.join(chunks)
+
+
+@sync_to_async
+def news_exists(pk):
+    close_old_connections()
+    try:
+        return News.objects.filter(pk=pk).exists()
+    finally:
+        close_old_connections()
+
+
+class LiveCommentsApplication:
+    """
+    ASGI-приложение: `news:live` обслуживается в цикле событий,
+    остальные запросы передаются Django.
+    """
+    headers = [
+        (b'content-type', b'text/event-stream; charset=utf-8'),
+        (b'cache-control', b'no-cache'),
+        (b'x-accel-buffering', b'no'),
+    ]
+
+    def __init__(self, application, hub=hub):
+        self.application = application
+        self.hub = hub
+
+    def match(self, scope):
+        if scope['type'] != 'http' or scope['method'] != 'GET':
+            return None
+        try:
+            match = resolve(scope['path'])
+        except Resolver404:
+            return None
+        return match if match.view_name == LIVE_VIEW_NAME else None
+
+    async def __call__(self, scope, receive, send):
+        match = self.match(scope)
+        if match is None:
+            return await self.application(scope, receive, send)
+        news_id = match.kwargs['pk']
+        if not await news_exists(news_id):
+            await send({
+                'type': 'http.response.start',
+                'status': 404,
+                'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+            })
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        headers = dict(scope['headers'])
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        since = parse_event_id(
+            headers.get(b'last-event-id')
+            or query.get('since', [None])[0]
+        )
+        await self.stream(news_id, since, receive, send)
+
+    async def stream(self, news_id, since, receive, send):
+        subscription = self.hub.subscribe(news_id, since)
+        disconnected = asyncio.ensure_future(self.wait_disconnect(receive))
+        next_event = asyncio.ensure_future(subscription.get())
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': self.headers,
+            })
+            await send({
+                'type': 'http.response.body',
+                'body': format_opening(
+                    subscription.replay, subscription.last_id
+                ),
+                'more_body': True,
+            })
+            while True:
+                done, _ = await asyncio.wait(
+                    {next_event, disconnected},
+                    timeout=settings.LIVE_COMMENTS_PING,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if disconnected in done:
+                    return
+                if next_event in done:
+                    event = next_event.result()
+                    if event is None:
+                        break
+                    body = format_event(event)
+                    next_event = asyncio.ensure_future(subscription.get())
+                else:
+                    # Комментарий SSE не даёт прокси закрыть
+                    # простаивающее соединение.
+                    body = b': ping\n\n'
+                await send({
+                    'type': 'http.response.body',
+                    'body': body,
+                    'more_body': True,
+                })
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            self.hub.unsubscribe(subscription)
+            next_event.cancel()
+            disconnected.cancel()
+
+    @staticmethod
+    async def wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
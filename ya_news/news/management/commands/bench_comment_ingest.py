@@ -0,0 +1,119 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import override_settings
+from django.urls import reverse
+
+from news.ingest import comment_writer
+from news.models import Comment, News
+from news.seeding import seed_news
+from yanews.benchmark import BenchRequest, benchmark_databases, percentile
+
+User = get_user_model()
+
+MODES = ('sync', 'queue')
+
+
+def post_comments(client, paths, count, latencies, statuses, barrier):
+    try:
+        barrier.wait()
+        for index in range(count):
+            start = time.perf_counter()
+            response = client.post(
+                paths[index % len(paths)], {'text': f'Комментарий {index}'}
+            )
+            latencies.append(time.perf_counter() - start)
+            statuses.append(response.status_code)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает число записанных комментариев в секунду: '
+        'сохранение в потоке запроса и очередь записи пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--comments', type=int, default=2000,
+            help='Комментариев на каждый режим.'
+        )
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--news', type=int, default=10)
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--flush-interval', type=float, default=0.005,
+            help='Секунд ожидания пачки после первого комментария.'
+        )
+        parser.add_argument('--db-dir', help='Каталог для тестовой базы.')
+
+    def run_mode(self, mode, options, paths, users):
+        clients = [
+            BenchRequest(mode, paths[0], user).make_client()
+            for user in users
+        ]
+        workers = len(clients)
+        latencies, statuses = [], []
+        barrier = threading.Barrier(workers + 1)
+        threads = [
+            threading.Thread(target=post_comments, args=(
+                client, paths,
+                options['comments'] // workers
+                + (index < options['comments'] % workers),
+                latencies, statuses, barrier,
+            ))
+            for index, client in enumerate(clients)
+        ]
+        before = Comment.objects.count()
+        with override_settings(
+            NEWS_COMMENT_INGEST=mode == 'queue',
+            NEWS_COMMENT_INGEST_BATCH_SIZE=options['batch_size'],
+            NEWS_COMMENT_INGEST_FLUSH_INTERVAL=options['flush_interval'],
+        ):
+            for thread in threads:
+                thread.start()
+            barrier.wait()
+            start = time.perf_counter()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            comment_writer.stop()
+        committed = Comment.objects.count() - before
+        latencies.sort()
+        return {
+            'committed': committed,
+            'per_second': committed / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 0.5) * 1e3,
+            'p95_ms': percentile(latencies, 0.95) * 1e3,
+            'rejected': sum(status >= 400 for status in statuses),
+        }
+
+    def handle(self, *args, **options):
+        with benchmark_databases(directory=options['db_dir']):
+            seed_news(options['news'])
+            User.objects.bulk_create(
+                User(username=f'bench_ingest_{index}')
+                for index in range(options['workers'])
+            )
+            users = list(User.objects.filter(
+                username__startswith='bench_ingest_'
+            ))
+            paths = [
+                reverse('news:detail', args=(pk,))
+                for pk in News.objects.values_list('pk', flat=True)
+            ]
+            self.stdout.write(
+                f'{"режим":<6} {"записано":>9} {"в секунду":>10} '
+                f'{"p50, мс":>8} {"p95, мс":>8} {"отказы":>7}'
+            )
+            for mode in MODES:
+                row = self.run_mode(mode, options, paths, users)
+                self.stdout.write(
+                    f'{mode:<6} {row["committed"]:>9} '
+                    f'{row["per_second"]:>10.1f} {row["p50_ms"]:>8.2f} '
+                    f'{row["p95_ms"]:>8.2f} {row["rejected"]:>7}'
+                )
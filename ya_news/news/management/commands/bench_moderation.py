@@ -0,0 +1,68 @@
+import random
+import string
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.moderation import WordMatcher
+
+ALPHABET = string.ascii_lowercase + 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+def random_word(rng, min_length=4, max_length=12):
+    length = rng.randint(min_length, max_length)
+    return ''.join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def linear_search(words, text):
+    """Прежняя проверка: поиск подстроки для каждого слова словаря."""
+    lowered_text = text.lower()
+    return any(word in lowered_text for word in words)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время проверки комментария перебором слов '
+        'и автоматом Ахо — Корасик на словарях разного размера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int,
+            default=(10, 100, 1000, 10000, 50000),
+        )
+        parser.add_argument('--text-length', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        words = []
+        text = ' '.join(
+            random_word(rng) for _ in range(options['text_length'] // 8)
+        )[:options['text_length']]
+        repeat = options['repeat']
+        self.stdout.write(
+            f'{"слов":>8} {"сборка, мс":>12} '
+            f'{"перебор, мкс":>14} {"автомат, мкс":>14}'
+        )
+        for size in sorted(options['sizes']):
+            while len(words) < size:
+                word = random_word(rng)
+                if word not in text:
+                    words.append(word)
+            build_time = timeit.timeit(lambda: WordMatcher(words), number=1)
+            matcher = WordMatcher(words)
+            if matcher.search(text):
+                raise CommandError('Текст не должен содержать слов словаря.')
+            linear_time = timeit.timeit(
+                lambda: linear_search(words, text), number=repeat
+            )
+            matcher_time = timeit.timeit(
+                lambda: matcher.search(text), number=repeat
+            )
+            self.stdout.write(
+                f'{size:>8} {build_time * 1e3:>12.1f} '
+                f'{linear_time / repeat * 1e6:>14.1f} '
+                f'{matcher_time / repeat * 1e6:>14.1f}'
+            )
@@ -0,0 +1,156 @@
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from yanews.sqlite3.base import DEFAULT_PRAGMAS, apply_pragmas
+
+# Прежняя конфигурация: журнал отката, соединение на каждый запрос.
+MODES = {
+    'default': {'pragmas': {}, 'persistent': False, 'begin': 'BEGIN'},
+    'tuned': {
+        'pragmas': DEFAULT_PRAGMAS,
+        'persistent': True,
+        'begin': 'BEGIN IMMEDIATE',
+    },
+}
+
+
+class Worker(threading.Thread):
+    """Поток, выполняющий одну операцию до истечения времени."""
+
+    def __init__(self, path, mode, operation, deadline):
+        super().__init__()
+        self.path = path
+        self.mode = mode
+        self.operation = operation
+        self.deadline = deadline
+        self.done = 0
+        self.locked = 0
+        self.latencies = []
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, isolation_level=None)
+        apply_pragmas(connection, self.mode['pragmas'])
+        return connection
+
+    def run(self):
+        connection = self.connect() if self.mode['persistent'] else None
+        while time.perf_counter() < self.deadline:
+            current = connection or self.connect()
+            start = time.perf_counter()
+            try:
+                self.operation(current, self.mode['begin'])
+            except sqlite3.OperationalError:
+                self.locked += 1
+                if current.in_transaction:
+                    current.execute('ROLLBACK')
+            else:
+                self.done += 1
+                self.latencies.append(time.perf_counter() - start)
+            finally:
+                if connection is None:
+                    current.close()
+        if connection is not None:
+            connection.close()
+
+
+def write_comment(connection, begin):
+    connection.execute(begin)
+    connection.execute(
+        'INSERT INTO comment (news_id, text) VALUES (1, ?)', ('Текст',)
+    )
+    connection.execute(
+        'UPDATE news SET comment_count = comment_count + 1 WHERE id = 1'
+    )
+    connection.execute('COMMIT')
+
+
+def read_comments(connection, begin):
+    connection.execute(
+        'SELECT id, text FROM comment WHERE news_id = 1 '
+        'ORDER BY id DESC LIMIT 50'
+    ).fetchall()
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность писателей и читателей SQLite '
+        'с настройками по умолчанию и с настройками yanews.sqlite3.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=3.0)
+        parser.add_argument('--rows', type=int, default=10000)
+
+    def prepare(self, path, rows):
+        connection = sqlite3.connect(path, isolation_level=None)
+        connection.executescript(
+            'CREATE TABLE news ('
+            'id INTEGER PRIMARY KEY, comment_count INTEGER NOT NULL);'
+            'CREATE TABLE comment ('
+            'id INTEGER PRIMARY KEY, news_id INTEGER NOT NULL, '
+            'text TEXT NOT NULL);'
+            'CREATE INDEX comment_news_idx ON comment (news_id, id);'
+            'INSERT INTO news VALUES (1, 0);'
+        )
+        connection.executemany(
+            'INSERT INTO comment (news_id, text) VALUES (1, ?)',
+            (('Текст',) for _ in range(rows))
+        )
+        connection.close()
+
+    def run_mode(self, mode, options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(Path(directory) / 'bench.sqlite3')
+            self.prepare(path, options['rows'])
+            deadline = time.perf_counter() + options['seconds']
+            workers = [
+                Worker(path, mode, write_comment, deadline)
+                for _ in range(options['writers'])
+            ] + [
+                Worker(path, mode, read_comments, deadline)
+                for _ in range(options['readers'])
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        writers = workers[:options['writers']]
+        readers = workers[options['writers']:]
+        return writers, readers
+
+    def handle(self, *args, **options):
+        seconds = options['seconds']
+        self.stdout.write(
+            f'{"режим":>8} {"роль":>9} {"оп/с":>9} '
+            f'{"p50, мс":>9} {"p99, мс":>9} {"locked":>7}'
+        )
+        for name, mode in MODES.items():
+            for role, workers in zip(
+                ('писатели', 'читатели'), self.run_mode(mode, options)
+            ):
+                latencies = [
+                    latency
+                    for worker in workers for latency in worker.latencies
+                ]
+                done = sum(worker.done for worker in workers)
+                locked = sum(worker.locked for worker in workers)
+                self.stdout.write(
+                    f'{name:>8} {role:>9} {done / seconds:>9.0f} '
+                    f'{percentile(latencies, 0.5) * 1e3:>9.2f} '
+                    f'{percentile(latencies, 0.99) * 1e3:>9.2f} '
+                    f'{locked:>7}'
+                )
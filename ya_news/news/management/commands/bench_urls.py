@@ -0,0 +1,145 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from news import urls
+from news.models import Comment, News
+from news.seeding import seed_comments, seed_news, seed_users
+from yanews.benchmark import (
+    BenchRequest, benchmark_databases, format_report, read_results,
+    run_benchmark, write_results
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет отдельную тестовую базу и прогоняет все URL '
+        'из news.urls в несколько потоков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--news', type=int, default=1000)
+        parser.add_argument(
+            '--comments', type=int, default=5,
+            help='Комментариев у каждой новости.'
+        )
+        parser.add_argument(
+            '--deep-news', type=int, default=5,
+            help='Новостей с длинной веткой комментариев.'
+        )
+        parser.add_argument('--thread-depth', type=int, default=2000)
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов на каждый URL.'
+        )
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--anonymous', action='store_true',
+            help='Публичные страницы запрашивать анонимно, через кеш.'
+        )
+        parser.add_argument('--url', nargs='+', dest='urls')
+        parser.add_argument('-o', '--output', help='Файл для JSON.')
+        parser.add_argument(
+            '--baseline', help='JSON прошлого прогона для сравнения.'
+        )
+        parser.add_argument('--db-dir', help='Каталог для тестовой базы.')
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Не удалять базу и не заполнять её повторно.'
+        )
+
+    def seed(self, options):
+        seed_users(options['users'])
+        seed_news(options['news'])
+        news_ids = list(News.objects.order_by('pk').values_list(
+            'pk', flat=True
+        ))
+        author_ids = list(User.objects.order_by('pk').values_list(
+            'pk', flat=True
+        ))
+        seed_comments(news_ids, options['comments'], author_ids)
+        seed_comments(
+            news_ids[:options['deep_news']], options['thread_depth'],
+            author_ids
+        )
+        User.objects.create(username='bench_staff', is_staff=True)
+
+    def bench_requests(self, options):
+        author = User.objects.filter(
+            username__startswith='user'
+        ).order_by('pk').first()
+        staff = User.objects.get(username='bench_staff')
+        reader = None if options['anonymous'] else author
+        deep_news = News.objects.order_by('-comment_count', 'pk').first()
+        comment = Comment.objects.filter(author=author).order_by('pk').first()
+        if deep_news is None or comment is None:
+            raise CommandError('В базе нет данных для прогона.')
+        return {
+            'news:home': BenchRequest(
+                'news:home', reverse('news:home'), reader
+            ),
+            'news:detail': BenchRequest(
+                'news:detail',
+                reverse('news:detail', args=(deep_news.pk,)), reader
+            ),
+            'news:live': BenchRequest(
+                'news:live',
+                reverse('news:live', args=(deep_news.pk,)) + '?since=0',
+                reader
+            ),
+            'news:edit': BenchRequest(
+                'news:edit', reverse('news:edit', args=(comment.pk,)), author
+            ),
+            'news:delete': BenchRequest(
+                'news:delete',
+                reverse('news:delete', args=(comment.pk,)), author
+            ),
+            'news:export': BenchRequest(
+                'news:export', reverse('news:export'), staff
+            ),
+            'news:search': BenchRequest(
+                'news:search', reverse('news:search') + '?q=новость', reader
+            ),
+        }
+
+    def handle(self, *args, **options):
+        names = [
+            f'{urls.app_name}:{pattern.name}'
+            for pattern in urls.urlpatterns if pattern.name
+        ]
+        with benchmark_databases(
+                directory=options['db_dir'], keepdb=options['keepdb']
+        ):
+            if not (options['keepdb'] and News.objects.exists()):
+                self.seed(options)
+            bench_requests = self.bench_requests(options)
+            missing = set(names) - set(bench_requests)
+            if missing:
+                raise CommandError(
+                    'Нет сценария для URL: ' + ', '.join(sorted(missing))
+                )
+            selected = options['urls'] or names
+            results = run_benchmark(
+                [bench_requests[name] for name in selected],
+                options['requests'], options['workers'], options['warmup'],
+                meta={
+                    'project': 'ya_news',
+                    'options': {
+                        key: options[key] for key in (
+                            'users', 'news', 'comments', 'deep_news',
+                            'thread_depth', 'requests', 'workers',
+                            'anonymous',
+                        )
+                    },
+                },
+            )
+        baseline = None
+        if options['baseline']:
+            baseline = read_results(options['baseline'])
+        self.stdout.write(format_report(results, baseline))
+        if options['output']:
+            write_results(results, options['output'])
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from news.export import iter_news_ndjson, parse_since
+
+
+class Command(BaseCommand):
+    help = 'Выгружает новости с комментариями в формате NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-o', '--output',
+            help='Файл для выгрузки; по умолчанию stdout.'
+        )
+        parser.add_argument('--since', help='Новости не старше даты.')
+        parser.add_argument(
+            '--comments-since',
+            help='Комментарии не старше даты или даты со временем.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int,
+            default=settings.NEWS_EXPORT_CHUNK_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_since(options['since'])
+            comments_since = parse_since(
+                options['comments_since'], as_datetime=True
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        lines = iter_news_ndjson(
+            since=since,
+            comments_since=comments_since,
+            chunk_size=options['chunk_size'],
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
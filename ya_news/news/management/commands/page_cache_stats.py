@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from news.cache import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кеша страниц новостей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Обнулить счётчики после вывода.'
+        )
+
+    def handle(self, *args, **options):
+        stats = get_stats()
+        self.stdout.write(
+            'Попаданий: {hits}, промахов: {misses}, '
+            'доля попаданий: {hit_ratio:.1%}'.format(**stats)
+        )
+        if options['reset']:
+            reset_stats()
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from news.models import PurgeTask
+from news.purge import pending_tasks, run_purge, schedule_purge
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет новости или пользователей вместе с комментариями '
+        'пачками. Прерванное удаление продолжается с --pending.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'target', nargs='?',
+            choices=[target for target, _ in PurgeTask.TARGETS],
+        )
+        parser.add_argument('ids', nargs='*', type=int)
+        parser.add_argument(
+            '--pending', action='store_true',
+            help='Продолжить незавершённые удаления.'
+        )
+        parser.add_argument('--batch-size', type=int)
+
+    def progress(self, task):
+        self.stdout.write(f'{task}: {task.deleted} из {task.total}')
+
+    def handle(self, *args, **options):
+        if options['pending']:
+            tasks = list(pending_tasks())
+        elif options['target'] and options['ids']:
+            tasks = [
+                schedule_purge(options['target'], object_id)
+                for object_id in options['ids']
+            ]
+        else:
+            raise CommandError('Укажите что и кого удалить или --pending.')
+        for task in tasks:
+            run_purge(task, options['batch_size'], self.progress)
+            self.stdout.write(self.style.SUCCESS(
+                f'{task}: удалено, комментариев {task.deleted}'
+            ))
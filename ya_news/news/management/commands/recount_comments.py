@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает поле `comment_count` у новостей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'news_ids', nargs='*', type=int,
+            help='id новостей; по умолчанию пересчитываются все.'
+        )
+
+    def handle(self, *args, **options):
+        queryset = News.objects.all()
+        if options['news_ids']:
+            queryset = queryset.filter(pk__in=options['news_ids'])
+        updated = queryset.recount_comments()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано новостей: {updated}')
+        )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет анонсы новостей заново, например после загрузки '
+        'данных в обход ORM или смены EXCERPT_WORDS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = News.objects.refresh_excerpts(options['batch_size'])
+        self.stdout.write(f'Обновлено анонсов: {updated}')
@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from news.models import News
+from news.seeding import chunk_ranges, run_tasks
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро заполняет базу синтетическими пользователями, новостями '
+        'и комментариями, при необходимости в несколько процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--news', type=int, default=100000)
+        parser.add_argument('--comments-per-news', type=int, default=20)
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Процессов, готовящих и вставляющих строки.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--chunk-size', type=int, default=50000,
+            help='Строк в одной задаче процесса.'
+        )
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Начало имён пользователей; должно быть уникальным.'
+        )
+
+    def run(self, tasks, workers, label):
+        started = time.perf_counter()
+        total = 0
+        for _, created in run_tasks(tasks, workers):
+            total += created
+            elapsed = time.perf_counter() - started
+            if self.verbosity > 1:
+                self.stdout.write(
+                    f'{label}: {total} ({total / elapsed:.0f} строк/с)'
+                )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{label}: {total} за {elapsed:.1f} с '
+            f'({total / elapsed if elapsed else 0:.0f} строк/с)'
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        workers = options['workers']
+        batch_size = options['batch_size']
+        chunk_size = options['chunk_size']
+        self.run([
+            ('users', (count, options['prefix'], start),
+             {'batch_size': batch_size})
+            for start, count in chunk_ranges(options['users'], chunk_size)
+        ], workers, 'Пользователи')
+        first_news = News.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        offset = News.objects.count()
+        self.run([
+            ('news', (count, offset + start), {'batch_size': batch_size})
+            for start, count in chunk_ranges(options['news'], chunk_size)
+        ], workers, 'Новости')
+
+        per_news = options['comments_per_news']
+        news_ids = list(News.objects.filter(pk__gt=first_news).order_by(
+            'pk'
+        ).values_list('pk', flat=True))
+        news_per_task = max(chunk_size // max(per_news, 1), 1)
+        self.run([
+            ('comments', (news_ids[start:start + news_per_task], per_news),
+             {'batch_size': batch_size})
+            for start in range(0, len(news_ids), news_per_task)
+        ] if per_news else [], workers, 'Комментарии')
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.stdout.write(self.style.SUCCESS('Готово.'))
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from news.cache import mark_replica_synced
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в реплики из REPLICA_DATABASES '
+        'через backup API; подменяет настоящую репликацию при локальной '
+        'разработке.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'aliases', nargs='*',
+            help='Реплики; по умолчанию все из REPLICA_DATABASES.'
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.REPLICA_DATABASES
+        if not aliases:
+            raise CommandError('Реплики не настроены: REPLICA_DATABASES пуст.')
+        primary = connections[DEFAULT_DB_ALIAS]
+        primary.ensure_connection()
+        for alias in aliases:
+            if alias == DEFAULT_DB_ALIAS or alias not in connections:
+                raise CommandError(f'{alias} не является репликой.')
+            replica = connections[alias]
+            replica.ensure_connection()
+            # Записи, зафиксированные во время копирования, могли
+            # в него не попасть.
+            started = time.time()
+            primary.connection.backup(replica.connection)
+            mark_replica_synced(alias, started)
+            self.stdout.write(
+                self.style.SUCCESS(f'Реплика {alias} обновлена.')
+            )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from yanews.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        'Компилирует шаблоны, заполняет кеши URL и открывает соединения '
+        'с базами; печатает, сколько это заняло.'
+    )
+
+    def handle(self, *args, **options):
+        stats = warm_up()
+        for name in ('templates', 'resolvers', 'locale', 'databases'):
+            self.stdout.write(
+                f'{name}: {stats[name]} за {stats[name + "_ms"]:.1f} мс'
+            )
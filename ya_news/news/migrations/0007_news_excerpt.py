@@ -0,0 +1,79 @@
+# Generated by Django 3.2.15 on 2026-10-17 17:42
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+# Пересборка таблицы в SQLite при добавлении поля
+# удаляет триггеры полнотекстового индекса из 0006.
+TRIGGERS_SQL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS news_news_fts_insert
+    AFTER INSERT ON news_news BEGIN
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_news_fts_delete
+    AFTER DELETE ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_news_fts_update
+    AFTER UPDATE OF title, text ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+)
+# Значение `EXCERPT_WORDS` на момент миграции; дальше анонсы
+# пересчитывает команда `refresh_news_excerpts`.
+EXCERPT_WORDS = 15
+BATCH_SIZE = 1000
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+def fill_excerpts(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    news_list = News.objects.using(schema_editor.connection.alias)
+    last_pk = 0
+    while True:
+        batch = list(news_list.filter(pk__gt=last_pk).order_by('pk').only(
+            'id', 'text'
+        )[:BATCH_SIZE])
+        if not batch:
+            return
+        for news in batch:
+            news.excerpt = Truncator(news.text).words(
+                EXCERPT_WORDS, truncate=' …'
+            )
+        news_list.bulk_update(batch, ['excerpt'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, create_triggers),
+        migrations.AddField(
+            model_name='news',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Анонс'),
+        ),
+        migrations.RunPython(create_triggers, migrations.RunPython.noop),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.15 on 2026-10-17 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_news_excerpt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurgeTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(choices=[('news', 'Новость'), ('user', 'Пользователь')], max_length=10, verbose_name='Что удаляется')),
+                ('object_id', models.BigIntegerField(verbose_name='Идентификатор')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Зависимых строк')),
+                ('deleted', models.PositiveIntegerField(default=0, verbose_name='Удалено строк')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Завершено')),
+            ],
+            options={
+                'verbose_name': 'Удаление',
+                'verbose_name_plural': 'Удаления',
+                'ordering': ('created',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='purgetask',
+            constraint=models.UniqueConstraint(condition=models.Q(('finished__isnull', True)), fields=('target', 'object_id'), name='purge_task_unfinished_unique'),
+        ),
+    ]
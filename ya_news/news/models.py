@@ -2,26 +2,121 @@ from datetime import datetime
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.text import Truncator
+
+from .signals import comments_bulk_created
+
+
+# Столько слов анонса выводится в ленте на главной.
+EXCERPT_WORDS = 15
+
+
+def make_excerpt(text):
+    """То же, что `truncatewords` в шаблоне, но один раз при записи."""
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+
+class NewsQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Массовое создание не вызывает `save`, анонс заполняется здесь."""
+        objs = list(objs)
+        for news in objs:
+            news.excerpt = make_excerpt(news.text)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def for_feed(self):
+        """Только поля ленты: полный текст может быть очень длинным."""
+        return self.only('id', 'title', 'date', 'excerpt', 'comment_count')
+
+    def refresh_excerpts(self, batch_size=1000):
+        """Пересчитывает анонсы пачками; возвращает число новостей."""
+        updated = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                self.filter(pk__gt=last_pk).order_by('pk').only(
+                    'id', 'text', 'excerpt'
+                )[:batch_size]
+            )
+            if not batch:
+                return updated
+            for news in batch:
+                news.excerpt = make_excerpt(news.text)
+            self.model.objects.using(self.db).bulk_update(batch, ['excerpt'])
+            updated += len(batch)
+            last_pk = batch[-1].pk
+
+    def recount_comments(self):
+        """Пересчитывает `comment_count` выбранных новостей одним запросом."""
+        comments = Comment.objects.filter(
+            news=OuterRef('pk')
+        ).order_by().values('news').annotate(total=Count('pk')).values('total')
+        return self.update(
+            comment_count=Coalesce(Subquery(comments), 0)
+        )
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
+    excerpt = models.TextField('Анонс', blank=True, editable=False)
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('-date',), name='news_date_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.excerpt = make_excerpt(self.text)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Массовое создание не вызывает `post_save`.
+
+        Поэтому счётчики затронутых новостей пересчитываются отдельно.
+        """
+        objs = super().bulk_create(objs, *args, **kwargs)
+        news_ids = {comment.news_id for comment in objs}
+        if news_ids:
+            comments_bulk_created.send(
+                sender=self.model, news_ids=news_ids, count=len(objs),
+                using=self.db
+            )
+        return objs
+
 
 class Comment(models.Model):
+    # Отдельный индекс по news не нужен: его заменяет
+    # составной индекс comment_news_created_idx.
     news = models.ForeignKey(
         News,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False,
     )
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -30,8 +125,65 @@ class Comment(models.Model):
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+
+class BadWord(models.Model):
+    word = models.CharField('Слово', max_length=100, unique=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ('word',)
+        verbose_name_plural = 'Запрещённые слова'
+        verbose_name = 'Запрещённое слово'
+
+    def __str__(self):
+        return self.word
+
+
+class PurgeTask(models.Model):
+    """
+    Удаление объекта с большим числом зависимых строк, см. news.purge.
+
+    Пока `finished` пуст, удаление продолжает команда `purge --pending`.
+    """
+    NEWS = 'news'
+    USER = 'user'
+    TARGETS = (
+        (NEWS, 'Новость'),
+        (USER, 'Пользователь'),
+    )
+
+    target = models.CharField('Что удаляется', max_length=10, choices=TARGETS)
+    object_id = models.BigIntegerField('Идентификатор')
+    total = models.PositiveIntegerField('Зависимых строк', default=0)
+    deleted = models.PositiveIntegerField('Удалено строк', default=0)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    finished = models.DateTimeField('Завершено', null=True, blank=True)
+
+    class Meta:
+        ordering = ('created',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('target', 'object_id'),
+                condition=models.Q(finished__isnull=True),
+                name='purge_task_unfinished_unique',
+            ),
+        )
+        verbose_name_plural = 'Удаления'
+        verbose_name = 'Удаление'
+
+    def __str__(self):
+        return f'{self.get_target_display()} {self.object_id}'
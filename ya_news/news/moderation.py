@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import BadWord
+
+BAD_WORDS = (
+    'редиска',
+    'негодяй',
+    # Дополните список на своё усмотрение.
+)
+
+
+class WordMatcher:
+    """
+    Автомат Ахо — Корасик для поиска любого из слов за один проход.
+
+    Время проверки зависит от длины текста, но не от размера словаря.
+    """
+
+    def __init__(self, words):
+        self._goto = [{}]
+        self._fail = [0]
+        self._terminal = [False]
+        self.size = 0
+        for word in words:
+            word = word.strip().lower()
+            if word:
+                self._add(word)
+        self._link()
+
+    def __len__(self):
+        return self.size
+
+    def _add(self, word):
+        node = 0
+        for char in word:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._terminal.append(False)
+                self._goto[node][char] = child
+            node = child
+        if not self._terminal[node]:
+            self._terminal[node] = True
+            self.size += 1
+
+    def _link(self):
+        """Строит суффиксные ссылки обходом бора в ширину."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                if self._terminal[self._fail[child]]:
+                    self._terminal[child] = True
+
+    def search(self, text):
+        """Есть ли в тексте хотя бы одно слово из словаря."""
+        goto, fail, terminal = self._goto, self._fail, self._terminal
+        node = 0
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if terminal[node]:
+                return True
+        return False
+
+
+def read_words_file(path):
+    """Одно слово на строку, строки с `#` — комментарии."""
+    with open(path, encoding='utf-8') as words_file:
+        for line in words_file:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+
+class BadWordsDictionary:
+    """
+    Словарь запрещённых слов, собранный один раз на процесс.
+
+    Слова берутся из `BAD_WORDS`, файла `BAD_WORDS_FILE`
+    и таблицы `BadWord`. Источники проверяются не чаще
+    раза в `BAD_WORDS_CHECK_INTERVAL` секунд, и при изменениях
+    автомат пересобирается без перезапуска процесса.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._matcher = None
+        self._stamp = None
+        self._checked_at = float('-inf')
+
+    def _file_stamp(self):
+        path = settings.BAD_WORDS_FILE
+        if not path:
+            return None
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return str(path), stat.st_mtime_ns, stat.st_size
+
+    def _db_stamp(self):
+        return tuple(BadWord.objects.aggregate(
+            total=Count('pk'), updated=Max('updated')
+        ).values())
+
+    def _load_words(self, file_stamp):
+        words = list(BAD_WORDS)
+        if file_stamp is not None:
+            words.extend(read_words_file(file_stamp[0]))
+        words.extend(BadWord.objects.values_list('word', flat=True))
+        return words
+
+    def expire(self):
+        """Проверить источники при следующем обращении."""
+        self._checked_at = float('-inf')
+
+    def get_matcher(self):
+        now = time.monotonic()
+        interval = settings.BAD_WORDS_CHECK_INTERVAL
+        if self._matcher is not None and now - self._checked_at < interval:
+            return self._matcher
+        with self._lock:
+            if (self._matcher is not None
+                    and now - self._checked_at < interval):
+                return self._matcher
+            file_stamp = self._file_stamp()
+            stamp = (file_stamp, self._db_stamp())
+            if stamp != self._stamp or self._matcher is None:
+                self._matcher = WordMatcher(self._load_words(file_stamp))
+                self._stamp = stamp
+            self._checked_at = now
+            return self._matcher
+
+
+bad_words = BadWordsDictionary()
+
+
+def contains_bad_words(text):
+    return bad_words.get_matcher().search(text)
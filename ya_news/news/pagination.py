@@ -0,0 +1,89 @@
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_SEPARATOR = '|'
+
+
+def encode_cursor(comment):
+    """Курсор — позиция комментария в порядке `(created, id)`."""
+    raw = f'{comment.created.isoformat()}{CURSOR_SEPARATOR}{comment.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Возвращает `(created, id)` или `None` для испорченного курсора."""
+    padding = '=' * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+        created, pk = raw.rsplit(CURSOR_SEPARATOR, 1)
+        created = parse_datetime(created)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if created is None:
+        return None
+    return created, pk
+
+
+class CommentPage:
+    """Страница ветки комментариев, от старых к новым."""
+
+    def __init__(self, object_list, has_older, has_newer):
+        self.object_list = object_list
+        self.has_older = has_older
+        self.has_newer = has_newer
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def older_cursor(self):
+        if self.has_older and self.object_list:
+            return encode_cursor(self.object_list[0])
+        return None
+
+    @property
+    def newer_cursor(self):
+        if self.has_newer and self.object_list:
+            return encode_cursor(self.object_list[-1])
+        return None
+
+
+def paginate_comments(queryset, page_size, after=None, before=None):
+    """
+    Курсорная пагинация комментариев по `(created, id)`.
+
+    `after` — курсор последнего комментария предыдущей страницы,
+    `before` — курсор первого комментария следующей страницы.
+    Каждая страница стоит одного запроса по индексу независимо
+    от глубины ветки.
+    """
+    after = decode_cursor(after) if after else None
+    before = decode_cursor(before) if before else None
+    if before is not None:
+        created, pk = before
+        rows = list(
+            queryset.filter(
+                Q(created__lt=created) | Q(created=created, pk__lt=pk)
+            ).order_by('-created', '-pk')[:page_size + 1]
+        )
+        has_older = len(rows) > page_size
+        rows = rows[:page_size]
+        rows.reverse()
+        return CommentPage(rows, has_older=has_older, has_newer=True)
+    if after is not None:
+        created, pk = after
+        queryset = queryset.filter(
+            Q(created__gt=created) | Q(created=created, pk__gt=pk)
+        )
+    rows = list(queryset.order_by('created', 'pk')[:page_size + 1])
+    has_newer = len(rows) > page_size
+    return CommentPage(
+        rows[:page_size], has_older=after is not None, has_newer=has_newer
+    )
@@ -0,0 +1,165 @@
+"""
+Удаление новостей и пользователей с большим числом комментариев.
+
+`Collector` Django загружает все зависимые строки в память и удаляет
+их в одной транзакции, всё это время держа блокировку записи. Здесь
+комментарии удаляются пачками по `PURGE_BATCH_SIZE` прямыми `DELETE`,
+каждая пачка в своей короткой транзакции: между ними успевают
+остальные писатели. Сам объект удаляется обычным `delete()` последним,
+когда зависимых строк уже нет.
+
+В транзакции пачки уменьшаются `comment_count` затронутых новостей и
+счётчик `PurgeTask.deleted`. Поэтому счётчики всё время сходятся с
+таблицей, а прерванное удаление продолжается с того же места командой
+`purge --pending`. Полнотекстовый индекс комментариев обновляют
+триггеры. После фиксации пачки сбрасывается страничный кеш затронутых
+новостей, а открытые страницы получают живые события удаления.
+
+Пользователь на время удаления деактивируется и не может войти.
+"""
+import threading
+from collections import Counter, defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from yanews.auth import forget_user
+from yanews.metrics import WRITES
+
+from .cache import invalidate_news
+from .live import hub
+from .models import Comment, News, PurgeTask
+
+User = get_user_model()
+
+TARGET_MODELS = {
+    PurgeTask.NEWS: News,
+    PurgeTask.USER: User,
+}
+DEPENDENT_FIELDS = {
+    PurgeTask.NEWS: 'news_id',
+    PurgeTask.USER: 'author_id',
+}
+
+
+def dependents(target, object_id):
+    """Комментарии, которые нужно удалить до самого объекта."""
+    return Comment.objects.filter(
+        **{DEPENDENT_FIELDS[target]: object_id}
+    ).order_by()
+
+
+def schedule_purge(target, object_id):
+    """
+    Задача удаления объекта.
+
+    Незавершённая задача для того же объекта переиспользуется.
+    """
+    with transaction.atomic(using=router.db_for_write(PurgeTask)):
+        task = PurgeTask.objects.filter(
+            target=target, object_id=object_id, finished__isnull=True
+        ).first()
+        if task is None:
+            task = PurgeTask.objects.create(
+                target=target, object_id=object_id,
+                total=dependents(target, object_id).count(),
+            )
+        if target == PurgeTask.USER:
+            User.objects.filter(pk=object_id).update(is_active=False)
+            transaction.on_commit(partial(forget_user, object_id))
+    return task
+
+
+def _decrease_comment_counts(rows):
+    """Одно `UPDATE` на каждое встреченное число удалённых комментариев."""
+    news_by_amount = defaultdict(list)
+    for news_id, amount in Counter(news_id for _, news_id in rows).items():
+        news_by_amount[amount].append(news_id)
+    for amount, news_ids in news_by_amount.items():
+        News.objects.filter(pk__in=news_ids).update(
+            comment_count=Greatest(F('comment_count') - amount, 0)
+        )
+
+
+def _after_batch(task, rows):
+    invalidate_news(*{news_id for _, news_id in rows})
+    if task.target == PurgeTask.USER:
+        for pk, news_id in rows:
+            hub.publish(news_id, 'deleted', {'id': pk})
+
+
+def delete_batch(task, batch_size):
+    """Удаляет пачку зависимых строк; возвращает их число."""
+    using = router.db_for_write(Comment)
+    with transaction.atomic(using=using):
+        rows = list(dependents(task.target, task.object_id).values_list(
+            'pk', 'news_id'
+        )[:batch_size])
+        if not rows:
+            return 0
+        Comment.objects.filter(
+            pk__in=[pk for pk, _ in rows]
+        )._raw_delete(using)
+        _decrease_comment_counts(rows)
+        PurgeTask.objects.filter(pk=task.pk).update(
+            deleted=F('deleted') + len(rows)
+        )
+        transaction.on_commit(partial(_after_batch, task, rows), using=using)
+    task.deleted += len(rows)
+    WRITES.inc('comment', 'delete', amount=len(rows))
+    return len(rows)
+
+
+def run_purge(task, batch_size=None, progress=None):
+    """
+    Удаляет зависимые строки пачками, затем сам объект.
+
+    `progress(task)` вызывается после каждой пачки.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    while delete_batch(task, batch_size):
+        if progress is not None:
+            progress(task)
+    model = TARGET_MODELS[task.target]
+    with transaction.atomic(using=router.db_for_write(model)):
+        # Комментариев уже нет, и сборщику почти нечего загружать.
+        model.objects.filter(pk=task.object_id).delete()
+        task.finished = timezone.now()
+        task.save(update_fields=['finished'])
+    return task
+
+
+def pending_tasks():
+    return PurgeTask.objects.filter(finished__isnull=True)
+
+
+def _run_in_thread(task):
+    try:
+        run_purge(task)
+    finally:
+        connections.close_all()
+
+
+def start_purge(task):
+    """
+    Запускает удаление после фиксации текущей транзакции.
+
+    С `PURGE_IN_BACKGROUND` удаление идёт в фоновом потоке и запрос
+    его не ждёт. Если процесс завершится раньше, задачу доделает
+    `purge --pending`.
+    """
+    if settings.PURGE_IN_BACKGROUND:
+        def run():
+            threading.Thread(
+                target=_run_in_thread, args=(task,),
+                name=f'purge-{task.pk}', daemon=True,
+            ).start()
+    else:
+        def run():
+            run_purge(task)
+    transaction.on_commit(run, using=router.db_for_write(PurgeTask))
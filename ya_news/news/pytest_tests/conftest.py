@@ -4,10 +4,18 @@ import pytest
 from datetime import datetime, timedelta
 
 from django.conf import settings
+from django.core.cache import caches
 from django.utils import timezone
 from django.urls import reverse
 
 from news.models import News, Comment
+from news.seeding import explicit_timestamps
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    for cache in caches.all():
+        cache.clear()
 
 
 @pytest.fixture
@@ -78,14 +86,16 @@ def create_news_grt_them_limit() -> None:
 @pytest.fixture
 def create_comment_grt_them_limit(news, author) -> None:
     now = timezone.now()
-    for index in range(3):
-        comment = Comment.objects.create(
-            news=news,
-            author=author,
-            text=f'Текст {index}',
+    with explicit_timestamps(Comment, 'created'):
+        Comment.objects.bulk_create(
+            Comment(
+                news=news,
+                author=author,
+                text=f'Текст {index}',
+                created=now + timedelta(days=index),
+            )
+            for index in range(3)
         )
-        comment.created = now + timedelta(days=index)
-        comment.save()
 
 
 @pytest.fixture
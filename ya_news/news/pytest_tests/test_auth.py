@@ -0,0 +1,35 @@
+import pytest
+
+from yanews.auth import check_user_cache_is_shared
+from yanews.middleware import QUERY_COUNT_HEADER
+
+
+@pytest.mark.django_db
+def test_session_and_user_are_cached(author, author_client, detail_url):
+    """Повторный запрос не читает ни сессию, ни пользователя из базы."""
+    first = int(author_client.get(detail_url)[QUERY_COUNT_HEADER])
+    second = int(author_client.get(detail_url)[QUERY_COUNT_HEADER])
+    assert second == first - 1
+
+    author.first_name = 'Лев'
+    author.save()
+    response = author_client.get(detail_url)
+    assert int(response[QUERY_COUNT_HEADER]) == first
+    assert response.context['user'].first_name == 'Лев'
+
+    author.set_password('новый пароль')
+    author.save()
+    response = author_client.get(detail_url)
+    assert not response.context['user'].is_authenticated
+
+
+def test_process_local_user_cache_is_rejected(settings, tmp_path):
+    """Без DEBUG кеш пользователей в памяти процесса — ошибка."""
+    assert [
+        error.id for error in check_user_cache_is_shared(None)
+    ] == ['auth_cache.E001']
+    settings.CACHES = {**settings.CACHES, 'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path),
+    }}
+    assert check_user_cache_is_shared(None) == []
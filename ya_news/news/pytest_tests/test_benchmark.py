@@ -0,0 +1,19 @@
+from yanews.benchmark import format_report, percentile
+
+
+def test_benchmark_report_compares_with_baseline():
+    """Отчёт прогона показывает перцентили и изменение p95."""
+    assert percentile([1, 2, 3, 4], 0.5) == 3
+    assert percentile([], 0.99) == 0.0
+
+    def results(p95):
+        return {'urls': {'news:home': {
+            'throughput_rps': 100.0,
+            'latency_ms': {'p50': 1.0, 'p95': p95, 'p99': p95},
+            'queries': {'min': 3, 'max': 3},
+            'peak_memory_kib': 200.0,
+            'errors': 0,
+        }}}
+
+    report = format_report(results(15.0), baseline=results(10.0))
+    assert report.splitlines()[1].split()[-1] == '+50%'
@@ -1,7 +1,17 @@
+import time
+from http import HTTPStatus
+
 import pytest
 from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
+from news.cache import CACHE_HEADER, get_stats
+from news.checks import check_page_cache_is_shared
 from news.forms import CommentForm
+from news.models import Comment, News
 
 
 @pytest.mark.django_db
@@ -23,6 +33,20 @@ def test_news_order(client, create_news_grt_them_limit, home_url):
     assert sorted_dates == all_dates
 
 
+@pytest.mark.django_db
+def test_feed_shows_excerpt_without_loading_text(client, home_url):
+    """Лента берёт готовый анонс и не читает полный текст новости."""
+    text = ' '.join(['слово'] * 50000)
+    News.objects.create(title='Длинная', text=text)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(home_url)
+    news, = response.context['object_list']
+    assert news.excerpt == ' '.join(['слово'] * 15) + ' …'
+    assert 'text' in news.get_deferred_fields()
+    assert not any('"text"' in query['sql'] for query in queries)
+    assert news.excerpt in response.content.decode()
+
+
 @pytest.mark.django_db
 def test_comments_order(
     client, detail_url, create_comment_grt_them_limit
@@ -51,3 +75,156 @@ def test_authorized_client_has_form(author_client, detail_url):
     assert 'form' in response.context
     form = response.context['form']
     assert isinstance(form, CommentForm)
+
+
+@pytest.mark.django_db
+def test_comments_keyset_pagination(
+    client, settings, detail_url, create_comment_grt_them_limit
+):
+    """Ветка комментариев листается курсорами в обе стороны."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 2
+    first_page = client.get(detail_url).context['comments']
+    assert [c.text for c in first_page] == ['Текст 0', 'Текст 1']
+    assert not first_page.has_older
+    assert first_page.has_newer
+
+    response = client.get(detail_url, {'after': first_page.newer_cursor})
+    second_page = response.context['comments']
+    assert [c.text for c in second_page] == ['Текст 2']
+    assert second_page.has_older
+    assert not second_page.has_newer
+    assert f'?before={second_page.older_cursor}#comments' in (
+        response.content.decode()
+    )
+
+    response = client.get(detail_url, {'before': second_page.older_cursor})
+    assert [c.text for c in response.context['comments']] == [
+        'Текст 0', 'Текст 1'
+    ]
+
+
+@pytest.mark.django_db
+def test_broken_cursor_shows_first_page(client, detail_url, comment):
+    """Испорченный курсор не ломает страницу."""
+    response = client.get(detail_url, {'after': 'не-курсор'})
+    assert list(response.context['comments']) == [comment]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'backend',
+    (
+        'django.core.cache.backends.locmem.LocMemCache',
+        'django.core.cache.backends.filebased.FileBasedCache',
+    ),
+)
+def test_anonymous_page_cache(
+    client, settings, tmp_path, backend, news, author,
+    home_url, detail_url
+):
+    """Анонимные страницы кешируются и сбрасываются при записи."""
+    settings.CACHES = {
+        **settings.CACHES,
+        'default': {'BACKEND': backend, 'LOCATION': str(tmp_path)},
+    }
+    for url in (home_url, detail_url):
+        assert client.get(url)[CACHE_HEADER] == 'MISS'
+        assert client.get(url)[CACHE_HEADER] == 'HIT'
+
+    Comment.objects.create(news=news, author=author, text='Новый')
+    assert client.get(home_url)[CACHE_HEADER] == 'MISS'
+    response = client.get(detail_url)
+    assert response[CACHE_HEADER] == 'MISS'
+    assert 'Новый' in response.content.decode()
+    assert get_stats() == {'hits': 2, 'misses': 4, 'hit_ratio': 2 / 6}
+
+
+@pytest.mark.django_db
+def test_page_versions_expire_with_pages(
+    client, settings, monkeypatch, detail_url
+):
+    """Устаревшая версия в кеше процесса живёт не дольше страниц."""
+    etag = client.get(detail_url)['ETag']
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    later = time.time() + settings.NEWS_PAGE_CACHE_TIMEOUT + 1
+    monkeypatch.setattr(time, 'time', lambda: later)
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response[CACHE_HEADER] == 'MISS'
+
+
+def test_process_local_page_cache_warning(settings):
+    """Кеш в памяти процесса без DEBUG — повод для предупреждения."""
+    assert [
+        warning.id for warning in check_page_cache_is_shared(None)
+    ] == ['news.W001']
+    settings.DEBUG = True
+    assert check_page_cache_is_shared(None) == []
+
+
+@pytest.mark.django_db
+def test_authorized_client_bypasses_page_cache(
+    author_client, comment, detail_url, edit_url
+):
+    """Авторизованный пользователь видит свои ссылки и форму."""
+    for _ in range(2):
+        response = author_client.get(detail_url)
+        assert CACHE_HEADER not in response
+        assert edit_url in response.content.decode()
+        assert 'form' in response.context
+
+
+@pytest.mark.django_db
+def test_conditional_get(
+    author_client, news, author, detail_url, django_assert_num_queries
+):
+    """Неизменившаяся страница отдаётся как 304 без запросов к БД."""
+    client = Client()
+    response = client.get(detail_url)
+    etag = response['ETag']
+    last_modified = response['Last-Modified']
+    with django_assert_num_queries(0):
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    response = client.get(detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    response = author_client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert 'Last-Modified' not in response
+
+    Comment.objects.create(news=news, author=author, text='Новый')
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_search_ranks_news_above_comments(client, news, author):
+    """Совпадение в новости важнее совпадения в комментарии."""
+    commented = News.objects.create(title='Погода', text='Дождь')
+    Comment.objects.create(
+        news=commented, author=author, text='Заголовок <не> тот'
+    )
+    response = client.get(reverse('news:search'), {'q': 'заголов'})
+    results = response.context['results']
+    assert [result.pk for result in results] == [news.pk, commented.pk]
+    assert not results[0].in_comment
+    assert results[1].in_comment
+    assert '<mark>Заголовок</mark>' in results[1].snippet
+    assert '&lt;не&gt;' in results[1].snippet
+    assert results[0].date == News.objects.get(pk=news.pk).date
+
+
+@pytest.mark.django_db
+def test_search_pagination(client, settings, create_news_grt_them_limit):
+    settings.NEWS_SEARCH_RESULTS_PER_PAGE = 5
+    url = reverse('news:search')
+    response = client.get(url, {'q': 'новость'})
+    assert len(response.context['results']) == 5
+    assert response.context['has_next']
+    response = client.get(url, {'q': 'новость', 'page': 3})
+    assert len(response.context['results']) == 1
+    assert not response.context['has_next']
@@ -0,0 +1,52 @@
+import json
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from news.models import Comment, News
+
+
+@pytest.mark.django_db
+def test_export_news_ndjson(
+    client, django_user_model, create_comment_grt_them_limit, news
+):
+    """Выгрузка отдаёт новость строкой NDJSON вместе с комментариями."""
+    url = reverse('news:export')
+    assert client.get(url).status_code == HTTPStatus.FOUND
+    staff = django_user_model.objects.create(
+        username='Аналитик', is_staff=True
+    )
+    client.force_login(staff)
+    other_news = News.objects.create(title='Без комментариев', text='Текст')
+
+    response = client.get(url)
+    assert response.streaming
+    lines = b''.join(response.streaming_content).decode().splitlines()
+    exported = [json.loads(line) for line in lines]
+    assert [row['id'] for row in exported] == [news.id, other_news.id]
+    assert [c['text'] for c in exported[0]['comments']] == [
+        'Текст 0', 'Текст 1', 'Текст 2'
+    ]
+    assert exported[0]['comments'][0]['author'] == 'Автор'
+    assert exported[1]['comments'] == []
+
+    comments_since = Comment.objects.get(text='Текст 2').created
+    response = client.get(url, {'comments_since': comments_since.isoformat()})
+    row = json.loads(b''.join(response.streaming_content).splitlines()[0])
+    assert [c['text'] for c in row['comments']] == ['Текст 2']
+    assert client.get(url, {'since': 'вчера'}).status_code == (
+        HTTPStatus.BAD_REQUEST
+    )
+
+
+@pytest.mark.django_db
+def test_export_news_command(comment, news):
+    """Команда `export_news` пишет те же строки NDJSON."""
+    output = StringIO()
+    call_command('export_news', stdout=output)
+    row = json.loads(output.getvalue())
+    assert row['id'] == news.id
+    assert [c['id'] for c in row['comments']] == [comment.id]
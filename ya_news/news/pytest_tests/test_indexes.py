@@ -0,0 +1,56 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from yanews.testing import FULL_SCAN, assert_queries_use_indexes
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'name, args',
+    (
+        ('news:home', None),
+        ('news:detail', pytest.lazy_fixture('news_id_for_args')),
+        ('news:edit', pytest.lazy_fixture('comment_id_for_args')),
+        ('news:delete', pytest.lazy_fixture('comment_id_for_args')),
+    ),
+)
+def test_views_use_indexes(
+    author_client, create_comment_grt_them_limit, comment, name, args
+):
+    """Запросы страниц новостей не просматривают таблицы целиком."""
+    with CaptureQueriesContext(connection) as context:
+        author_client.get(reverse(name, args=args))
+    assert_queries_use_indexes(context.captured_queries)
+
+
+@pytest.mark.django_db
+def test_comment_pages_use_indexes(
+    client, settings, detail_url, create_comment_grt_them_limit
+):
+    """Страницы ветки комментариев читаются по составному индексу."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 1
+    page = client.get(detail_url).context['comments']
+    with CaptureQueriesContext(connection) as context:
+        client.get(detail_url, {'after': page.newer_cursor})
+        client.get(detail_url, {'before': page.newer_cursor})
+    assert_queries_use_indexes(context.captured_queries)
+
+
+@pytest.mark.parametrize(
+    'detail, full_scan',
+    (
+        ('SCAN news_comment', True),
+        ('SCAN U0', True),
+        ('SCAN TABLE news_comment', True),
+        ('SCAN TABLE news_comment AS U0', True),
+        ('SCAN news_comment USING INDEX comment_news_created_idx', False),
+        ('SCAN TABLE news_comment USING COVERING INDEX news_idx', False),
+        ('SEARCH news_comment USING INDEX news_idx (news_id=?)', False),
+        ('SCAN CONSTANT ROW', False),
+    ),
+)
+def test_full_scan_matches_old_and_new_sqlite(detail, full_scan):
+    """Полный просмотр узнаётся в формулировках SQLite до и после 3.36."""
+    assert bool(FULL_SCAN.match(detail)) is full_scan
@@ -0,0 +1,90 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from pytest_django.asserts import assertRedirects
+
+from news import views
+from news.ingest import INGEST_BATCH_SIZE, CommentWriter, IngestBusy
+from news.models import Comment, News
+
+
+def ingest_batches():
+    return sum(
+        sum(state[:-1]) for state in INGEST_BATCH_SIZE.collect().values()
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_ingest_writes_batches(news, author, reader):
+    """Комментарии из разных потоков записываются одной пачкой."""
+    writer = CommentWriter(flush_interval=0.5)
+    deleted_news = News.objects.create(title='Удалённая', text='Текст')
+    deleted_news.delete()
+    comments = [
+        Comment(news=news, author=author, text='Первый'),
+        Comment(news=news, author=reader, text='Второй'),
+        Comment(news=deleted_news, author=reader, text='Потерянный'),
+    ]
+    errors = []
+
+    def submit(comment):
+        try:
+            writer.submit(comment)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [
+        threading.Thread(target=submit, args=(comment,))
+        for comment in comments
+    ]
+    batches = ingest_batches()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.stop()
+
+    assert ingest_batches() == batches + 1
+    assert len(errors) == 1
+    assert set(Comment.objects.values_list('text', flat=True)) == {
+        'Первый', 'Второй'
+    }
+    news.refresh_from_db()
+    assert news.comment_count == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_ingest_view(
+    settings, monkeypatch, author_client, news, detail_url
+):
+    """
+    Редирект приходит после записи.
+
+    Принятый, но ещё не записанный комментарий не отправляется
+    повторно; 503 — только когда очередь переполнена.
+    """
+    settings.NEWS_COMMENT_INGEST = True
+    response = author_client.post(detail_url, {'text': 'Из очереди'})
+    assertRedirects(response, f'{detail_url}#comments')
+    assert Comment.objects.get().text == 'Из очереди'
+
+    release = threading.Event()
+    writer = CommentWriter(max_pending=1, timeout=0.05, flush_interval=0)
+    writer.write = lambda batch: release.wait()
+    monkeypatch.setattr(views, 'comment_writer', writer)
+    # Первый комментарий ждёт у писателя, второй — в очереди.
+    for _ in range(2):
+        response = author_client.post(detail_url, {'text': 'Ждёт'})
+        assertRedirects(
+            response, f'{detail_url}?comment=pending#comments',
+            fetch_redirect_response=False,
+        )
+    assert author_client.get(response.url).context['comment_pending']
+    response = author_client.post(detail_url, {'text': 'Лишний'})
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response['Retry-After'] == str(settings.NEWS_COMMENT_INGEST_TIMEOUT)
+    with pytest.raises(IngestBusy):
+        writer.submit(Comment(news=news, text='Лишний'))
+    release.set()
+    writer.stop()
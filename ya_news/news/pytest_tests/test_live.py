@@ -0,0 +1,119 @@
+import asyncio
+import json
+import re
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from news.live import RESYNC, CommentHub, LiveCommentsApplication, hub
+from news.models import Comment
+
+
+def sse_events(body):
+    """Пары (тип, данные) из тела ответа `text/event-stream`."""
+    events = []
+    for block in body.decode().split('\n\n'):
+        fields = dict(
+            line.split(': ', 1) for line in block.splitlines()
+            if not line.startswith(':') and ': ' in line
+        )
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def sse_last_id(body):
+    return int(re.findall(r'^id: (\d+)$', body.decode(), re.M)[-1])
+
+
+@pytest.mark.django_db
+def test_live_comments_follow_writes(
+    author_client, news, detail_url, django_capture_on_commit_callbacks
+):
+    """Создание, правка и удаление догоняются по `since`."""
+    live_url = reverse('news:live', args=(news.pk,))
+    assert 'live_since' not in author_client.get(detail_url).context
+    since = sse_last_id(author_client.get(live_url).content)
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(detail_url, {'text': 'Живой комментарий'})
+    comment = Comment.objects.get()
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(
+            reverse('news:edit', args=(comment.pk,)), {'text': 'Правка'}
+        )
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(reverse('news:delete', args=(comment.pk,)))
+
+    response = author_client.get(live_url, {'since': since})
+    assert response['Content-Type'].startswith('text/event-stream')
+    events = sse_events(response.content)
+    assert [event_type for event_type, _ in events] == [
+        'created', 'updated', 'deleted'
+    ]
+    assert events[0][1]['author'] == 'Автор'
+    assert {data['id'] for _, data in events} == {comment.pk}
+    assert sse_events(author_client.get(
+        live_url, HTTP_LAST_EVENT_ID=str(hub.last_id)
+    ).content) == []
+
+
+def test_live_comments_reset_after_lost_history():
+    """Перезагрузку вызывает только потеря истории самой новости."""
+    comment_hub = CommentHub(history_size=2, max_news=2)
+    since = comment_hub.last_id
+    for news_id in (2, 3, 4):
+        comment_hub.publish(news_id, 'created', {'id': news_id})
+    for _ in range(2):
+        assert comment_hub.replay(1, since) == (RESYNC, comment_hub.last_id)
+    assert comment_hub.replay(1, comment_hub.last_id + 1)[0] is RESYNC
+    # История новости 2 вытеснена вместе с её событием.
+    assert comment_hub.replay(2, since)[0] is None
+
+    since = comment_hub.last_id
+    for number in range(3):
+        comment_hub.publish(1, 'created', {'id': number})
+    assert comment_hub.replay(1, since)[0] is None
+    events, _ = comment_hub.replay(1, since + 1)
+    assert [event.data['id'] for event in events] == [1, 2]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_live_comments_asgi_stream(news):
+    """Поток получает события, опубликованные из другого потока."""
+    comment_hub = CommentHub()
+
+    async def django_application(scope, receive, send):
+        raise AssertionError('Поток не должен попасть в Django.')
+
+    async def scenario():
+        application = LiveCommentsApplication(django_application, comment_hub)
+        disconnect = asyncio.Event()
+        messages = []
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            messages.append(message)
+            if len(messages) == 2:
+                await asyncio.to_thread(
+                    comment_hub.publish, news.pk, 'created', {'id': 1}
+                )
+            if len(messages) == 3:
+                disconnect.set()
+
+        await asyncio.wait_for(application({
+            'type': 'http',
+            'method': 'GET',
+            'path': reverse('news:live', args=(news.pk,)),
+            'query_string': b'',
+            'headers': [],
+        }, receive, send), timeout=5)
+        return messages
+
+    messages = asyncio.run(scenario())
+    assert messages[0]['status'] == HTTPStatus.OK
+    assert sse_events(messages[2]['body']) == [('created', {'id': 1})]
+    assert comment_hub.subscriber_count() == 0
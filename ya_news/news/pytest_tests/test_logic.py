@@ -1,9 +1,12 @@
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.core.management import call_command
 from pytest_django.asserts import assertRedirects, assertFormError
 
-from news.models import Comment
+from news.models import BadWord, Comment, News
+from news.moderation import WordMatcher
 from news.forms import WARNING, BAD_WORDS
 
 
@@ -112,3 +115,84 @@ def test_anonymous_user_cant_edit_another_comment(
 
     assert comment_is_exists is True
     assert comment.text != change_comment_form['text']
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_create_and_delete(
+    author_client, news, detail_url, delete_url, create_comment_form
+):
+    """Счётчик комментариев новости меняется при создании и удалении."""
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    author_client.post(detail_url, create_comment_form)
+    news.refresh_from_db()
+    assert news.comment_count == 2
+    author_client.delete(delete_url)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_bulk_and_cascade(news, author, reader):
+    """Счётчик верен после `bulk_create` и каскадного удаления автора."""
+    Comment.objects.bulk_create(
+        Comment(news=news, author=user, text='Текст')
+        for user in (author, reader, reader)
+    )
+    news.refresh_from_db()
+    assert news.comment_count == 3
+    reader.delete()
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_recount_comments_command(comment, news):
+    """Команда `recount_comments` восстанавливает счётчик."""
+    News.objects.update(comment_count=100)
+    call_command('recount_comments', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+def test_word_matcher_finds_overlapping_words():
+    """Автомат находит слова внутри других слов и с общими суффиксами."""
+    matcher = WordMatcher(('he', 'she', 'hers', 'Негодяй'))
+    assert len(matcher) == 4
+    assert matcher.search('USHERS')
+    assert matcher.search('какой НЕГОДЯЙка')
+    assert not matcher.search('hrs sh')
+
+
+@pytest.mark.django_db
+def test_bad_words_from_table_and_file(
+    author_client, detail_url, settings, tmp_path
+):
+    """Словарь пополняется из таблицы и файла без перезапуска."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# комментарий\nфайлоругань\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = words_file
+    BadWord.objects.create(word='таблоругань')
+    for bad_word in ('Таблоругань', 'файлоругань'):
+        response = author_client.post(detail_url, {'text': bad_word})
+        assertFormError(response, 'form', 'text', errors=WARNING)
+
+
+@pytest.mark.django_db
+def test_excerpts_follow_text(news):
+    """Анонс пересчитывается при записи и командой после правок в обход ORM."""
+    news.text = 'Новый текст'
+    news.save(update_fields=['text'])
+    news.refresh_from_db()
+    assert news.excerpt == 'Новый текст'
+
+    News.objects.bulk_create([News(title='Пачка', text='Текст из пачки')])
+    assert News.objects.get(title='Пачка').excerpt == 'Текст из пачки'
+
+    News.objects.update(excerpt='')
+    output = StringIO()
+    call_command('refresh_news_excerpts', batch_size=1, stdout=output)
+    assert 'Обновлено анонсов: 2' in output.getvalue()
+    assert set(News.objects.values_list('excerpt', flat=True)) == {
+        'Новый текст', 'Текст из пачки'
+    }
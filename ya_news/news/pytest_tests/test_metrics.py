@@ -0,0 +1,78 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from yanews.metrics import REGISTRY, Counter, Histogram, Metric
+
+
+def test_metrics_sum_values_of_all_threads():
+    """Потоки пишут каждый в своё, при сборке значения складываются."""
+    counter = Counter('test_total', 'Тест.', ('kind',))
+    histogram = Histogram('test_seconds', 'Тест.', buckets=(0.1, 1.0))
+    REGISTRY.remove(counter)
+    REGISTRY.remove(histogram)
+
+    def work():
+        for _ in range(100):
+            counter.inc('a')
+            histogram.observe(0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc('b', amount=2)
+    assert counter.collect() == {('a',): 400, ('b',): 2}
+    assert counter.expose()[2:] == [
+        'test_total{kind="a"} 400', 'test_total{kind="b"} 2'
+    ]
+    assert histogram.expose()[2:] == [
+        'test_seconds_bucket{le="0.1"} 0',
+        'test_seconds_bucket{le="1.0"} 400',
+        'test_seconds_bucket{le="+Inf"} 400',
+        'test_seconds_sum 200.0',
+        'test_seconds_count 400',
+    ]
+
+
+def test_metric_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        Metric('test_abstract', 'Тест.')
+
+
+def metric(client, sample):
+    """Значение строки `sample` из /metrics, 0 — если её ещё нет."""
+    response = client.get(reverse('metrics'))
+    assert response.status_code == HTTPStatus.OK
+    for line in response.content.decode().splitlines():
+        name, _, value = line.rpartition(' ')
+        if name == sample:
+            return float(value)
+    return 0
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(
+    author_client, home_url, detail_url, create_comment_form
+):
+    client = Client()
+    home = 'http_responses_total{route="news:home",method="GET",status="200"}'
+    created = 'model_writes_total{model="comment",action="create"}'
+    queries = 'db_queries_per_request_count{route="news:home"}'
+    misses = 'cache_misses_total{cache="news_pages"}'
+    before = {
+        sample: metric(client, sample)
+        for sample in (home, created, queries, misses)
+    }
+    client.get(home_url)
+    author_client.post(detail_url, data=create_comment_form)
+    after = {sample: metric(client, sample) for sample in before}
+    assert {
+        sample: after[sample] - before[sample] for sample in before
+    } == {home: 1, created: 1, queries: 1, misses: 1}
+    response = client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+    assert response.status_code == HTTPStatus.FORBIDDEN
@@ -0,0 +1,52 @@
+import tracemalloc
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from yanews.profiling import PROFILE_ID_HEADER, make_token, tracing_memory
+
+
+@pytest.mark.django_db
+def test_profiling_by_signed_token(
+    settings, tmp_path, client, admin_client, admin_user, detail_url
+):
+    """Профиль снимается только по токену и виден в админке."""
+    settings.PROFILING_DIR = tmp_path
+    response = client.get(
+        detail_url, HTTP_X_PROFILE=make_token(admin_user)
+    )
+    profile_id = response[PROFILE_ID_HEADER]
+    assert PROFILE_ID_HEADER not in client.get(
+        detail_url, HTTP_X_PROFILE='поддельный'
+    )
+    assert profile_id.endswith('news-detail')
+    assert {path.suffix for path in tmp_path.iterdir()} == {
+        '.json', '.prof', '.tracemalloc'
+    }
+
+    response = admin_client.get(reverse('profiling:list'))
+    assert [
+        profile['id'] for profile in response.context['profiles']
+    ] == [profile_id]
+    response = admin_client.get(
+        reverse('profiling:detail', args=(profile_id,))
+    )
+    profile = response.context['profile']
+    assert profile['url_name'] == 'news:detail'
+    assert profile['query_count'] == len(profile['queries']) > 0
+    assert profile['functions']
+    response = client.get(reverse('profiling:list'))
+    assert response.status_code == HTTPStatus.FOUND
+
+
+def test_overlapping_profiles_share_memory_tracing():
+    """Трассировку останавливает последний из одновременных запросов."""
+    was_tracing = tracemalloc.is_tracing()
+    first, second = tracing_memory(), tracing_memory()
+    first.__enter__()
+    second.__enter__()
+    first.__exit__(None, None, None)
+    assert tracemalloc.take_snapshot()
+    second.__exit__(None, None, None)
+    assert tracemalloc.is_tracing() is was_tracing
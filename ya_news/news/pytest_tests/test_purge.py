@@ -0,0 +1,66 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from news.models import Comment, News, PurgeTask
+from news.purge import delete_batch, schedule_purge
+
+
+@pytest.mark.django_db
+def test_purge_news_in_batches(news, author, reader):
+    """Прерванное удаление продолжается с того же места."""
+    other = News.objects.create(title='Другая', text='Текст')
+    Comment.objects.bulk_create(
+        Comment(news=target, author=author, text=f'Текст {index}')
+        for index in range(5) for target in (news, other)
+    )
+    task = schedule_purge(PurgeTask.NEWS, news.pk)
+    assert task.total == 5
+    assert delete_batch(task, 2) == 2
+    news.refresh_from_db()
+    assert news.comment_count == 3
+
+    output = StringIO()
+    call_command('purge', pending=True, batch_size=2, stdout=output)
+    assert 'Новость' in output.getvalue()
+    assert not News.objects.filter(pk=news.pk).exists()
+    assert Comment.objects.filter(news=other).count() == 5
+    task.refresh_from_db()
+    assert task.deleted == 5
+    assert task.finished is not None
+
+
+@pytest.mark.django_db
+def test_purge_user_keeps_comment_counts(news, author, reader):
+    other = News.objects.create(title='Другая', text='Текст')
+    Comment.objects.bulk_create([
+        Comment(news=news, author=author, text='Первый'),
+        Comment(news=news, author=author, text='Второй'),
+        Comment(news=other, author=author, text='Третий'),
+        Comment(news=other, author=reader, text='Чужой'),
+    ])
+    call_command('purge', 'user', author.pk, batch_size=2, stdout=StringIO())
+
+    assert not type(author).objects.filter(pk=author.pk).exists()
+    assert dict(News.objects.values_list('pk', 'comment_count')) == {
+        news.pk: 0, other.pk: 1
+    }
+    assert Comment.objects.get().text == 'Чужой'
+
+
+@pytest.mark.django_db
+def test_admin_deletes_news_through_purge(
+    admin_client, settings, news, comment, django_capture_on_commit_callbacks
+):
+    settings.PURGE_IN_BACKGROUND = False
+    url = reverse('admin:news_news_delete', args=(news.pk,))
+    response = admin_client.get(url)
+    assert dict(response.context['model_count']) == {
+        'Новости': 1, Comment._meta.verbose_name_plural: 1
+    }
+    with django_capture_on_commit_callbacks(execute=True):
+        admin_client.post(url, {'post': 'yes'})
+    assert not News.objects.exists()
+    assert PurgeTask.objects.get().deleted == 1
@@ -0,0 +1,67 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+
+from news.cache import CACHE_HEADER
+from news.models import Comment
+from yanews.routers import READ_PRIMARY_COOKIE
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_reads_go_to_replica_until_user_writes(
+    settings, author_client, news, detail_url
+):
+    """После комментария автор читает с основной базы, остальные — нет."""
+    settings.REPLICA_DATABASES = ['replica']
+    anonymous = Client()
+    assert not anonymous.get(reverse('news:home')).context['object_list']
+    assert anonymous.get(detail_url).status_code == HTTPStatus.NOT_FOUND
+    assert author_client.get(detail_url).status_code == HTTPStatus.NOT_FOUND
+
+    response = author_client.post(detail_url, data={'text': 'Свой'})
+    assert response.cookies[READ_PRIMARY_COOKIE]['max-age'] == (
+        settings.REPLICA_PIN_SECONDS
+    )
+    response = author_client.get(detail_url)
+    assert [c.text for c in response.context['comments']] == ['Свой']
+    assert anonymous.get(detail_url).status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_sync_replica_command(settings, client, news, detail_url):
+    settings.REPLICA_DATABASES = ['replica']
+    assert client.get(detail_url).status_code == HTTPStatus.NOT_FOUND
+    call_command('sync_replica', stdout=StringIO())
+    assert client.get(detail_url).status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_replica_pages_are_cached_only_after_sync(
+    settings, client, news, author, detail_url
+):
+    """Страница с отставшей реплики не кешируется и не получает ETag."""
+    settings.REPLICA_DATABASES = ['replica']
+    call_command('sync_replica', stdout=StringIO())
+    assert client.get(detail_url)[CACHE_HEADER] == 'MISS'
+    old_etag = client.get(detail_url)['ETag']
+
+    Comment.objects.create(news=news, author=author, text='Новый')
+    for _ in range(2):
+        response = client.get(detail_url)
+        assert response[CACHE_HEADER] == 'MISS'
+        assert 'ETag' not in response
+        assert 'Last-Modified' not in response
+        assert 'Новый' not in response.content.decode()
+
+    call_command('sync_replica', stdout=StringIO())
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=old_etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response[CACHE_HEADER] == 'MISS'
+    assert 'Новый' in response.content.decode()
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert client.get(detail_url)[CACHE_HEADER] == 'HIT'
@@ -6,6 +6,8 @@ from pytest_django.asserts import assertRedirects
 
 from django.urls import reverse
 
+from yanews.middleware import QUERY_COUNT_HEADER, QueryBudgetExceeded
+
 
 @pytest.mark.django_db
 @pytest.mark.parametrize(
@@ -63,3 +65,44 @@ def test_redirects(client, name, args):
     expected_url = f'{login_url}?next={url}'
     response = client.get(url)
     assertRedirects(response, expected_url)
+
+
+@pytest.mark.django_db
+@pytest.mark.query_budget({'news:home': 0})
+def test_query_budget_is_enforced(client):
+    """Превышение бюджета SQL-запросов роняет тест."""
+    with pytest.raises(QueryBudgetExceeded):
+        client.get(reverse('news:home'))
+
+
+@pytest.mark.django_db
+def test_query_count_header(client, news_id_for_args):
+    """Ответ сообщает число SQL-запросов представления."""
+    response = client.get(reverse('news:detail', args=news_id_for_args))
+    assert response[QUERY_COUNT_HEADER] == '2'
+
+
+@pytest.fixture
+def staff_client(client, django_user_model):
+    client.force_login(django_user_model.objects.create(
+        username='Аналитик', is_staff=True
+    ))
+    return client
+
+
+@pytest.mark.django_db
+def test_streaming_response_queries_are_counted(staff_client, news):
+    """Запросы потокового ответа считаются, пока отдаётся тело."""
+    response = staff_client.get(reverse('news:export'))
+    assert QUERY_COUNT_HEADER not in response
+    b''.join(response.streaming_content)
+    assert response.wsgi_request.query_count == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.query_budget({'news:export': 1})
+def test_streaming_query_budget_is_enforced(staff_client, news):
+    """Бюджет потокового ответа сверяется, когда тело отдано."""
+    response = staff_client.get(reverse('news:export'))
+    with pytest.raises(QueryBudgetExceeded):
+        b''.join(response.streaming_content)
@@ -0,0 +1,56 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.models import Comment
+from news.search import search_news
+
+
+@pytest.mark.django_db
+def test_search_index_follows_comment_views(
+    author_client, detail_url, news, change_comment_form
+):
+    """Индекс обновляется при создании, правке и удалении комментария."""
+    def found(query):
+        response = author_client.get(reverse('news:search'), {'q': query})
+        return [result.pk for result in response.context['results']]
+
+    author_client.post(detail_url, data={'text': 'Бегемот'})
+    assert found('бегемот') == [news.pk]
+    comment = Comment.objects.get()
+    author_client.post(
+        reverse('news:edit', args=(comment.id,)), data=change_comment_form
+    )
+    assert found('бегемот') == []
+    assert found('достаточно') == [news.pk]
+    author_client.post(reverse('news:delete', args=(comment.id,)))
+    assert found('достаточно') == []
+
+
+@pytest.mark.django_db
+def test_search_snippets_only_for_page(create_news_grt_them_limit):
+    """Фрагменты строятся только для новостей выбранной страницы."""
+    with CaptureQueriesContext(connection) as queries:
+        results = search_news('новость', limit=1, offset=1)
+    assert len(results) == 1
+    assert '<mark>' in results[0].snippet
+    snippets_sql = queries.captured_queries[-1]['sql']
+    assert f'rowid IN ({results[0].pk})' in snippets_sql
+    assert 'rowid IN ()' in snippets_sql
+
+
+@pytest.mark.django_db
+def test_rebuild_news_search_command(client, news):
+    """Команда восстанавливает индекс после прямой правки таблицы."""
+    url = reverse('news:search')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO news_news_fts(news_news_fts) VALUES ('delete-all')"
+        )
+    assert client.get(url, {'q': 'заголовок'}).context['results'] == []
+    call_command('rebuild_news_search', stdout=StringIO())
+    assert len(client.get(url, {'q': 'заголовок'}).context['results']) == 1
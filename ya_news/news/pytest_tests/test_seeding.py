@@ -0,0 +1,37 @@
+from datetime import date, timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from news.models import News
+from news.seeding import NEWS_DATE_WINDOW_DAYS, seed_news
+
+
+@pytest.mark.django_db
+def test_seed_data_command():
+    """Заливка задаёт время комментариев явно и обновляет счётчики."""
+    call_command(
+        'seed_data', users=3, news=4, comments_per_news=5, batch_size=7,
+        stdout=StringIO()
+    )
+    assert News.objects.count() == 4
+    assert set(
+        News.objects.values_list('comment_count', flat=True)
+    ) == {5}
+    for news in News.objects.all():
+        created = list(news.comment_set.values_list('created', flat=True))
+        assert {value.date() for value in created} == {news.date}
+        assert len(set(created)) == 5
+
+
+@pytest.mark.django_db
+def test_seed_news_dates_stay_in_window():
+    """Даты идут по кругу, и миллионная новость не переполняет `date`."""
+    today = date(2024, 1, 1)
+    start = 1_000_000
+    seed_news(2, start=start, today=today)
+    assert sorted(News.objects.values_list('date', flat=True)) == [
+        today - timedelta(days=(start + 1) % NEWS_DATE_WINDOW_DAYS),
+        today - timedelta(days=start % NEWS_DATE_WINDOW_DAYS),
+    ]
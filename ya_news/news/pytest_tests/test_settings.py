@@ -0,0 +1,32 @@
+import importlib
+
+import pytest
+from django.db import connection
+
+
+def test_production_settings(monkeypatch):
+    monkeypatch.setenv('DJANGO_SECRET_KEY', 'секрет')
+    production = importlib.import_module('yanews.settings_production')
+    assert production.DEBUG is False
+    assert production.WARMUP_ON_STARTUP is True
+    options = production.TEMPLATES[0]['OPTIONS']
+    assert options['loaders'][0][0] == 'django.template.loaders.cached.Loader'
+    assert {
+        alias: cache['BACKEND'] for alias, cache in production.CACHES.items()
+    } == dict.fromkeys(
+        ('default', 'sessions'),
+        'django.core.cache.backends.filebased.FileBasedCache',
+    )
+
+
+@pytest.mark.django_db
+def test_sqlite_connection_is_tuned():
+    """Соединение получает PRAGMA и режим транзакций из настроек."""
+    pragmas = connection.settings_dict['OPTIONS']['pragmas']
+    with connection.cursor() as cursor:
+        for name in ('cache_size', 'busy_timeout'):
+            cursor.execute(f'PRAGMA {name}')
+            assert cursor.fetchone()[0] == pragmas[name]
+        cursor.execute('PRAGMA synchronous')
+        assert cursor.fetchone()[0] == 1
+    assert connection.transaction_mode == 'IMMEDIATE'
@@ -0,0 +1,20 @@
+import pytest
+
+
+# Копии в обоих проектах: каждый запускается из своего каталога.
+SHARED_MODULES = (
+    'auth.py', 'benchmark.py', 'metrics.py', 'middleware.py',
+    'profiling.py', 'warmup.py', 'sqlite3/base.py',
+)
+
+
+@pytest.mark.parametrize('module', SHARED_MODULES)
+def test_shared_modules_match_ya_note(settings, module):
+    """Общие модули YaNote отличаются только именем проекта."""
+    sibling = settings.BASE_DIR.parent / 'ya_note' / 'yanote' / module
+    if not sibling.exists():
+        pytest.skip('Проекта YaNote рядом нет.')
+    own = settings.BASE_DIR / 'yanews' / module
+    assert own.read_text(encoding='utf-8') == sibling.read_text(
+        encoding='utf-8'
+    ).replace('yanote', 'yanews')
@@ -0,0 +1,15 @@
+import pytest
+
+from yanews.warmup import warm_up
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_warm_up_compiles_project_templates(settings):
+    stats = warm_up()
+    assert stats['templates'] == sum(
+        path.is_file() for path in (settings.BASE_DIR / 'templates').rglob('*')
+    )
+    assert stats['resolvers'] > 1
+    assert stats['databases'] == 1
+    settings.REPLICA_DATABASES = ['replica']
+    assert warm_up()['databases'] == 2
@@ -0,0 +1,141 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+NEWS_FTS_TABLE = 'news_news_fts'
+COMMENT_FTS_TABLE = 'news_comment_fts'
+FTS_TABLES = (NEWS_FTS_TABLE, COMMENT_FTS_TABLE)
+MATCH_START, MATCH_END = '\x02', '\x03'
+# Вес совпадения в заголовке и тексте новости.
+NEWS_BM25_WEIGHTS = (10.0, 1.0)
+# Совпадение в комментарии значит меньше, чем в самой новости.
+COMMENT_RANK_FACTOR = 0.5
+SNIPPET_TOKENS = 16
+WORD = re.compile(r'\w+')
+
+# Фрагменты дорогие, поэтому сначала ранжируется и обрезается
+# страница новостей, а фрагменты строятся только для неё.
+SEARCH_SQL = f"""
+    SELECT hit.news_id, news.title, news.date, hit.hit_id,
+           hit.in_comment, MIN(hit.rank) AS best_rank
+    FROM (
+        SELECT rowid AS news_id, rowid AS hit_id,
+               bm25({NEWS_FTS_TABLE}, %s, %s) AS rank,
+               0 AS in_comment
+        FROM {NEWS_FTS_TABLE}
+        WHERE {NEWS_FTS_TABLE} MATCH %s
+        UNION ALL
+        SELECT comment.news_id, comment.id,
+               bm25({COMMENT_FTS_TABLE}) * %s,
+               1
+        FROM {COMMENT_FTS_TABLE}
+        JOIN news_comment AS comment
+            ON comment.id = {COMMENT_FTS_TABLE}.rowid
+        WHERE {COMMENT_FTS_TABLE} MATCH %s
+    ) AS hit
+    JOIN news_news AS news ON news.id = hit.news_id
+    GROUP BY hit.news_id
+    ORDER BY best_rank, hit.news_id
+    LIMIT %s OFFSET %s
+"""
+SNIPPETS_SQL = f"""
+    SELECT 0, rowid, snippet({NEWS_FTS_TABLE}, -1, %s, %s, '…', %s)
+    FROM {NEWS_FTS_TABLE}
+    WHERE {NEWS_FTS_TABLE} MATCH %s AND rowid IN ({{news_ids}})
+    UNION ALL
+    SELECT 1, rowid, snippet({COMMENT_FTS_TABLE}, 0, %s, %s, '…', %s)
+    FROM {COMMENT_FTS_TABLE}
+    WHERE {COMMENT_FTS_TABLE} MATCH %s AND rowid IN ({{comment_ids}})
+"""
+
+
+def build_match_query(query):
+    """Каждое слово ищется по префиксу, все слова обязательны."""
+    words = WORD.findall(query.lower())
+    if not words:
+        return None
+    return ' AND '.join(f'"{word}"*' for word in words)
+
+
+def render_snippet(snippet):
+    """Экранирует фрагмент и подсвечивает найденные слова."""
+    return mark_safe(
+        escape(snippet)
+        .replace(MATCH_START, '<mark>')
+        .replace(MATCH_END, '</mark>')
+    )
+
+
+class SearchResult:
+
+    def __init__(self, pk, title, date, snippet, in_comment, rank):
+        self.pk = pk
+        self.title = title
+        self.date = date
+        self.snippet = render_snippet(snippet)
+        self.in_comment = bool(in_comment)
+        self.rank = rank
+
+
+def search_news(query, limit, offset=0, using=DEFAULT_DB_ALIAS):
+    """
+    Новости по релевантности совпадений в них и в комментариях.
+
+    Для каждой новости берётся лучшее совпадение; SQLite отдаёт
+    строку совпадения из той же строки, что и `MIN(rank)`. Фрагменты
+    вторым запросом строятся только для совпадений со страницы.
+    """
+    match = build_match_query(query)
+    if match is None:
+        return []
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(SEARCH_SQL, [
+            *NEWS_BM25_WEIGHTS, match, COMMENT_RANK_FACTOR, match,
+            limit, offset,
+        ])
+        rows = cursor.fetchall()
+        snippets = find_snippets(cursor, match, [
+            (in_comment, hit_id) for _, _, _, hit_id, in_comment, _ in rows
+        ])
+    date_field = connection.ops.convert_datefield_value
+    return [
+        SearchResult(
+            pk, title, date_field(date, None, connection),
+            snippets.get((in_comment, hit_id), ''), in_comment, rank
+        )
+        for pk, title, date, hit_id, in_comment, rank in rows
+    ]
+
+
+def find_snippets(cursor, match, hits):
+    """Фрагменты `{(in_comment, id): snippet}` для совпадений `hits`."""
+    if not hits:
+        return {}
+    ids = {0: [], 1: []}
+    for in_comment, hit_id in hits:
+        ids[in_comment].append(hit_id)
+    snippet_params = [MATCH_START, MATCH_END, SNIPPET_TOKENS, match]
+    cursor.execute(
+        SNIPPETS_SQL.format(
+            news_ids=', '.join(['%s'] * len(ids[0])),
+            comment_ids=', '.join(['%s'] * len(ids[1])),
+        ),
+        [*snippet_params, *ids[0], *snippet_params, *ids[1]]
+    )
+    return {
+        (in_comment, hit_id): snippet
+        for in_comment, hit_id, snippet in cursor.fetchall()
+    }
+
+
+def rebuild_index(using=DEFAULT_DB_ALIAS):
+    """Перестраивает индексы новостей и комментариев."""
+    with connections[using].cursor() as cursor:
+        for table in FTS_TABLES:
+            cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+            cursor.execute(
+                f"INSERT INTO {table}({table}) VALUES ('optimize')"
+            )
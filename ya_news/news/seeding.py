@@ -0,0 +1,197 @@
+"""
+Синтетические данные для нагрузочных прогонов.
+
+Строки вставляются `bulk_create` пачками, по транзакции на пачку,
+со всеми значениями заранее: даты новостей и время комментариев
+задаются явно, без `auto_now_add`. Задачи можно раздать нескольким
+процессам (через `fork`): SQLite всё равно пишет по одному, поэтому
+параллельно идёт только подготовка объектов, а выигрыш ограничен
+временем самой записи.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from .models import Comment, News
+
+User = get_user_model()
+
+WORDS = (
+    'новость город погода спорт культура наука экономика выборы '
+    'транспорт школа музей театр проект рынок'
+).split()
+# Пишущий процесс ждёт блокировку, пока пишут остальные.
+SEED_BUSY_TIMEOUT_MS = 60000
+# Даты новостей идут по кругу в этом окне: миллион дней назад
+# уже не помещается в `date`.
+NEWS_DATE_WINDOW_DAYS = 3650
+
+
+def make_text(index, words=30):
+    """Детерминированный текст: у прогонов одинаковые данные."""
+    return ' '.join(
+        WORDS[(index * 7 + position) % len(WORDS)]
+        for position in range(words)
+    )
+
+
+@contextmanager
+def explicit_timestamps(model, *field_names):
+    """На время блока `auto_now_add` не перетирает заданное время."""
+    fields = [model._meta.get_field(name) for name in field_names]
+    previous = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, previous):
+            field.auto_now_add = value
+
+
+@contextmanager
+def fast_inserts(using=DEFAULT_DB_ALIAS):
+    """
+    Без `fsync` на каждую транзакцию и с долгим ожиданием блокировки.
+
+    При сбое посреди заливки база может потерять последние пачки,
+    но не испортится: журнал WAL остаётся целым. Внутри открытой
+    транзакции `synchronous` не меняется, и блок ничего не делает.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        synchronous, = cursor.fetchone()
+        cursor.execute('PRAGMA synchronous = OFF')
+        cursor.execute(f'PRAGMA busy_timeout = {SEED_BUSY_TIMEOUT_MS}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA synchronous = {synchronous}')
+
+
+def _insert(model, objs, batch_size):
+    created = 0
+    batch = []
+    for obj in objs:
+        batch.append(obj)
+        if len(batch) == batch_size:
+            created += _insert_batch(model, batch)
+            batch = []
+    if batch:
+        created += _insert_batch(model, batch)
+    return created
+
+
+def _insert_batch(model, batch):
+    with transaction.atomic():
+        model.objects.bulk_create(batch)
+    return len(batch)
+
+
+def seed_users(count, prefix='user', start=0, batch_size=5000):
+    """Пользователи без пароля: в прогонах они входят через `force_login`."""
+    password = make_password(None)
+    return _insert(User, (
+        User(username=f'{prefix}{index}', password=password)
+        for index in range(start, start + count)
+    ), batch_size)
+
+
+def seed_news(count, start=0, batch_size=5000, today=None):
+    """
+    Новости по одной в день, начиная с `today` назад.
+
+    Через `NEWS_DATE_WINDOW_DAYS` дней даты начинаются заново, так что
+    подходит любое число новостей.
+    """
+    today = today or date.today()
+    return _insert(News, (
+        News(
+            title=f'Новость {index}',
+            text=make_text(index),
+            date=today - timedelta(days=index % NEWS_DATE_WINDOW_DAYS),
+        )
+        for index in range(start, start + count)
+    ), batch_size)
+
+
+@lru_cache(maxsize=None)
+def _author_ids():
+    return list(User.objects.order_by('pk').values_list('pk', flat=True))
+
+
+def seed_comments(news_ids, per_news, author_ids=None, batch_size=5000):
+    """
+    `per_news` комментариев к каждой новости, по минуте друг за другом.
+
+    Ветка начинается в полдень дня новости; авторы идут по кругу.
+    """
+    author_ids = author_ids or _author_ids()
+    dates = dict(News.objects.filter(pk__in=news_ids).values_list(
+        'pk', 'date'
+    ))
+
+    def comments():
+        for news_id in news_ids:
+            start = timezone.make_aware(
+                datetime.combine(dates[news_id], time(12))
+            )
+            for index in range(per_news):
+                yield Comment(
+                    news_id=news_id,
+                    author_id=author_ids[
+                        (news_id + index) % len(author_ids)
+                    ],
+                    text=make_text(index, words=12),
+                    created=start + timedelta(minutes=index),
+                )
+
+    with explicit_timestamps(Comment, 'created'):
+        return _insert(Comment, comments(), batch_size)
+
+
+TASKS = {
+    'users': seed_users,
+    'news': seed_news,
+    'comments': seed_comments,
+}
+
+
+def _run_task(task):
+    name, args, kwargs = task
+    with fast_inserts():
+        return name, TASKS[name](*args, **kwargs)
+
+
+def run_tasks(tasks, workers=1):
+    """
+    Выполняет задачи вида `(имя, args, kwargs)`; отдаёт `(имя, строк)`.
+
+    Соединения закрываются до `fork`: дочерний процесс
+    открывает своё.
+    """
+    if workers <= 1:
+        yield from map(_run_task, tasks)
+        return
+    connections.close_all()
+    with ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context('fork')
+    ) as executor:
+        yield from executor.map(_run_task, tasks)
+
+
+def chunk_ranges(count, size):
+    for start in range(0, count, size):
+        yield start, min(size, count - start)
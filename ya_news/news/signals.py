@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Отправляется после `Comment.objects.bulk_create()`, который не вызывает
+# `post_save`. Аргументы: `news_ids` — новости, получившие комментарии,
+# `count` — число созданных комментариев, `using` — алиас базы данных.
+comments_bulk_created = Signal()
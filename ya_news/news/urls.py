@@ -12,5 +12,10 @@ urlpatterns = [
         views.CommentDelete.as_view(),
         name='delete'
     ),
+    path(
+        'news/<int:pk>/events/', views.LiveComments.as_view(), name='live'
+    ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('export/news.ndjson', views.NewsExport.as_view(), name='export'),
 ]
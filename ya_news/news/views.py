@@ -1,14 +1,55 @@
 from django.conf import settings
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+)
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
 
+
+from yanews.routers import PrimaryWriteMixin, ReplicaReadMixin
+
+from .cache import (
+    HOME_VERSION_KEY, AnonymousPageCacheMixin, detail_version_key,
+    page_etag, page_last_modified
+)
+from .export import iter_news_ndjson, parse_since
 from .forms import CommentForm
+from .ingest import IngestBusy, comment_writer
+from .live import format_opening, hub, parse_event_id
 from .models import Comment, News
+from .pagination import paginate_comments
+from .search import search_news
+
+PENDING_COMMENT = 'pending'
+
+
+def home_etag(request, *args, **kwargs):
+    return page_etag(request, (HOME_VERSION_KEY,))
+
+
+def home_last_modified(request, *args, **kwargs):
+    return page_last_modified(request, (HOME_VERSION_KEY,))
+
+
+def detail_etag(request, pk, *args, **kwargs):
+    return page_etag(request, (detail_version_key(pk),))
+
+
+def detail_last_modified(request, pk, *args, **kwargs):
+    return page_last_modified(request, (detail_version_key(pk),))
 
 
-class NewsList(generic.ListView):
+@method_decorator(
+    condition(etag_func=home_etag, last_modified_func=home_last_modified),
+    name='dispatch'
+)
+class NewsList(
+        ReplicaReadMixin, AnonymousPageCacheMixin, generic.ListView
+):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
@@ -19,31 +60,47 @@ class NewsList(generic.ListView):
 
         Их количество определяется в настройках проекта.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.for_feed()[
+            :settings.NEWS_COUNT_ON_HOME_PAGE
+        ]
 
 
-class NewsDetail(generic.DetailView):
+class NewsDetail(
+        ReplicaReadMixin, AnonymousPageCacheMixin, generic.DetailView
+):
     model = News
     template_name = 'news/detail.html'
 
+    def get_page_cache_version_keys(self):
+        return (detail_version_key(self.kwargs['pk']),)
+
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
+        """
+        Ветка комментариев выводится постранично.
+
+        Размер страницы определяется в настройках проекта.
+        """
         context = super().get_context_data(**kwargs)
+        context['comments'] = paginate_comments(
+            self.object.comment_set.select_related('author'),
+            settings.COMMENTS_COUNT_ON_DETAIL_PAGE,
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+        )
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
+        context['comment_pending'] = (
+            self.request.GET.get('comment') == PENDING_COMMENT
+        )
         return context
 
 
 class NewsComment(
         LoginRequiredMixin,
+        PrimaryWriteMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -59,16 +116,31 @@ class NewsComment(
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        self.pending = False
+        if settings.NEWS_COMMENT_INGEST:
+            try:
+                self.pending = not comment_writer.submit(comment)
+            except IngestBusy as error:
+                response = HttpResponse(str(error), status=503)
+                response['Retry-After'] = settings.NEWS_COMMENT_INGEST_TIMEOUT
+                return response
+        else:
+            comment.save()
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        """Комментарий из очереди может появиться на странице позже."""
+        url = reverse('news:detail', kwargs={'pk': self.object.pk})
+        if self.pending:
+            url += f'?comment={PENDING_COMMENT}'
+        return url + '#comments'
 
 
 class NewsDetailView(generic.View):
 
+    @method_decorator(condition(
+        etag_func=detail_etag, last_modified_func=detail_last_modified
+    ))
     def get(self, request, *args, **kwargs):
         view = NewsDetail.as_view()
         return view(request, *args, **kwargs)
@@ -78,14 +150,36 @@ class NewsDetailView(generic.View):
         return view(request, *args, **kwargs)
 
 
-class CommentBase(LoginRequiredMixin):
+class LiveComments(generic.View):
+    """
+    Поток событий комментариев без асинхронного сервера.
+
+    Под ASGI запрос перехватывает `news.live.LiveCommentsApplication`;
+    здесь отдаются накопленные события, и браузер переподключается
+    через `LIVE_COMMENTS_RETRY` миллисекунд.
+    """
+
+    def get(self, request, pk):
+        if not News.objects.filter(pk=pk).exists():
+            raise Http404
+        since = parse_event_id(
+            request.headers.get('Last-Event-ID') or request.GET.get('since')
+        )
+        response = HttpResponse(
+            format_opening(*hub.replay(pk, since)),
+            content_type='text/event-stream; charset=utf-8',
+        )
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
+class CommentBase(LoginRequiredMixin, PrimaryWriteMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
@@ -102,3 +196,61 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+
+class NewsSearch(generic.TemplateView):
+    """Полнотекстовый поиск по новостям и комментариям."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        """
+        Результаты выводятся по релевантности постранично.
+
+        Размер страницы определяется в настройках проекта.
+        """
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        try:
+            page = max(int(self.request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        per_page = settings.NEWS_SEARCH_RESULTS_PER_PAGE
+        results = search_news(
+            query, limit=per_page + 1, offset=(page - 1) * per_page
+        ) if query else []
+        context.update(
+            query=query,
+            results=results[:per_page],
+            page=page,
+            has_next=len(results) > per_page,
+        )
+        return context
+
+
+class NewsExport(UserPassesTestMixin, generic.View):
+    """
+    Выгрузка новостей с комментариями в NDJSON для аналитики.
+
+    Доступна сотрудникам; необязательные параметры `since`
+    (по дате новости) и `comments_since` (по дате комментария).
+    """
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        try:
+            since = parse_since(request.GET.get('since'))
+            comments_since = parse_since(
+                request.GET.get('comments_since'), as_datetime=True
+            )
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+        return StreamingHttpResponse(
+            iter_news_ndjson(
+                since=since,
+                comments_since=comments_since,
+                chunk_size=settings.NEWS_EXPORT_CHUNK_SIZE,
+            ),
+            content_type='application/x-ndjson; charset=utf-8',
+        )
@@ -9,8 +9,19 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
+from yanews.warmup import warm_up
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Импорт после настройки Django: модуль обращается к моделям.
+from news.live import LiveCommentsApplication  # noqa: E402
+
+application = LiveCommentsApplication(django_application)
+
+if settings.WARMUP_ON_STARTUP:
+    warm_up()
@@ -0,0 +1,217 @@
+"""
+Нагрузочный прогон именованных URL внутри процесса.
+
+Запросы идут через тестовый клиент Django из нескольких потоков
+к отдельной файловой тестовой базе, рабочая база не затрагивается.
+Для каждого URL считаются задержки (p50/p95/p99), пропускная
+способность, число SQL-запросов из `request.query_count` (его
+`QueryCountMiddleware` выставляет, когда тело прочитано до конца)
+и пиковая память одного запроса по `tracemalloc`.
+"""
+import json
+import platform
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+class BenchRequest:
+    """Один URL в прогоне: путь и пользователь, от чьего имени запрос."""
+
+    def __init__(self, name, path, user=None):
+        self.name = name
+        self.path = path
+        self.user = user
+
+    def make_client(self):
+        client = Client()
+        if self.user is not None:
+            client.force_login(self.user)
+        return client
+
+
+def percentile(values, fraction):
+    """Перцентиль по ближайшему рангу; `values` отсортированы."""
+    if not values:
+        return 0.0
+    index = min(int(len(values) * fraction), len(values) - 1)
+    return values[index]
+
+
+@contextmanager
+def benchmark_databases(aliases=(DEFAULT_DB_ALIAS,), directory=None,
+                        keepdb=False):
+    """
+    Файловые тестовые базы `bench_<alias>.sqlite3` на время прогона.
+
+    С `keepdb` и постоянным `directory` базы и данные в них переживают
+    прогон, и следующий можно сравнивать на том же наборе данных.
+    """
+    created = []
+    with tempfile.TemporaryDirectory() as temporary:
+        directory = Path(directory or temporary)
+        setup_test_environment()
+        try:
+            for alias in aliases:
+                connection = connections[alias]
+                connection.settings_dict['TEST']['NAME'] = str(
+                    directory / f'bench_{alias}.sqlite3'
+                )
+                old_name = connection.creation.create_test_db(
+                    verbosity=0, autoclobber=True, keepdb=keepdb
+                )
+                created.append((connection, old_name))
+            yield
+        finally:
+            connections.close_all()
+            for connection, old_name in created:
+                connection.creation.destroy_test_db(
+                    old_name, verbosity=0, keepdb=keepdb
+                )
+            teardown_test_environment()
+
+
+def fetch(client, path):
+    """GET с чтением тела, в том числе потокового."""
+    response = client.get(path)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def _worker(client, path, count, samples, errors, barrier):
+    latencies, queries = [], []
+    try:
+        barrier.wait()
+        for _ in range(count):
+            start = time.perf_counter()
+            response = fetch(client, path)
+            latencies.append(time.perf_counter() - start)
+            # У потокового ответа нет заголовка с числом запросов.
+            queries.append(getattr(response.wsgi_request, 'query_count', 0))
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+    finally:
+        connections.close_all()
+    samples.append((latencies, queries))
+
+
+def peak_memory(client, path, repeat=3):
+    """Пиковая память на один запрос, в байтах."""
+    tracemalloc.start()
+    try:
+        peak = 0
+        for _ in range(repeat):
+            tracemalloc.reset_peak()
+            fetch(client, path)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        return peak
+    finally:
+        tracemalloc.stop()
+
+
+def run_url(bench_request, requests, workers, warmup=5):
+    """Прогоняет URL `requests` раз в `workers` потоках."""
+    clients = [bench_request.make_client() for _ in range(workers)]
+    for _ in range(warmup):
+        fetch(clients[0], bench_request.path)
+    samples, errors = [], []
+    barrier = threading.Barrier(workers + 1)
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(
+                client, bench_request.path,
+                requests // workers + (index < requests % workers),
+                samples, errors, barrier,
+            ),
+        )
+        for index, client in enumerate(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies = sorted(value for sample, _ in samples for value in sample)
+    queries = [value for _, sample in samples for value in sample]
+    return {
+        'path': bench_request.path,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput_rps': len(latencies) / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            f'p{int(fraction * 100)}': percentile(latencies, fraction) * 1e3
+            for fraction in PERCENTILES
+        },
+        'queries': {
+            'min': min(queries, default=0),
+            'max': max(queries, default=0),
+        },
+        'peak_memory_kib': peak_memory(
+            clients[0], bench_request.path
+        ) / 1024,
+    }
+
+
+def run_benchmark(bench_requests, requests, workers, warmup=5, meta=None):
+    return {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        **(meta or {}),
+        'urls': {
+            bench_request.name: run_url(
+                bench_request, requests, workers, warmup
+            )
+            for bench_request in bench_requests
+        },
+    }
+
+
+def format_report(results, baseline=None):
+    """Таблица результатов; с `baseline` — изменение p95 в процентах."""
+    lines = [
+        f'{"url":<20} {"rps":>8} {"p50":>8} {"p95":>8} {"p99":>8} '
+        f'{"sql":>5} {"KiB":>8} {"err":>4}'
+        + (f' {"Δp95":>7}' if baseline else '')
+    ]
+    for name, row in results['urls'].items():
+        latency = row['latency_ms']
+        line = (
+            f'{name:<20} {row["throughput_rps"]:>8.1f} '
+            f'{latency["p50"]:>8.2f} {latency["p95"]:>8.2f} '
+            f'{latency["p99"]:>8.2f} {row["queries"]["max"]:>5} '
+            f'{row["peak_memory_kib"]:>8.0f} {row["errors"]:>4}'
+        )
+        previous = (baseline or {}).get('urls', {}).get(name)
+        if previous and previous['latency_ms']['p95']:
+            change = latency['p95'] / previous['latency_ms']['p95'] - 1
+            line += f' {change:>+7.0%}'
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def write_results(results, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+def read_results(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
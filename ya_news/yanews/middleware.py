@@ -0,0 +1,110 @@
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = 'X-Query-Count'
+QUERY_DURATION_HEADER = 'X-Query-Duration'
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов, чем ему разрешено."""
+
+
+class QueryCounter:
+    """Обёртка `execute_wrapper`, считающая запросы и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class QueryCountMiddleware:
+    """
+    Считает SQL-запросы каждого запроса и сверяет их с бюджетом.
+
+    Бюджеты задаются в `QUERY_BUDGETS` по имени URL, например
+    `{'news:home': 3}`. Превышение пишется в лог, а при
+    `QUERY_BUDGET_RAISE = True` (так делают тесты) приводит
+    к исключению `QueryBudgetExceeded`.
+
+    Потоковый ответ выполняет запросы, пока отдаётся тело, а заголовки
+    к этому времени уже отправлены. Поэтому запросы считаются при
+    чтении `streaming_content`, бюджет сверяется, когда поток
+    закончился, и заголовков с числом запросов у такого ответа нет.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        with self.counting(counter):
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = self.stream(
+                request, response.streaming_content, counter
+            )
+            return response
+        response[QUERY_COUNT_HEADER] = str(counter.count)
+        response[QUERY_DURATION_HEADER] = f'{counter.duration * 1000:.2f}'
+        self.finish(request, counter)
+        return response
+
+    @staticmethod
+    @contextmanager
+    def counting(counter):
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(counter)
+                )
+            yield
+
+    def stream(self, request, content, counter):
+        """
+        Отдаёт тело по частям, считая запросы каждой из них.
+
+        Обёртка ставится только на время получения части: между
+        частями соединением могут пользоваться другие.
+        """
+        chunks = iter(content)
+        while True:
+            with self.counting(counter):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+        self.finish(request, counter)
+
+    def finish(self, request, counter):
+        """Сохраняет счётчики на запросе и сверяет их с бюджетом."""
+        request.query_count = counter.count
+        request.query_duration = counter.duration
+        match = request.resolver_match
+        url_name = match.view_name if match else None
+        logger.debug(
+            '%s %s: %d queries, %.2f ms', request.method, url_name,
+            counter.count, counter.duration * 1000
+        )
+        budget = settings.QUERY_BUDGETS.get(url_name)
+        if budget is not None and counter.count > budget:
+            message = (
+                f'{url_name}: {counter.count} SQL-запросов '
+                f'при бюджете {budget}'
+            )
+            if settings.QUERY_BUDGET_RAISE:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
@@ -0,0 +1,103 @@
+"""
+Чтение с реплики и запись на основную базу.
+
+Страницы, которым подходят чуть устаревшие данные, помечаются
+`ReplicaReadMixin`, а представления, которые пишут, — `PrimaryWriteMixin`.
+После записи пользователь получает cookie и на `REPLICA_PIN_SECONDS`
+секунд читает с основной базы: так он сразу видит свой комментарий,
+даже если реплика ещё отстаёт. Реплики перечисляются в
+`REPLICA_DATABASES`; пока список пуст, всё идёт в основную базу.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+READ_PRIMARY_COOKIE = 'read_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+@contextmanager
+def read_from_replica():
+    """Чтения внутри блока уходят на случайную реплику."""
+    replicas = settings.REPLICA_DATABASES
+    token = _read_alias.set(random.choice(replicas) if replicas else None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def is_pinned_to_primary(request):
+    return READ_PRIMARY_COOKIE in request.COOKIES
+
+
+def reads_from_replica(request):
+    """Запрос к `ReplicaReadMixin` прочитает данные с реплики."""
+    return (
+        bool(settings.REPLICA_DATABASES)
+        and request.method in SAFE_METHODS
+        and not is_pinned_to_primary(request)
+    )
+
+
+def pin_to_primary(response):
+    response.set_cookie(
+        READ_PRIMARY_COOKIE, '1',
+        max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+    )
+
+
+class PrimaryReplicaRouter:
+    """
+    Запись всегда на основную базу, чтение — там, где попросили.
+
+    Связанные объекты читаются из той же базы, что и исходный объект.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaReadMixin:
+    """
+    Представление читает данные с реплики.
+
+    Сессия и пользователь загружаются заранее с основной базы:
+    на реплике их может ещё не быть сразу после входа. Ответ
+    отрисовывается внутри `dispatch`, иначе ленивые запросы
+    шаблона выполнились бы уже после выхода из блока.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if not reads_from_replica(request):
+            return super().dispatch(request, *args, **kwargs)
+        request.user.is_authenticated
+        with read_from_replica():
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        return response
+
+
+class PrimaryWriteMixin:
+    """После записи пользователь некоторое время читает с основной базы."""
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(response)
+        return response
@@ -21,6 +21,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanews.profiling.ProfilingMiddleware',
+    'yanews.metrics.MetricsMiddleware',
+    'yanews.middleware.QueryCountMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -51,12 +54,57 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
 
+# PRAGMA и режим транзакций описаны в yanews.sqlite3.base.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yanews.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'pragmas': {
+                'journal_mode': 'wal',
+                'synchronous': 'normal',
+                'cache_size': -20000,
+                'mmap_size': 128 * 1024 * 1024,
+                'busy_timeout': 5000,
+            },
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
+# Локальная реплика: копия основной базы, см. команду `sync_replica`.
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': BASE_DIR / 'db_replica.sqlite3',
+}
+DATABASE_ROUTERS = ['yanews.routers.PrimaryReplicaRouter']
+# Например, ['replica']; пустой список — всё читается с основной базы.
+# Страницы с реплики кешируются, только когда она догнала последнюю
+# запись: время синхронизации сообщает `news.cache.mark_replica_synced`.
+REPLICA_DATABASES = []
+# Сколько секунд после записи пользователь читает с основной базы.
+REPLICA_PIN_SECONDS = 10
+
+# Для нескольких процессов подойдёт, например,
+# 'django.core.cache.backends.filebased.FileBasedCache'.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Сессии и пользователи; при нескольких процессах нужен общий кеш.
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+    },
+}
+
+# Сессия читается из кеша, а пишется и в кеш, и в базу.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
+AUTHENTICATION_BACKENDS = ['yanews.auth.CachedModelBackend']
+AUTH_USER_CACHE_ALIAS = 'sessions'
+AUTH_USER_CACHE_TIMEOUT = 60 * 5
 
 
 AUTH_PASSWORD_VALIDATORS = []
@@ -80,3 +128,61 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_DETAIL_PAGE = 50
+
+# При нескольких процессах — общий кеш, см. проверку news.W001.
+NEWS_PAGE_CACHE_ALIAS = 'default'
+NEWS_PAGE_CACHE_TIMEOUT = 60 * 5
+
+# Дополнительный словарь запрещённых слов: одно слово на строку.
+BAD_WORDS_FILE = None
+BAD_WORDS_CHECK_INTERVAL = 5
+
+NEWS_EXPORT_CHUNK_SIZE = 2000
+
+NEWS_SEARCH_RESULTS_PER_PAGE = 20
+
+# Бюджеты SQL-запросов по имени URL, см. yanews.middleware.
+QUERY_BUDGETS = {
+    'news:home': 3,
+    'news:detail': 7,
+    'news:edit': 6,
+    'news:delete': 5,
+    # Пользователь, новости и комментарии; сверяется в конце потока.
+    'news:export': 3,
+    'news:search': 3,
+    'news:live': 1,
+}
+QUERY_BUDGET_RAISE = False
+
+# Профилирование запросов по токену, см. yanews.profiling.
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+PROFILING_KEEP = 100
+PROFILING_TOP = 40
+
+# Кому отдаётся /metrics, см. yanews.metrics; None — всем.
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+
+# Прогрев шаблонов, URL и соединений при старте WSGI/ASGI,
+# см. yanews.warmup.
+WARMUP_ON_STARTUP = False
+
+# Запись комментариев пачками из фонового потока, см. news.ingest.
+NEWS_COMMENT_INGEST = False
+NEWS_COMMENT_INGEST_BATCH_SIZE = 100
+NEWS_COMMENT_INGEST_FLUSH_INTERVAL = 0.005
+NEWS_COMMENT_INGEST_MAX_PENDING = 1000
+NEWS_COMMENT_INGEST_TIMEOUT = 5
+
+# Живые комментарии по SSE, см. news.live.
+LIVE_COMMENTS_HISTORY = 100
+LIVE_COMMENTS_MAX_NEWS = 1000
+LIVE_COMMENTS_QUEUE_SIZE = 100
+LIVE_COMMENTS_PING = 15
+LIVE_COMMENTS_RETRY = 3000
+
+# Удаление пачками новостей и пользователей, см. news.purge.
+PURGE_BATCH_SIZE = 1000
+PURGE_IN_BACKGROUND = True
@@ -0,0 +1,59 @@
+"""
+Pytest-плагин с проверкой бюджета SQL-запросов и планов запросов.
+
+Во время тестов превышение `QUERY_BUDGETS` роняет запрос
+с `QueryBudgetExceeded`. Бюджет отдельного теста можно
+переопределить маркером::
+
+    @pytest.mark.query_budget({'news:home': 2})
+"""
+import re
+
+import pytest
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import override_settings
+
+# До SQLite 3.36: `SCAN TABLE table AS alias`, начиная с неё — `SCAN alias`.
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\w+( AS \w+)?$')
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(budgets): бюджеты SQL-запросов по имени URL '
+        'на время теста.'
+    )
+
+
+@pytest.fixture(autouse=True)
+def query_budget(request):
+    """Включает проверку бюджетов; возвращает действующие бюджеты."""
+    budgets = dict(settings.QUERY_BUDGETS)
+    for marker in reversed(list(request.node.iter_markers('query_budget'))):
+        budgets.update(*marker.args, **marker.kwargs)
+    with override_settings(QUERY_BUDGETS=budgets, QUERY_BUDGET_RAISE=True):
+        yield budgets
+
+
+def explain_query_plan(sql, using=DEFAULT_DB_ALIAS):
+    """Строки `EXPLAIN QUERY PLAN` для запроса SQLite."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def assert_queries_use_indexes(captured_queries, using=DEFAULT_DB_ALIAS):
+    """
+    Все SELECT-запросы идут по индексам.
+
+    Полный просмотр таблицы (`SCAN table` без `USING`) и сортировка
+    во временном B-дереве считаются регрессией.
+    """
+    for query in captured_queries:
+        sql = query['sql']
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        for detail in explain_query_plan(sql, using):
+            assert not FULL_SCAN.match(detail), f'{detail}: {sql}'
+            assert 'TEMP B-TREE' not in detail, f'{detail}: {sql}'
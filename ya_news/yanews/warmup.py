@@ -0,0 +1,163 @@
+"""
+Прогрев процесса до первого запроса.
+
+`warm_up()` компилирует все шаблоны из каталогов `DIRS` (с кеширующим
+загрузчиком они остаются в памяти), заполняет кеши URL-резолвера,
+загружает часовой пояс и переводы и открывает соединения с базами,
+которые используются: основной, репликами и шардами.
+WSGI и ASGI вызывают её при старте, если `WARMUP_ON_STARTUP = True`;
+вручную — команда `warmup`.
+
+Запуск модуля (`python -m <проект>.warmup /путь ...`) — замер
+холодного старта: время загрузки приложения, прогрева и первых
+запросов в новом процессе печатается одной строкой JSON.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.template import engines
+from django.urls import URLResolver, get_resolver
+from django.utils import timezone, translation
+
+
+def template_names(engine):
+    """Имена всех файлов в каталогах `DIRS` движка."""
+    for directory in map(Path, engine.dirs):
+        for path in sorted(directory.rglob('*')):
+            if path.is_file():
+                yield path.relative_to(directory).as_posix()
+
+
+def warm_templates():
+    count = 0
+    for backend in engines.all():
+        engine = getattr(backend, 'engine', None)
+        if engine is None:
+            continue
+        for name in template_names(engine):
+            engine.get_template(name)
+            count += 1
+    return count
+
+
+def warm_urls(resolver=None):
+    """Заполняет словари `reverse` и `resolve` для всех вложенных URLconf."""
+    resolver = resolver or get_resolver()
+    # Оба свойства ленивые: первое обращение строит словарь или
+    # компилирует регулярное выражение.
+    resolver.reverse_dict
+    count = 1
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+        if isinstance(pattern, URLResolver):
+            count += warm_urls(pattern)
+    return count
+
+
+def warm_locale():
+    """Часовой пояс и каталоги переводов грузятся при первом обращении."""
+    timezone.get_default_timezone()
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('')
+    return 1
+
+
+def databases_in_use():
+    """
+    Основная база, реплики из `REPLICA_DATABASES` и шарды из `NOTE_SHARDS`.
+
+    Остальные алиасы только описаны в `DATABASES`: соединение с ними
+    создало бы пустой файл SQLite.
+    """
+    return list(dict.fromkeys([
+        DEFAULT_DB_ALIAS,
+        *settings.REPLICA_DATABASES,
+        # Шарды есть только у заметок.
+        *getattr(settings, 'NOTE_SHARDS', ()),
+    ]))
+
+
+def warm_databases():
+    aliases = databases_in_use()
+    for alias in aliases:
+        connections[alias].ensure_connection()
+    return len(aliases)
+
+
+def warm_up():
+    """Прогревает процесс; возвращает, сколько чего прогрето и за сколько."""
+    stats = {}
+    for name, step in (
+        ('templates', warm_templates),
+        ('resolvers', warm_urls),
+        ('locale', warm_locale),
+        ('databases', warm_databases),
+    ):
+        start = time.perf_counter()
+        stats[name] = step()
+        stats[f'{name}_ms'] = (time.perf_counter() - start) * 1000
+    return stats
+
+
+def _measure(paths, warm):
+    start = time.perf_counter()
+    from django.core.wsgi import get_wsgi_application
+    from django.test import RequestFactory
+
+    application = get_wsgi_application()
+    result = {'startup_ms': (time.perf_counter() - start) * 1000}
+    if warm:
+        result['warmup'] = warm_up()
+    factory = RequestFactory(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+    result['requests'] = []
+    for path in paths:
+        latencies = []
+        for _ in range(2):
+            environ = factory.get(path).environ
+            request_start = time.perf_counter()
+            response = application(environ, lambda status, headers: None)
+            b''.join(response)
+            response.close()
+            latencies.append((time.perf_counter() - request_start) * 1000)
+        result['requests'].append({
+            'path': path,
+            'first_ms': latencies[0],
+            'second_ms': latencies[1],
+        })
+    return result
+
+
+def measure_cold_start(settings_module, paths, warm=False):
+    """
+    Замер в новом процессе с настройками `settings_module`.
+
+    К результату добавляется `process_ms` — всё время жизни процесса,
+    вместе с запуском интерпретатора и импортами.
+    """
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module}
+    env.setdefault('DJANGO_SECRET_KEY', settings.SECRET_KEY)
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [
+            sys.executable, '-m', __name__,
+            *paths, *(['--warm'] if warm else []),
+        ],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        check=True,
+    )
+    result = json.loads(completed.stdout.splitlines()[-1])
+    result['process_ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+if __name__ == '__main__':
+    warm = '--warm' in sys.argv
+    print(json.dumps(_measure(
+        [arg for arg in sys.argv[1:] if arg != '--warm'], warm
+    )))
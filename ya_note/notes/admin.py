@@ -1,5 +1,52 @@
 from django.contrib import admin
+from django.contrib.auth import admin as auth_admin
+from django.contrib.auth import get_user_model
 
-from .models import Note
+from .models import Note, PurgeTask
+from .purge import count_notes, schedule_purge, start_purge
+
+User = get_user_model()
 
 admin.site.register(Note)
+
+
+@admin.register(PurgeTask)
+class PurgeTaskAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'deleted', 'total', 'created', 'finished')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class UserAdmin(auth_admin.UserAdmin):
+    """
+    Удаление через notes.purge: пачками и в фоне.
+
+    Страница подтверждения не собирает заметки сборщиком Django,
+    а только считает их.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        notes = sum(count_notes(obj.pk) for obj in objs)
+        perms_needed = set()
+        if notes and not request.user.has_perm('notes.delete_note'):
+            perms_needed.add(Note._meta.verbose_name)
+        model_count = {self.model._meta.verbose_name_plural: len(objs)}
+        if notes:
+            model_count[Note._meta.verbose_name_plural] = notes
+        return [str(obj) for obj in objs], model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        start_purge(schedule_purge(PurgeTask.USER, obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        for pk in queryset.values_list('pk', flat=True):
+            start_purge(schedule_purge(PurgeTask.USER, pk))
@@ -0,0 +1,5 @@
+from django.core.checks import Tags, register
+
+from yanote.auth import check_user_cache_is_shared
+
+register(check_user_cache_is_shared, Tags.caches)
@@ -3,7 +3,7 @@ from pytils.translit import slugify
 from django import forms
 from django.core.exceptions import ValidationError
 
-from .models import Note
+from .models import Note, NoteSlug
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
 
@@ -16,14 +16,26 @@ class NoteForm(forms.ModelForm):
         fields = ('title', 'text', 'slug')
 
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
+        """
+        Обрабатывает случай, если slug не уникален.
+
+        Занятые slug всех шардов лежат в реестре `NoteSlug`.
+        """
         cleaned_data = super().clean()
         slug = cleaned_data.get('slug')
         if not slug:
             title = cleaned_data.get('title')
             slug = slugify(title)[:100]
-        if Note.objects.filter(
-                slug=slug
-        ).exclude(id=self.instance.pk).exists():
+        if (slug != self.instance.slug
+                and NoteSlug.objects.filter(slug=slug).exists()):
             raise ValidationError(slug + WARNING)
         return slug
+
+    def validate_unique(self):
+        """Уникальность slug уже проверена в `clean_slug`."""
+        exclude = self._get_validation_exclusions()
+        exclude.append('slug')
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as error:
+            self._update_errors(error)
@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from yanote.auth import forget_user
+from yanote.metrics import WRITES, register_cache
+
+from .models import Note
+from .services import release_slug, reserve_slug, slugify_title
+from .sharding import is_sharded
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Note)
+def reserve_note_slug(sender, instance, **kwargs):
+    """
+    Новый или изменённый slug сначала закрепляется в реестре.
+
+    Если заметка потом не запишется, закрепление снимет `Note.save`.
+    """
+    if instance.slug != getattr(instance, '_registered_slug', None):
+        if reserve_slug(instance):
+            instance._reserved_slug = instance.slug
+
+
+@receiver(post_save, sender=Note)
+def release_previous_slug(sender, instance, **kwargs):
+    previous = getattr(instance, '_registered_slug', None)
+    if previous and previous != instance.slug:
+        release_slug(previous, instance.author_id)
+    instance._registered_slug = instance.slug
+
+
+@receiver(post_delete, sender=Note)
+def release_deleted_slug(sender, instance, **kwargs):
+    release_slug(instance.slug, instance.author_id)
+
+
+@receiver(post_delete, sender=User)
+def delete_sharded_notes(sender, instance, **kwargs):
+    """
+    Каскад из основной базы не достаёт до шардов.
+
+    Slug автора удаляются каскадом вместе с ним.
+    """
+    if is_sharded():
+        Note.objects.for_author(instance.pk).delete()
+
+
+@receiver(post_save, sender=Note)
+def count_note_save(sender, created, **kwargs):
+    WRITES.inc('note', 'create' if created else 'update')
+
+
+@receiver(post_delete, sender=Note)
+def count_note_delete(sender, **kwargs):
+    WRITES.inc('note', 'delete')
+
+
+def slugify_cache_stats():
+    info = slugify_title.cache_info()
+    return info.hits, info.misses
+
+
+register_cache('slugify_title', slugify_cache_stats)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    """Покрывает и смену пароля: `set_password` сохраняется через `save`."""
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
@@ -0,0 +1,64 @@
+from statistics import median
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from yanote.warmup import measure_cold_start
+
+CONFIGURATIONS = (
+    ('yanote.settings', False),
+    ('yanote.settings_production', False),
+    ('yanote.settings_production', True),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет холодный старт и первые запросы в новых процессах: '
+        'с обычными и с боевыми настройками, с прогревом и без.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--runs', type=int, default=3,
+            help='Процессов на каждую конфигурацию; берётся медиана.'
+        )
+
+    def paths(self):
+        """Страницы, доступные без входа и без данных в базе."""
+        return [reverse('notes:home'), reverse('users:login')]
+
+    def handle(self, *args, **options):
+        paths = self.paths()
+        self.stdout.write(
+            f'{"настройки":<28} {"прогрев":>7} {"процесс":>8} '
+            f'{"старт":>7} {"прогрев":>8} '
+            + ' '.join(f'{path:>22}' for path in paths)
+        )
+        for settings_module, warm in CONFIGURATIONS:
+            runs = [
+                measure_cold_start(settings_module, paths, warm)
+                for _ in range(options['runs'])
+            ]
+
+            def ms(value):
+                return f'{median(value(run) for run in runs):.1f}'
+
+            warmup = ms(lambda run: sum(
+                value for key, value in run.get('warmup', {}).items()
+                if key.endswith('_ms')
+            ))
+            requests = [
+                f'{ms(lambda run: run["requests"][index]["first_ms"])} / '
+                f'{ms(lambda run: run["requests"][index]["second_ms"])}'
+                for index in range(len(paths))
+            ]
+            self.stdout.write(
+                f'{settings_module:<28} {"да" if warm else "нет":>7} '
+                f'{ms(lambda run: run["process_ms"]):>8} '
+                f'{ms(lambda run: run["startup_ms"]):>7} {warmup:>8} '
+                + ' '.join(f'{value:>22}' for value in requests)
+            )
+        self.stdout.write(
+            'Время в мс, медиана; у запросов — первый / второй.'
+        )
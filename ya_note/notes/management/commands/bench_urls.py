@@ -0,0 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.urls import reverse
+
+from notes import urls
+from notes.models import Note
+from notes.seeding import seed_notes, seed_users
+from notes.sharding import note_databases
+from yanote.benchmark import (
+    BenchRequest, benchmark_databases, format_report, read_results,
+    run_benchmark, write_results
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет отдельные тестовые базы и прогоняет все URL '
+        'из notes.urls в несколько потоков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument(
+            '--notes', type=int, default=200,
+            help='Заметок у каждого пользователя.'
+        )
+        parser.add_argument(
+            '--heavy-notes', type=int, default=10000,
+            help='Заметок у пользователя, от чьего имени идут запросы.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов на каждый URL.'
+        )
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--url', nargs='+', dest='urls')
+        parser.add_argument('-o', '--output', help='Файл для JSON.')
+        parser.add_argument(
+            '--baseline', help='JSON прошлого прогона для сравнения.'
+        )
+        parser.add_argument('--db-dir', help='Каталог для тестовых баз.')
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Не удалять базы и не заполнять их повторно.'
+        )
+
+    def seed(self, options):
+        seed_users(options['users'])
+        users = list(User.objects.filter(
+            username__startswith='user'
+        ).order_by('pk').values_list('pk', flat=True))
+        seed_notes(users[:1], options['heavy_notes'])
+        seed_notes(users[1:], options['notes'])
+
+    def bench_requests(self, options):
+        author = User.objects.filter(
+            username__startswith='user'
+        ).order_by('pk').first()
+        note = author and Note.objects.for_author(author).order_by(
+            'pk'
+        ).only('slug').first()
+        if note is None:
+            raise CommandError('В базе нет данных для прогона.')
+        requests = {
+            'notes:edit': reverse('notes:edit', args=(note.slug,)),
+            'notes:detail': reverse('notes:detail', args=(note.slug,)),
+            'notes:delete': reverse('notes:delete', args=(note.slug,)),
+            'notes:search': reverse('notes:search') + '?q=заметка',
+        }
+        for name in ('home', 'add', 'list', 'list_json', 'success'):
+            requests[f'notes:{name}'] = reverse(f'notes:{name}')
+        return {
+            name: BenchRequest(name, path, author)
+            for name, path in requests.items()
+        }
+
+    def handle(self, *args, **options):
+        names = [
+            f'{urls.app_name}:{pattern.name}'
+            for pattern in urls.urlpatterns if pattern.name
+        ]
+        aliases = dict.fromkeys([DEFAULT_DB_ALIAS, *note_databases()])
+        with benchmark_databases(
+                aliases, directory=options['db_dir'], keepdb=options['keepdb']
+        ):
+            if not (options['keepdb'] and User.objects.exists()):
+                self.seed(options)
+            bench_requests = self.bench_requests(options)
+            missing = set(names) - set(bench_requests)
+            if missing:
+                raise CommandError(
+                    'Нет сценария для URL: ' + ', '.join(sorted(missing))
+                )
+            selected = options['urls'] or names
+            results = run_benchmark(
+                [bench_requests[name] for name in selected],
+                options['requests'], options['workers'], options['warmup'],
+                meta={
+                    'project': 'ya_note',
+                    'options': {
+                        key: options[key] for key in (
+                            'users', 'notes', 'heavy_notes', 'requests',
+                            'workers',
+                        )
+                    },
+                },
+            )
+        baseline = None
+        if options['baseline']:
+            baseline = read_results(options['baseline'])
+        self.stdout.write(format_report(results, baseline))
+        if options['output']:
+            write_results(results, options['output'])
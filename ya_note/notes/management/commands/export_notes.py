@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from notes.services import export_notes, write_notes
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заметки в JSON Lines или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-o', '--output',
+            help='Файл для выгрузки; по умолчанию stdout.'
+        )
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'), default='jsonl'
+        )
+        parser.add_argument('--author', help='Только заметки автора.')
+
+    def handle(self, *args, **options):
+        rows = export_notes(author=options['author'])
+        if options['output']:
+            with open(
+                    options['output'], 'w', encoding='utf-8', newline=''
+            ) as output:
+                write_notes(rows, output, options['format'])
+        else:
+            write_notes(rows, self.stdout, options['format'])
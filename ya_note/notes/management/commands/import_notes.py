@@ -0,0 +1,52 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.services import import_notes, read_notes
+
+
+class Command(BaseCommand):
+    help = 'Массово загружает заметки из JSON Lines или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с заметками или `-`.')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'), default='jsonl'
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--author',
+            help='Автор для заметок без поля `author`.'
+        )
+        parser.add_argument(
+            '--create-users', action='store_true',
+            help='Создавать отсутствующих авторов без пароля.'
+        )
+
+    def report(self, result):
+        self.stdout.write(
+            f'Загружено заметок: {result.created}, '
+            f'переименовано slug: {result.renamed}, '
+            f'создано пользователей: {result.users_created}'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file = (
+            sys.stdin if path == '-'
+            else open(path, encoding='utf-8', newline='')
+        )
+        try:
+            result = import_notes(
+                read_notes(file, options['format']),
+                batch_size=options['batch_size'],
+                default_author=options['author'],
+                create_users=options['create_users'],
+                progress=self.report if options['verbosity'] > 1 else None,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        finally:
+            if file is not sys.stdin:
+                file.close()
+        self.report(result)
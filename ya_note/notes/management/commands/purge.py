@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.models import PurgeTask
+from notes.purge import pending_tasks, run_purge, schedule_purge
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет пользователей вместе с заметками пачками. '
+        'Прерванное удаление продолжается с --pending.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int)
+        parser.add_argument(
+            '--pending', action='store_true',
+            help='Продолжить незавершённые удаления.'
+        )
+        parser.add_argument('--batch-size', type=int)
+
+    def progress(self, task):
+        self.stdout.write(f'{task}: {task.deleted} из {task.total}')
+
+    def handle(self, *args, **options):
+        if options['pending']:
+            tasks = list(pending_tasks())
+        elif options['ids']:
+            tasks = [
+                schedule_purge(PurgeTask.USER, object_id)
+                for object_id in options['ids']
+            ]
+        else:
+            raise CommandError('Укажите пользователей или --pending.')
+        for task in tasks:
+            run_purge(task, options['batch_size'], self.progress)
+            self.stdout.write(self.style.SUCCESS(
+                f'{task}: удалено, заметок {task.deleted}'
+            ))
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from notes.services import misplaced_authors, move_author_notes
+from notes.sharding import note_databases
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит заметки авторов в базы, которые им назначает '
+        'текущий NOTE_SHARDS. Запускается после изменения списка шардов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source', nargs='+', dest='sources',
+            help=(
+                'Базы, где искать заметки не на своём месте; по умолчанию '
+                'основная база и все шарды.'
+            ),
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, каких авторов нужно перенести.'
+        )
+
+    def handle(self, *args, **options):
+        sources = options['sources'] or dict.fromkeys(
+            [DEFAULT_DB_ALIAS, *note_databases()]
+        )
+        unknown = set(sources) - set(settings.DATABASES)
+        if unknown:
+            raise CommandError('Нет баз: ' + ', '.join(sorted(unknown)))
+        authors = moved = 0
+        for source in sources:
+            for author_id, target in list(misplaced_authors(source)):
+                authors += 1
+                if options['dry_run']:
+                    self.stdout.write(f'{author_id}: {source} -> {target}')
+                    continue
+                moved += move_author_notes(
+                    author_id, source, target, options['batch_size']
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Авторов не на своём шарде: {authors}, '
+            f'перенесено заметок: {moved}'
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from notes.search import rebuild_index
+from notes.sharding import note_databases
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс заметок во всех шардах.'
+
+    def handle(self, *args, **options):
+        for alias in note_databases():
+            rebuild_index(using=alias)
+        self.stdout.write(self.style.SUCCESS('Индекс заметок перестроен.'))
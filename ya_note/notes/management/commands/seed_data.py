@@ -0,0 +1,102 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from notes.seeding import chunk_ranges, group_by_shard, run_tasks
+from notes.sharding import note_databases
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро заполняет базы синтетическими пользователями и заметками, '
+        'при необходимости в несколько процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument(
+            '--notes-per-user', type=int, default=100,
+            help='Заметок у каждого нового пользователя.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Процессов, готовящих и вставляющих строки.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--chunk-size', type=int, default=50000,
+            help='Строк в одной задаче процесса.'
+        )
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Начало имён пользователей; должно быть уникальным.'
+        )
+
+    def run(self, tasks, workers, label):
+        started = time.perf_counter()
+        total = 0
+        for _, created in run_tasks(tasks, workers):
+            total += created
+            elapsed = time.perf_counter() - started
+            if self.verbosity > 1:
+                self.stdout.write(
+                    f'{label}: {total} ({total / elapsed:.0f} строк/с)'
+                )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{label}: {total} за {elapsed:.1f} с '
+            f'({total / elapsed if elapsed else 0:.0f} строк/с)'
+        )
+
+    def note_tasks(self, author_ids, per_author, batch_size, chunk_size):
+        """Задачи по шардам вперемешку, чтобы процессы писали в разные базы."""
+        authors_per_task = max(chunk_size // max(per_author, 1), 1)
+        queues = [
+            [
+                ('notes', (ids[start:start + authors_per_task], per_author),
+                 {'batch_size': batch_size})
+                for start in range(0, len(ids), authors_per_task)
+            ]
+            for ids in group_by_shard(author_ids).values()
+        ]
+        tasks = []
+        while any(queues):
+            for queue in queues:
+                if queue:
+                    tasks.append(queue.pop(0))
+        return tasks
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        workers = options['workers']
+        batch_size = options['batch_size']
+        prefix = options['prefix']
+        last_user = User.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        self.run([
+            ('users', (count, prefix, start), {'batch_size': batch_size})
+            for start, count in chunk_ranges(
+                options['users'], options['chunk_size']
+            )
+        ], workers, 'Пользователи')
+
+        per_author = options['notes_per_user']
+        author_ids = list(User.objects.filter(
+            pk__gt=last_user, username__startswith=prefix
+        ).order_by('pk').values_list('pk', flat=True))
+        self.run(
+            self.note_tasks(
+                author_ids, per_author, batch_size, options['chunk_size']
+            ) if per_author else [],
+            workers, 'Заметки'
+        )
+
+        for alias in {DEFAULT_DB_ALIAS, *note_databases()}:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('ANALYZE')
+        self.stdout.write(self.style.SUCCESS('Готово.'))
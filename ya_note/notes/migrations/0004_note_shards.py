@@ -0,0 +1,79 @@
+# Generated by Django 3.2.15 on 2026-10-17 17:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Пересборка таблицы в SQLite при смене внешнего ключа
+# удаляет триггеры полнотекстового индекса из 0003.
+TRIGGERS_SQL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_insert
+    AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text, author_id)
+        VALUES (new.id, new.title, new.text, new.author_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_delete
+    AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text, author_id)
+        VALUES ('delete', old.id, old.title, old.text, old.author_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_update
+    AFTER UPDATE OF title, text, author_id ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text, author_id)
+        VALUES ('delete', old.id, old.title, old.text, old.author_id);
+        INSERT INTO notes_note_fts(rowid, title, text, author_id)
+        VALUES (new.id, new.title, new.text, new.author_id);
+    END
+    """,
+)
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+def register_slugs(apps, schema_editor):
+    """До шардирования все заметки в одной базе, реестр заполняется из неё."""
+    Note = apps.get_model('notes', 'Note')
+    NoteSlug = apps.get_model('notes', 'NoteSlug')
+    using = schema_editor.connection.alias
+    NoteSlug.objects.using(using).bulk_create(
+        NoteSlug(slug=slug, author_id=author_id)
+        for slug, author_id in Note.objects.using(using).values_list(
+            'slug', 'author_id'
+        ).iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0003_note_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, create_triggers),
+        migrations.AlterField(
+            model_name='note',
+            name='author',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.CreateModel(
+            name='NoteSlug',
+            fields=[
+                ('slug', models.SlugField(max_length=100, primary_key=True, serialize=False)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(create_triggers, migrations.RunPython.noop),
+        migrations.RunPython(register_slugs, migrations.RunPython.noop),
+    ]
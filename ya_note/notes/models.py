@@ -1,8 +1,29 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, router, transaction
 
 from pytils.translit import slugify
 
+from .sharding import database_for_author, is_sharded
+
+
+class NoteQuerySet(models.QuerySet):
+
+    def create(self, **kwargs):
+        """Без явной базы шард для новой заметки выбирает роутер по автору."""
+        if self._db is not None:
+            return super().create(**kwargs)
+        note = self.model(**kwargs)
+        note.save(force_insert=True)
+        return note
+
+    def for_author(self, author):
+        """Заметки автора; при шардировании — с его шарда."""
+        author_id = getattr(author, 'pk', author)
+        queryset = self.filter(author_id=author_id)
+        if is_sharded():
+            queryset = queryset.using(database_for_author(author_id))
+        return queryset
+
 
 class Note(models.Model):
     title = models.CharField(
@@ -23,16 +44,110 @@ class Note(models.Model):
         help_text=('Укажите адрес для страницы заметки. Используйте только '
                    'латиницу, цифры, дефисы и знаки подчёркивания')
     )
+    # Отдельный индекс по author не нужен: его заменяет
+    # составной индекс note_author_id_idx. Внешнего ключа в базе нет:
+    # пользователи живут в основной базе, а заметки — на шардах.
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
+        db_constraint=False,
     )
 
+    objects = NoteQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', 'id'), name='note_author_id_idx'
+            ),
+        )
+
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает slug, под которым заметка записана в реестре."""
+        instance = super().from_db(db, field_names, values)
+        instance._registered_slug = instance.__dict__.get('slug')
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.slug:
             max_slug_length = self._meta.get_field('slug').max_length
             self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        self._reserved_slug = None
+        try:
+            super().save(*args, **kwargs)
+        except Exception:
+            self.release_reserved_slug()
+            raise
+
+    def release_reserved_slug(self):
+        """
+        Снимает закрепление slug, созданное для несохранённой заметки.
+
+        Реестр лежит в основной базе, а заметка на шарде может не
+        записаться. Если ошибка случилась в транзакции основной базы,
+        запись в реестре отменит её откат.
+        """
+        if not self._reserved_slug:
+            return
+        using = router.db_for_write(NoteSlug)
+        if not transaction.get_connection(using).needs_rollback:
+            NoteSlug.objects.using(using).filter(
+                slug=self._reserved_slug, author_id=self.author_id
+            ).delete()
+        self._reserved_slug = None
+
+
+class NoteSlug(models.Model):
+    """
+    Реестр slug всех заметок.
+
+    Всегда хранится в основной базе: проверка уникальности slug —
+    поиск по первичному ключу, а не обход всех шардов.
+    """
+    slug = models.SlugField(max_length=100, primary_key=True)
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+
+    def __str__(self):
+        return self.slug
+
+
+class PurgeTask(models.Model):
+    """
+    Удаление пользователя с большим числом заметок, см. notes.purge.
+
+    Пока `finished` пуст, удаление продолжает команда `purge --pending`.
+    """
+    USER = 'user'
+    TARGETS = (
+        (USER, 'Пользователь'),
+    )
+
+    target = models.CharField('Что удаляется', max_length=10, choices=TARGETS)
+    object_id = models.BigIntegerField('Идентификатор')
+    total = models.PositiveIntegerField('Зависимых строк', default=0)
+    deleted = models.PositiveIntegerField('Удалено строк', default=0)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    finished = models.DateTimeField('Завершено', null=True, blank=True)
+
+    class Meta:
+        ordering = ('created',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('target', 'object_id'),
+                condition=models.Q(finished__isnull=True),
+                name='purge_task_unfinished_unique',
+            ),
+        )
+        verbose_name_plural = 'Удаления'
+        verbose_name = 'Удаление'
+
+    def __str__(self):
+        return f'{self.get_target_display()} {self.object_id}'
@@ -0,0 +1,58 @@
+class NotesPage:
+    """Страница заметок в порядке `id`."""
+
+    def __init__(self, object_list, has_previous, has_next):
+        self.object_list = object_list
+        self.has_previous = has_previous
+        self.has_next = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous and self.object_list:
+            return self.object_list[0].pk
+        return None
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.object_list:
+            return self.object_list[-1].pk
+        return None
+
+
+def parse_cursor(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def paginate_by_id(queryset, page_size, after=None, before=None):
+    """
+    Курсорная пагинация по `id`.
+
+    В паре с фильтром по автору запрос идёт по индексу `(author, id)`,
+    и стоимость страницы не зависит от её номера.
+    """
+    after, before = parse_cursor(after), parse_cursor(before)
+    if before is not None:
+        rows = list(
+            queryset.filter(pk__lt=before).order_by('-pk')[:page_size + 1]
+        )
+        has_previous = len(rows) > page_size
+        rows = rows[:page_size]
+        rows.reverse()
+        return NotesPage(rows, has_previous=has_previous, has_next=True)
+    if after is not None:
+        queryset = queryset.filter(pk__gt=after)
+    rows = list(queryset.order_by('pk')[:page_size + 1])
+    return NotesPage(
+        rows[:page_size],
+        has_previous=after is not None,
+        has_next=len(rows) > page_size,
+    )
@@ -0,0 +1,149 @@
+"""
+Удаление пользователей с большим числом заметок.
+
+`Collector` Django загружает все заметки пользователя в память и
+удаляет их в одной транзакции, всё это время держа блокировку записи,
+а `post_delete` каждой заметки отдельно освобождает её slug. Здесь
+заметки удаляются пачками по `PURGE_BATCH_SIZE` прямыми `DELETE`, и
+их slug удаляются из реестра `NoteSlug` в той же транзакции. Между
+пачками успевают остальные писатели. Сам пользователь удаляется
+обычным `delete()` последним, когда заметок уже нет.
+
+Заметки ищутся на шарде автора, а также в основной базе и на остальных
+шардах: после изменения `NOTE_SHARDS` они могут ещё не переехать.
+Прогресс хранится в `PurgeTask.deleted`, и прерванное удаление
+продолжается командой `purge --pending`. Полнотекстовый индекс
+обновляют триггеры.
+
+Пользователь на время удаления деактивируется и не может войти.
+"""
+import threading
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from yanote.auth import forget_user
+from yanote.metrics import WRITES
+
+from .models import Note, NoteSlug, PurgeTask
+from .sharding import database_for_author, note_databases
+
+User = get_user_model()
+
+
+def note_locations(author_id):
+    """Базы, где могут быть заметки автора; его шард первым."""
+    return list(dict.fromkeys([
+        database_for_author(author_id), DEFAULT_DB_ALIAS, *note_databases()
+    ]))
+
+
+def author_notes(author_id, using):
+    return Note.objects.using(using).filter(author_id=author_id).order_by()
+
+
+def count_notes(author_id):
+    return sum(
+        author_notes(author_id, using).count()
+        for using in note_locations(author_id)
+    )
+
+
+def schedule_purge(target, object_id):
+    """
+    Задача удаления пользователя.
+
+    Незавершённая задача для того же пользователя переиспользуется.
+    """
+    with transaction.atomic(using=router.db_for_write(PurgeTask)):
+        task = PurgeTask.objects.filter(
+            target=target, object_id=object_id, finished__isnull=True
+        ).first()
+        if task is None:
+            task = PurgeTask.objects.create(
+                target=target, object_id=object_id,
+                total=count_notes(object_id),
+            )
+        User.objects.filter(pk=object_id).update(is_active=False)
+        transaction.on_commit(partial(forget_user, object_id))
+    return task
+
+
+def delete_batch(task, batch_size):
+    """Удаляет пачку заметок с одной из баз; возвращает их число."""
+    registry = router.db_for_write(NoteSlug)
+    for using in note_locations(task.object_id):
+        with transaction.atomic(using=registry), \
+                transaction.atomic(using=using):
+            rows = list(author_notes(task.object_id, using).values_list(
+                'pk', 'slug'
+            )[:batch_size])
+            if not rows:
+                continue
+            Note.objects.using(using).filter(
+                pk__in=[pk for pk, _ in rows]
+            )._raw_delete(using)
+            NoteSlug.objects.using(registry).filter(
+                slug__in=[slug for _, slug in rows],
+                author_id=task.object_id,
+            )._raw_delete(registry)
+            PurgeTask.objects.filter(pk=task.pk).update(
+                deleted=F('deleted') + len(rows)
+            )
+        task.deleted += len(rows)
+        WRITES.inc('note', 'delete', amount=len(rows))
+        return len(rows)
+    return 0
+
+
+def run_purge(task, batch_size=None, progress=None):
+    """
+    Удаляет заметки пачками, затем самого пользователя.
+
+    `progress(task)` вызывается после каждой пачки.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    while delete_batch(task, batch_size):
+        if progress is not None:
+            progress(task)
+    with transaction.atomic(using=router.db_for_write(User)):
+        # Заметок уже нет, и сборщику почти нечего загружать.
+        User.objects.filter(pk=task.object_id).delete()
+        task.finished = timezone.now()
+        task.save(update_fields=['finished'])
+    return task
+
+
+def pending_tasks():
+    return PurgeTask.objects.filter(finished__isnull=True)
+
+
+def _run_in_thread(task):
+    try:
+        run_purge(task)
+    finally:
+        connections.close_all()
+
+
+def start_purge(task):
+    """
+    Запускает удаление после фиксации текущей транзакции.
+
+    С `PURGE_IN_BACKGROUND` удаление идёт в фоновом потоке и запрос
+    его не ждёт. Если процесс завершится раньше, задачу доделает
+    `purge --pending`.
+    """
+    if settings.PURGE_IN_BACKGROUND:
+        def run():
+            threading.Thread(
+                target=_run_in_thread, args=(task,),
+                name=f'purge-{task.pk}', daemon=True,
+            ).start()
+    else:
+        def run():
+            run_purge(task)
+    transaction.on_commit(run, using=router.db_for_write(PurgeTask))
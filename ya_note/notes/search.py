@@ -0,0 +1,77 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+FTS_TABLE = 'notes_note_fts'
+MATCH_START, MATCH_END = '\x02', '\x03'
+# Вес совпадения в заголовке, тексте и служебной колонке автора.
+BM25_WEIGHTS = (10.0, 1.0, 0.0)
+SNIPPET_TOKENS = 16
+WORD = re.compile(r'\w+')
+
+
+def build_match_query(author_id, query):
+    """
+    Запрос FTS5 из пользовательской строки.
+
+    Каждое слово ищется по префиксу, все слова обязательны.
+    Условие на автора входит в сам запрос: FTS5 пересекает
+    списки документов, и поиск не просматривает чужие заметки.
+    """
+    words = WORD.findall(query.lower())
+    if not words:
+        return None
+    terms = ' AND '.join(f'"{word}"*' for word in words)
+    return f'author_id:"{int(author_id)}" AND ({terms})'
+
+
+def render_snippet(snippet):
+    """Экранирует фрагмент и подсвечивает найденные слова."""
+    return mark_safe(
+        escape(snippet)
+        .replace(MATCH_START, '<mark>')
+        .replace(MATCH_END, '</mark>')
+    )
+
+
+class SearchResult:
+
+    def __init__(self, pk, slug, title, snippet, rank):
+        self.pk = pk
+        self.slug = slug
+        self.title = title
+        self.snippet = render_snippet(snippet)
+        self.rank = rank
+
+
+def search_notes(author_id, query, limit, offset=0, using=None):
+    """Заметки автора по релевантности, с подсвеченными фрагментами."""
+    match = build_match_query(author_id, query)
+    if match is None:
+        return []
+    with connections[using or DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(
+            f'SELECT note.id, note.slug, note.title, '
+            f'snippet({FTS_TABLE}, -1, %s, %s, %s, %s), '
+            f'bm25({FTS_TABLE}, %s, %s, %s) AS rank '
+            f'FROM {FTS_TABLE} '
+            f'JOIN notes_note AS note ON note.id = {FTS_TABLE}.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY rank LIMIT %s OFFSET %s',
+            [MATCH_START, MATCH_END, '…', SNIPPET_TOKENS,
+             *BM25_WEIGHTS, match, limit, offset]
+        )
+        return [SearchResult(*row) for row in cursor.fetchall()]
+
+
+def rebuild_index(using=None):
+    """Перестраивает индекс по содержимому таблицы заметок."""
+    with connections[using or DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"
+        )
@@ -0,0 +1,155 @@
+"""
+Синтетические данные для нагрузочных прогонов.
+
+Строки вставляются `bulk_create` пачками, по транзакции на пачку.
+Slug `<автор>-<номер>` уникальны заранее, поэтому реестр `NoteSlug`
+заполняется без поиска занятых. Задачи с заметками делятся по шардам:
+в несколько процессов (через `fork`) шарды заполняются параллельно,
+по одному пишущему на каждый файл базы.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .models import Note, NoteSlug
+from .sharding import database_for_author, note_databases
+
+User = get_user_model()
+
+WORDS = (
+    'заметка список покупки встреча идея проект книга фильм '
+    'поездка работа отпуск задача звонок письмо'
+).split()
+# Пишущий процесс ждёт блокировку, пока пишут остальные.
+SEED_BUSY_TIMEOUT_MS = 60000
+
+
+def make_text(index, words=30):
+    """Детерминированный текст: у прогонов одинаковые данные."""
+    return ' '.join(
+        WORDS[(index * 7 + position) % len(WORDS)]
+        for position in range(words)
+    )
+
+
+@contextmanager
+def fast_inserts(using=DEFAULT_DB_ALIAS):
+    """
+    Без `fsync` на каждую транзакцию и с долгим ожиданием блокировки.
+
+    При сбое посреди заливки база может потерять последние пачки,
+    но не испортится: журнал WAL остаётся целым. Внутри открытой
+    транзакции `synchronous` не меняется, и блок ничего не делает.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        synchronous, = cursor.fetchone()
+        cursor.execute('PRAGMA synchronous = OFF')
+        cursor.execute(f'PRAGMA busy_timeout = {SEED_BUSY_TIMEOUT_MS}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA synchronous = {synchronous}')
+
+
+def seed_users(count, prefix='user', start=0, batch_size=5000):
+    """Пользователи без пароля: в прогонах они входят через `force_login`."""
+    password = make_password(None)
+    for offset in range(start, start + count, batch_size):
+        end = min(offset + batch_size, start + count)
+        users = [
+            User(username=f'{prefix}{index}', password=password)
+            for index in range(offset, end)
+        ]
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+    return count
+
+
+def seed_notes(authors, per_author, batch_size=5000):
+    """
+    `per_author` заметок каждому автору, на его шард.
+
+    `authors` — пользователи или их id.
+    """
+    created = 0
+    for author in authors:
+        author_id = getattr(author, 'pk', author)
+        alias = database_for_author(author_id)
+        for start in range(0, per_author, batch_size):
+            notes = [
+                Note(
+                    title=f'Заметка {number}',
+                    text=make_text(number),
+                    slug=f'{author_id}-{number}',
+                    author_id=author_id,
+                )
+                for number in range(
+                    start, min(start + batch_size, per_author)
+                )
+            ]
+            slugs = [
+                NoteSlug(slug=note.slug, author_id=author_id)
+                for note in notes
+            ]
+            # Реестр и шард — разные файлы: основная база не ждёт,
+            # пока пишется шард. Slug занимаются до вставки заметок.
+            with transaction.atomic():
+                NoteSlug.objects.bulk_create(slugs)
+            with transaction.atomic(using=alias):
+                Note.objects.using(alias).bulk_create(notes)
+            created += len(notes)
+    return created
+
+
+def group_by_shard(author_ids):
+    """Id авторов по базам заметок, в исходном порядке."""
+    groups = {alias: [] for alias in note_databases()}
+    for author_id in author_ids:
+        groups[database_for_author(author_id)].append(author_id)
+    return groups
+
+
+TASKS = {
+    'users': seed_users,
+    'notes': seed_notes,
+}
+
+
+def _run_task(task):
+    name, args, kwargs = task
+    with ExitStack() as stack:
+        for alias in {DEFAULT_DB_ALIAS, *note_databases()}:
+            stack.enter_context(fast_inserts(alias))
+        return name, TASKS[name](*args, **kwargs)
+
+
+def run_tasks(tasks, workers=1):
+    """
+    Выполняет задачи вида `(имя, args, kwargs)`; отдаёт `(имя, строк)`.
+
+    Соединения закрываются до `fork`: дочерний процесс
+    открывает своё.
+    """
+    if workers <= 1:
+        yield from map(_run_task, tasks)
+        return
+    connections.close_all()
+    with ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context('fork')
+    ) as executor:
+        yield from executor.map(_run_task, tasks)
+
+
+def chunk_ranges(count, size):
+    for start in range(0, count, size):
+        yield start, min(size, count - start)
@@ -0,0 +1,347 @@
+import csv
+import json
+from functools import lru_cache
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, connection, transaction
+from pytils.translit import slugify
+
+from yanote.metrics import WRITES
+
+from .models import Note, NoteSlug
+from .sharding import database_for_author, note_databases
+
+User = get_user_model()
+
+MAX_SLUG_LENGTH = Note._meta.get_field('slug').max_length
+# Место под суффикс вида `-1234567`, которым разрешаются совпадения.
+SLUG_SUFFIX_RESERVE = 8
+# SQLite не разбирает выражения глубже 1000 уровней,
+# поэтому префиксы ищутся порциями.
+PREFIXES_PER_QUERY = 500
+DEFAULT_SLUG = 'note'
+EXPORT_FIELDS = ('title', 'text', 'slug', 'author')
+
+
+@lru_cache(maxsize=65536)
+def slugify_title(title):
+    """Транслитерация дорогая, а заголовки при переносе часто повторяются."""
+    return slugify(title)
+
+
+def make_base_slug(title, slug=None):
+    """Slug, который заметка получила бы без учёта совпадений."""
+    slug = slug or slugify_title(title or '') or DEFAULT_SLUG
+    return slug[:MAX_SLUG_LENGTH]
+
+
+def slug_prefix(base):
+    return base[:MAX_SLUG_LENGTH - SLUG_SUFFIX_RESERVE]
+
+
+def suffix_range(base):
+    """
+    Диапазон реестра, в котором лежат кандидаты `base-N`.
+
+    Короткому base суффикс не мешает, и кандидаты — это `base-`
+    и цифры: `:` идёт сразу за `9`. У base на пределе длины суффикс
+    отрезает конец, и ищется всё с общим префиксом `slug_prefix`.
+    """
+    if len(base) + SLUG_SUFFIX_RESERVE <= MAX_SLUG_LENGTH:
+        return f'{base}-0', f'{base}-:'
+    prefix = slug_prefix(base)
+    return prefix, prefix + chr(0x10FFFF)
+
+
+def find_taken_slugs(bases):
+    """
+    Занятые slug, которые могут совпасть с кандидатами от `bases`.
+
+    Slug ищутся в реестре `NoteSlug` в основной базе, а не на шардах.
+    Кандидаты каждого base — диапазон по первичному ключу реестра,
+    так что пачка проверяется одним запросом без полного просмотра.
+    Кандидаты с суффиксом длиннее `SLUG_SUFFIX_RESERVE` у длинных
+    base в диапазон не попадают, их проверяет `allocate_slugs`.
+    Запрос собирается вручную: построение дерева `Q` из сотен
+    условий в ORM растёт квадратично.
+    """
+    quote = connection.ops.quote_name
+    table = quote(NoteSlug._meta.db_table)
+    column = quote(NoteSlug._meta.get_field('slug').column)
+    bases = sorted(set(bases))
+    taken = set()
+    with connection.cursor() as cursor:
+        for start in range(0, len(bases), PREFIXES_PER_QUERY):
+            chunk = bases[start:start + PREFIXES_PER_QUERY]
+            params = list(chunk)
+            conditions = [
+                f'{column} IN ({", ".join(["%s"] * len(chunk))})'
+            ]
+            for low, high in map(suffix_range, chunk):
+                conditions.append(f'({column} >= %s AND {column} < %s)')
+                params += [low, high]
+            cursor.execute(
+                f'SELECT {column} FROM {table} '
+                f'WHERE {" OR ".join(conditions)}',
+                params
+            )
+            taken.update(slug for slug, in cursor.fetchall())
+    return taken
+
+
+def allocate_slugs(bases, taken=None):
+    """
+    Раздаёт уникальные slug пачке заметок.
+
+    Совпадения с уже занятыми и между собой разрешаются
+    суффиксами `-2`, `-3` и т. д. Кандидат с суффиксом длиннее
+    `SLUG_SUFFIX_RESERVE` мог не попасть в `find_taken_slugs`
+    и проверяется в реестре отдельным запросом.
+    """
+    if taken is None:
+        taken = find_taken_slugs(bases)
+    next_suffix = {}
+    slugs = []
+    for base in bases:
+        slug = base
+        if slug in taken:
+            number = next_suffix.get(base, 2)
+            while slug in taken:
+                suffix = f'-{number}'
+                slug = base[:MAX_SLUG_LENGTH - len(suffix)] + suffix
+                number += 1
+                if (len(suffix) > SLUG_SUFFIX_RESERVE
+                        and NoteSlug.objects.filter(slug=slug).exists()):
+                    taken.add(slug)
+            next_suffix[base] = number
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+class ImportResult:
+
+    def __init__(self):
+        self.created = 0
+        self.renamed = 0
+        self.users_created = 0
+
+
+def _resolve_authors(usernames, authors, create_users):
+    """Дополняет `authors` (username -> id); возвращает число новых."""
+    missing = set(usernames) - set(authors)
+    if not missing:
+        return 0
+    authors.update(
+        User.objects.filter(username__in=missing).values_list(
+            'username', 'pk'
+        )
+    )
+    missing -= set(authors)
+    if missing and not create_users:
+        raise ValueError(
+            'Нет пользователей: ' + ', '.join(sorted(missing))
+        )
+    if missing:
+        User.objects.bulk_create(
+            User(username=username, password=make_password(None))
+            for username in missing
+        )
+        authors.update(
+            User.objects.filter(username__in=missing).values_list(
+                'username', 'pk'
+            )
+        )
+    return len(missing)
+
+
+def import_notes(
+    rows, batch_size=500, default_author=None, create_users=False,
+    progress=None
+):
+    """
+    Массовый импорт заметок.
+
+    `rows` — словари с ключами `title`, `text`, необязательными
+    `slug` и `author` (username). Каждая пачка — одна транзакция:
+    поиск занятых slug одним запросом и вставка через `bulk_create`.
+    """
+    result = ImportResult()
+    authors = {}
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return result
+        usernames = [row.get('author') or default_author for row in batch]
+        if None in usernames:
+            raise ValueError('У заметки не указан автор.')
+        with transaction.atomic():
+            result.users_created += _resolve_authors(
+                usernames, authors, create_users
+            )
+            bases = [
+                make_base_slug(row.get('title'), row.get('slug'))
+                for row in batch
+            ]
+            slugs = allocate_slugs(bases)
+            notes = []
+            for row, username, base, slug in zip(
+                    batch, usernames, bases, slugs
+            ):
+                note = Note(
+                    text=row.get('text') or '',
+                    slug=slug,
+                    author_id=authors[username],
+                )
+                if row.get('title'):
+                    note.title = row['title']
+                notes.append(note)
+                result.renamed += slug != base
+            NoteSlug.objects.bulk_create(
+                NoteSlug(slug=note.slug, author_id=note.author_id)
+                for note in notes
+            )
+            by_database = {}
+            for note in notes:
+                by_database.setdefault(
+                    database_for_author(note.author_id), []
+                ).append(note)
+            for alias, database_notes in by_database.items():
+                with transaction.atomic(using=alias):
+                    Note.objects.using(alias).bulk_create(database_notes)
+        result.created += len(notes)
+        WRITES.inc('note', 'create', amount=len(notes))
+        if progress is not None:
+            progress(result)
+
+
+def _usernames(author_ids, known):
+    missing = set(author_ids) - set(known)
+    if missing:
+        known.update(
+            User.objects.filter(pk__in=missing).values_list('pk', 'username')
+        )
+    return known
+
+
+def export_notes(author=None, chunk_size=2000):
+    """
+    Заметки потоком, в формате, который понимает `import_notes`.
+
+    Пользователи и заметки могут жить в разных базах, поэтому
+    имена авторов подгружаются отдельно, по одной пачке на порцию.
+    """
+    fields = ('title', 'text', 'slug', 'author_id')
+    if author is not None:
+        author_id = User.objects.filter(username=author).values_list(
+            'pk', flat=True
+        ).first()
+        if author_id is None:
+            return
+        querysets = [Note.objects.for_author(author_id)]
+    else:
+        querysets = [Note.objects.using(alias) for alias in note_databases()]
+    usernames = {}
+    for queryset in querysets:
+        rows = queryset.order_by('pk').values_list(*fields).iterator(
+            chunk_size=chunk_size
+        )
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            _usernames((row[-1] for row in chunk), usernames)
+            for *values, author_id in chunk:
+                yield dict(zip(EXPORT_FIELDS, [*values, usernames[author_id]]))
+
+
+def reserve_slug(note):
+    """
+    Закрепляет slug заметки за её автором в реестре.
+
+    Чужой slug — `IntegrityError`, как при нарушении уникального
+    индекса. Возвращает True, если запись в реестре создана сейчас.
+    """
+    owner = NoteSlug.objects.filter(slug=note.slug).values_list(
+        'author_id', flat=True
+    ).first()
+    if owner is None:
+        NoteSlug.objects.create(slug=note.slug, author_id=note.author_id)
+        return True
+    if owner != note.author_id:
+        raise IntegrityError(f'slug {note.slug} уже занят.')
+    return False
+
+
+def release_slug(slug, author_id):
+    NoteSlug.objects.filter(slug=slug, author_id=author_id).delete()
+
+
+def misplaced_authors(source):
+    """Авторы, чьи заметки лежат в `source`, но должны быть в другой базе."""
+    author_ids = Note.objects.using(source).order_by('author_id').values_list(
+        'author_id', flat=True
+    ).distinct()
+    for author_id in author_ids.iterator():
+        target = database_for_author(author_id)
+        if target != source:
+            yield author_id, target
+
+
+def move_author_notes(author_id, source, target, batch_size=500):
+    """
+    Переносит заметки автора из `source` в `target` пачками.
+
+    Каждая пачка сначала записывается в `target`, затем удаляется
+    из `source`. Заметки, чей slug уже есть в `target`, не копируются
+    повторно, так что прерванный перенос можно просто запустить снова.
+    Удаление идёт без сигналов: slug остаются за автором в реестре.
+    """
+    moved = 0
+    queryset = Note.objects.using(source).filter(
+        author_id=author_id
+    ).order_by('pk')
+    while True:
+        batch = list(queryset[:batch_size])
+        if not batch:
+            return moved
+        present = set(
+            Note.objects.using(target).filter(
+                author_id=author_id, slug__in=[note.slug for note in batch]
+            ).values_list('slug', flat=True)
+        )
+        with transaction.atomic(using=target):
+            Note.objects.using(target).bulk_create(
+                Note(
+                    title=note.title, text=note.text,
+                    slug=note.slug, author_id=author_id,
+                )
+                for note in batch if note.slug not in present
+            )
+        with transaction.atomic(using=source):
+            Note.objects.using(source).filter(
+                pk__in=[note.pk for note in batch]
+            )._raw_delete(source)
+        moved += len(batch)
+
+
+def read_notes(file, format):
+    if format == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def write_notes(rows, file, format):
+    if format == 'csv':
+        writer = csv.DictWriter(file, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+        return
+    for row in rows:
+        file.write(json.dumps(row, ensure_ascii=False) + '\n')
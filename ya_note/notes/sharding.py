@@ -0,0 +1,75 @@
+"""
+Шардирование заметок по автору.
+
+Все запросы к заметкам и так ограничены автором, поэтому заметки
+одного автора живут в одной базе из `NOTE_SHARDS`. База выбирается
+rendezvous-хешированием: без таблицы соответствий, одинаково во всех
+процессах, а при добавлении шарда переезжает только часть авторов —
+их переносит команда `rebalance_notes`. Пока `NOTE_SHARDS` пуст,
+заметки хранятся в основной базе.
+
+Пользователи и реестр slug (`NoteSlug`) всегда в основной базе:
+глобальная уникальность slug проверяется одним запросом туда.
+Запросы к заметкам без автора (`Note.objects.all()`) шард не знают
+и идут в основную базу; для них есть `Note.objects.for_author`.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+NOTE_MODEL = 'notes.note'
+SLUG_MODEL = 'notes.noteslug'
+
+
+def is_sharded():
+    return bool(settings.NOTE_SHARDS)
+
+
+def note_databases():
+    """Базы, в которых могут храниться заметки."""
+    return list(settings.NOTE_SHARDS) or [DEFAULT_DB_ALIAS]
+
+
+def _score(alias, author_id):
+    return hashlib.blake2b(
+        f'{alias}:{author_id}'.encode(), digest_size=8
+    ).digest()
+
+
+def database_for_author(author_id):
+    """База заметок автора."""
+    databases = note_databases()
+    if len(databases) == 1:
+        return databases[0]
+    return max(databases, key=lambda alias: _score(alias, author_id))
+
+
+class NoteShardRouter:
+    """
+    Заметки — на шард автора, реестр slug и пользователи — в основную базу.
+
+    Работает, только если задан `NOTE_SHARDS`; остальные решения
+    остаются следующим роутерам.
+    """
+
+    def _db_for(self, model, hints):
+        if not is_sharded():
+            return None
+        label = model._meta.label_lower
+        instance = hints.get('instance')
+        is_note = (
+            instance is not None
+            and instance._meta.label_lower == NOTE_MODEL
+        )
+        if label == NOTE_MODEL:
+            return database_for_author(instance.author_id) if is_note else None
+        if label == SLUG_MODEL or is_note:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db_for(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for(model, hints)
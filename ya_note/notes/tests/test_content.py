@@ -1,6 +1,6 @@
 from http import HTTPStatus
 
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
@@ -62,6 +62,52 @@ class TestListPage(TestCase):
         diff = [author for author in all_authors if author != self.author]
         self.assertEqual(diff, [])
 
+    @override_settings(NOTES_COUNT_ON_LIST_PAGE=4)
+    def test_notes_keyset_pagination(self):
+        """Список листается курсорами и грузит только нужные поля."""
+        url = reverse('notes:list')
+        pages = []
+        response = self.authorize_client.get(url)
+        while True:
+            page = response.context['page']
+            pages.append([note.title for note in page])
+            if not page.has_next:
+                break
+            response = self.authorize_client.get(
+                url, {'after': page.next_cursor}
+            )
+        self.assertEqual(
+            pages,
+            [[f'Заметка №{index}' for index in range(start, end)]
+             for start, end in ((0, 4), (4, 8), (8, 10))]
+        )
+        self.assertEqual(
+            page.object_list[0].get_deferred_fields(), {'text', 'author_id'}
+        )
+        response = self.authorize_client.get(
+            url, {'before': page.previous_cursor}
+        )
+        self.assertEqual(
+            [note.title for note in response.context['page']],
+            [f'Заметка №{index}' for index in range(4, 8)]
+        )
+
+    @override_settings(NOTES_COUNT_ON_LIST_PAGE=8)
+    def test_notes_list_json(self):
+        """JSON-вариант списка отдаёт заметки и ссылки на страницы."""
+        response = self.authorize_client.get(reverse('notes:list_json'))
+        data = response.json()
+        self.assertEqual(len(data['results']), 8)
+        self.assertEqual(
+            set(data['results'][0]), {'id', 'slug', 'title'}
+        )
+        self.assertIsNone(data['previous'])
+        data = self.authorize_client.get(data['next']).json()
+        self.assertEqual(
+            [note['slug'] for note in data['results']], ['8', '9']
+        )
+        self.assertIsNone(data['next'])
+
 
 class TestDetailPage(TestCase):
     @classmethod
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note
+from yanote.testing import FULL_SCAN, assert_queries_use_indexes
+
+User = get_user_model()
+
+
+class TestIndexes(TestCase):
+    """Запросы страниц заметок не просматривают таблицы целиком."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Лев Толстой')
+        cls.note = Note.objects.create(
+            title='Заметка', text='Текст', slug='note', author=cls.author
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_views_use_indexes(self):
+        urls = (
+            reverse('notes:list'),
+            reverse('notes:detail', args=(self.note.slug,)),
+            reverse('notes:edit', args=(self.note.slug,)),
+            reverse('notes:delete', args=(self.note.slug,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    self.author_client.get(url)
+                assert_queries_use_indexes(context.captured_queries)
+
+
+class TestConnection(TestCase):
+    """Соединение получает PRAGMA и режим транзакций из настроек."""
+
+    def test_sqlite_connection_is_tuned(self):
+        pragmas = connection.settings_dict['OPTIONS']['pragmas']
+        with connection.cursor() as cursor:
+            for name in ('cache_size', 'busy_timeout'):
+                with self.subTest(pragma=name):
+                    cursor.execute(f'PRAGMA {name}')
+                    self.assertEqual(cursor.fetchone()[0], pragmas[name])
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+class TestFullScanMatcher(SimpleTestCase):
+    """Полный просмотр узнаётся в формулировках SQLite до и после 3.36."""
+
+    def test_full_scan_matches_old_and_new_sqlite(self):
+        details = {
+            'SCAN notes_note': True,
+            'SCAN U0': True,
+            'SCAN TABLE notes_note': True,
+            'SCAN TABLE notes_note AS U0': True,
+            'SCAN notes_note USING INDEX note_author_idx': False,
+            'SCAN TABLE notes_note USING COVERING INDEX note_author_idx': (
+                False
+            ),
+            'SEARCH notes_note USING INDEX note_author_idx (author_id=?)': (
+                False
+            ),
+            'SCAN CONSTANT ROW': False,
+        }
+        for detail, full_scan in details.items():
+            with self.subTest(detail=detail):
+                self.assertIs(bool(FULL_SCAN.match(detail)), full_scan)
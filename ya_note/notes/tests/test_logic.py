@@ -1,12 +1,34 @@
+import json
+import tracemalloc
 from http import HTTPStatus
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
 from pytils.translit import slugify
 
-from notes.models import Note
+from notes.models import Note, NoteSlug
 from notes.forms import WARNING
+from notes.services import (
+    allocate_slugs, find_taken_slugs, import_notes, read_notes
+)
+from yanote.auth import check_user_cache_is_shared, user_key
+from yanote.middleware import QUERY_COUNT_HEADER
+from yanote.profiling import PROFILE_ID_HEADER, make_token, tracing_memory
+from yanote.routers import READ_PRIMARY_COOKIE
+from yanote.warmup import warm_up
+
+# Копии в обоих проектах: каждый запускается из своего каталога.
+SHARED_MODULES = (
+    'auth.py', 'benchmark.py', 'metrics.py', 'middleware.py',
+    'profiling.py', 'warmup.py', 'sqlite3/base.py',
+)
 
 User = get_user_model()
 
@@ -176,3 +198,305 @@ class TestNoteSlug(TestCase):
 
         self.assertTrue(note_empty_slug_is_exists)
         self.assertEqual(new_note.slug, expected_slug)
+
+
+class TestBulkImport(TestCase):
+    """Массовый импорт и выгрузка заметок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Лев Толстой')
+        Note.objects.create(
+            title='Война и мир', text='Текст', author=cls.author
+        )
+
+    def test_allocate_slugs_resolves_collisions(self):
+        """Совпадения в базе и внутри пачки получают суффиксы."""
+        base = slugify('Война и мир')
+        long_base = 'a' * 100
+        Note.objects.create(
+            title='Длинная', text='Текст', slug=long_base, author=self.author
+        )
+        with self.assertNumQueries(1):
+            slugs = allocate_slugs([base, base, 'new', long_base, 'new'])
+        self.assertEqual(
+            slugs,
+            [f'{base}-2', f'{base}-3', 'new', 'a' * 98 + '-2', 'new-2']
+        )
+
+    def test_taken_slugs_are_looked_up_by_candidates_only(self):
+        """Slug, которые лишь начинаются с base, не загружаются."""
+        NoteSlug.objects.bulk_create(
+            NoteSlug(slug=slug, author_id=self.author.pk)
+            for slug in ('a', 'a-2', 'a-15', 'abc', 'a-b', 'ab-2')
+        )
+        self.assertEqual(find_taken_slugs(['a']), {'a', 'a-2', 'a-15'})
+
+    @patch('notes.services.SLUG_SUFFIX_RESERVE', 2)
+    def test_long_suffix_is_rechecked(self):
+        """Суффикс длиннее запаса проверяется в реестре отдельно."""
+        base = 'b' * 100
+        NoteSlug.objects.bulk_create(
+            NoteSlug(slug=slug, author_id=self.author.pk)
+            for slug in [
+                base, *(f'{base[:98]}-{number}' for number in range(2, 10)),
+                f'{base[:97]}-10',
+            ]
+        )
+        self.assertEqual(allocate_slugs([base]), [f'{base[:97]}-11'])
+
+    def test_import_and_export_commands(self):
+        """Импорт из JSON Lines и CSV и обратная выгрузка."""
+        rows = [
+            {'title': 'Война и мир', 'text': 'Том 1', 'author': 'Лев Толстой'},
+            {'title': 'Война и мир', 'text': 'Том 2'},
+            {'title': 'Анна Каренина', 'text': 'Текст', 'author': 'Новый'},
+        ]
+        source = StringIO(''.join(json.dumps(row) + '\n' for row in rows))
+        with patch('sys.stdin', source):
+            call_command(
+                'import_notes', '-', '--batch-size', '2',
+                '--author', 'Лев Толстой', '--create-users',
+                stdout=StringIO()
+            )
+        base = slugify('Война и мир')
+        self.assertEqual(
+            list(Note.objects.order_by('pk').values_list('slug', 'text')),
+            [(base, 'Текст'), (f'{base}-2', 'Том 1'),
+             (f'{base}-3', 'Том 2'), (slugify('Анна Каренина'), 'Текст')]
+        )
+        self.assertTrue(User.objects.filter(username='Новый').exists())
+
+        output = StringIO()
+        call_command('export_notes', '--format', 'csv', stdout=output)
+        output.seek(0)
+        exported = list(read_notes(output, 'csv'))
+        self.assertEqual(len(exported), 4)
+        self.assertEqual(exported[3]['author'], 'Новый')
+
+        Note.objects.all().delete()
+        import_notes(exported)
+        self.assertEqual(
+            list(Note.objects.order_by('pk').values_list('slug', flat=True)),
+            [row['slug'] for row in exported]
+        )
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class TestReplicaRouting(TestCase):
+    """Чтение с реплики и чтение своих записей после изменения."""
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Лев Толстой')
+        cls.note = Note.objects.create(
+            title='Заметка', text='Текст', slug='note', author=cls.author
+        )
+        cls.detail_url = reverse('notes:detail', args=(cls.note.slug,))
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_reads_go_to_replica_until_user_writes(self):
+        self.assertEqual(
+            self.author_client.get(self.detail_url).status_code,
+            HTTPStatus.NOT_FOUND
+        )
+        response = self.author_client.post(
+            reverse('notes:edit', args=(self.note.slug,)),
+            data={'title': 'Заметка', 'text': 'Новый текст', 'slug': 'note'}
+        )
+        self.assertEqual(
+            response.cookies[READ_PRIMARY_COOKIE]['max-age'],
+            settings.REPLICA_PIN_SECONDS
+        )
+        response = self.author_client.get(self.detail_url)
+        self.assertEqual(response.context['note'].text, 'Новый текст')
+
+
+class TestProfiling(TestCase):
+    """Профиль снимается только по подписанному токену."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='Админ', is_staff=True, is_superuser=True
+        )
+        cls.author = User.objects.create(username='Автор')
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        profiling_dir = override_settings(PROFILING_DIR=directory.name)
+        profiling_dir.enable()
+        self.addCleanup(profiling_dir.disable)
+
+    def test_profile_is_saved_and_listed(self):
+        url = reverse('notes:list')
+        response = self.author_client.get(url, HTTP_X_PROFILE='поддельный')
+        self.assertNotIn(PROFILE_ID_HEADER, response)
+        response = self.author_client.get(
+            url, HTTP_X_PROFILE=make_token(self.admin)
+        )
+        profile_id = response[PROFILE_ID_HEADER]
+
+        response = self.admin_client.get(reverse('profiling:list'))
+        self.assertEqual(
+            [profile['id'] for profile in response.context['profiles']],
+            [profile_id]
+        )
+        response = self.admin_client.get(
+            reverse('profiling:detail', args=(profile_id,))
+        )
+        profile = response.context['profile']
+        self.assertEqual(profile['url_name'], 'notes:list')
+        self.assertEqual(profile['query_count'], len(profile['queries']))
+        self.assertTrue(profile['functions'])
+        response = self.author_client.get(reverse('profiling:list'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_overlapping_profiles_share_memory_tracing(self):
+        was_tracing = tracemalloc.is_tracing()
+        first, second = tracing_memory(), tracing_memory()
+        first.__enter__()
+        second.__enter__()
+        first.__exit__(None, None, None)
+        self.assertTrue(tracemalloc.take_snapshot())
+        second.__exit__(None, None, None)
+        self.assertIs(tracemalloc.is_tracing(), was_tracing)
+
+
+class TestMetrics(TestCase):
+    """Метрики по маршрутам и записи заметок видны в /metrics."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def metric(self, sample):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        for line in response.content.decode().splitlines():
+            name, _, value = line.rpartition(' ')
+            if name == sample:
+                return float(value)
+        return 0
+
+    def test_routes_and_writes_are_counted(self):
+        listed = (
+            'http_responses_total'
+            '{route="notes:list",method="GET",status="200"}'
+        )
+        created = 'model_writes_total{model="note",action="create"}'
+        deleted = 'model_writes_total{model="note",action="delete"}'
+        before = {
+            sample: self.metric(sample)
+            for sample in (listed, created, deleted)
+        }
+        self.author_client.get(reverse('notes:list'))
+        self.author_client.post(
+            reverse('notes:add'),
+            data={'title': 'Заметка', 'text': 'Текст', 'slug': 'note'}
+        )
+        self.author_client.post(reverse('notes:delete', args=('note',)))
+        self.assertEqual(
+            {
+                sample: self.metric(sample) - value
+                for sample, value in before.items()
+            },
+            {listed: 1, created: 1, deleted: 1}
+        )
+        self.assertIn(
+            'cache_hit_ratio{cache="slugify_title"}',
+            self.client.get(reverse('metrics')).content.decode()
+        )
+
+    def test_metrics_are_not_public(self):
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+
+class TestWarmUp(TestCase):
+    databases = '__all__'
+
+    def test_warm_up_compiles_project_templates(self):
+        stats = warm_up()
+        self.assertEqual(
+            stats['templates'],
+            sum(
+                path.is_file()
+                for path in (settings.BASE_DIR / 'templates').rglob('*')
+            )
+        )
+        self.assertGreater(stats['resolvers'], 1)
+        self.assertEqual(stats['databases'], 1)
+
+    @override_settings(
+        REPLICA_DATABASES=['replica'], NOTE_SHARDS=['shard_0', 'shard_1']
+    )
+    def test_warm_up_connects_databases_in_use(self):
+        self.assertEqual(warm_up()['databases'], 4)
+
+
+class TestSharedModules(SimpleTestCase):
+    """Общие модули YaNews отличаются только именем проекта."""
+
+    def test_shared_modules_match_ya_news(self):
+        sibling_dir = settings.BASE_DIR.parent / 'ya_news' / 'yanews'
+        if not sibling_dir.is_dir():
+            self.skipTest('Проекта YaNews рядом нет.')
+        for module in SHARED_MODULES:
+            with self.subTest(module=module):
+                own = settings.BASE_DIR / 'yanote' / module
+                sibling = sibling_dir / module
+                self.assertEqual(
+                    own.read_text(encoding='utf-8'),
+                    sibling.read_text(encoding='utf-8').replace(
+                        'yanews', 'yanote'
+                    ),
+                )
+
+
+class TestAuthCache(TestCase):
+    """Сессия и пользователь берутся из кеша, пока не изменились."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def query_count(self):
+        response = self.author_client.get(reverse('notes:list'))
+        return int(response[QUERY_COUNT_HEADER])
+
+    def test_cached_user_is_reloaded_after_changes(self):
+        first = self.query_count()
+        self.assertEqual(self.query_count(), first - 1)
+        self.author.save()
+        self.assertEqual(self.query_count(), first)
+
+    def test_logout_forgets_user(self):
+        self.query_count()
+        self.author_client.post(reverse('users:logout'))
+        self.assertIsNone(caches['sessions'].get(user_key(self.author.pk)))
+
+    def test_process_local_user_cache_is_rejected(self):
+        self.assertEqual(
+            [error.id for error in check_user_cache_is_shared(None)],
+            ['auth_cache.E001']
+        )
+        with override_settings(DEBUG=True):
+            self.assertEqual(check_user_cache_is_shared(None), [])
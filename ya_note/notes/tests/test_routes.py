@@ -1,10 +1,12 @@
 from http import HTTPStatus
 
+import pytest
 from django.contrib.auth import get_user_model
 from django.test import TestCase, Client
 from django.urls import reverse
 
 from notes.models import Note
+from yanote.middleware import QUERY_COUNT_HEADER, QueryBudgetExceeded
 
 User = get_user_model()
 
@@ -88,3 +90,29 @@ class TestRoutes(TestCase):
                 redirect_url = f'{login_url}?next={url}'
                 response = self.client.get(url)
                 self.assertRedirects(response, redirect_url)
+
+
+class TestQueryBudget(TestCase):
+    """Проверка бюджета SQL-запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Лев Толстой')
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    @pytest.mark.query_budget({'notes:list': 0})
+    def test_query_budget_is_enforced(self):
+        """Превышение бюджета SQL-запросов роняет тест."""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.author_client.get(reverse('notes:list'))
+
+    def test_note_create_within_budget(self):
+        """Создание заметки не сохраняет её дважды."""
+        response = self.author_client.post(
+            reverse('notes:add'), data={'title': 'Заметка', 'text': 'Текст'}
+        )
+        self.assertRedirects(response, reverse('notes:success'))
+        self.assertEqual(response[QUERY_COUNT_HEADER], '5')
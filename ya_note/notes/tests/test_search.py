@@ -0,0 +1,85 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from notes.models import Note
+
+User = get_user_model()
+
+
+class TestNoteSearch(TestCase):
+    """Полнотекстовый поиск по заметкам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Лев Толстой')
+        cls.another_author = User.objects.create(username='Лев Худой')
+        cls.note = Note.objects.create(
+            title='Война и мир',
+            text='Князь Андрей Болконский <смотрит> на небо.',
+            slug='war', author=cls.author,
+        )
+        Note.objects.create(
+            title='Андрей', text='Чужая заметка про Андрея.',
+            slug='alien', author=cls.another_author,
+        )
+        cls.url = reverse('notes:search')
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def search(self, query, **params):
+        response = self.author_client.get(self.url, {'q': query, **params})
+        return response.context['results']
+
+    def test_search_is_scoped_to_author(self):
+        """Находятся только свои заметки, с подсвеченным фрагментом."""
+        results = self.search('андр')
+        self.assertEqual([result.slug for result in results], ['war'])
+        self.assertIn('<mark>Андрей</mark>', results[0].snippet)
+        self.assertIn('&lt;смотрит&gt;', results[0].snippet)
+
+    def test_title_ranks_higher(self):
+        """Совпадение в заголовке важнее совпадения в тексте."""
+        Note.objects.create(
+            title='Небо', text='Текст', slug='sky', author=self.author
+        )
+        self.assertEqual(
+            [result.slug for result in self.search('небо')], ['sky', 'war']
+        )
+
+    def test_index_follows_save_and_delete(self):
+        """Индекс обновляется при изменении и удалении заметки."""
+        self.note.text = 'Наташа Ростова'
+        self.note.save()
+        self.assertEqual(self.search('болконский'), [])
+        self.assertEqual(len(self.search('наташа')), 1)
+        self.note.delete()
+        self.assertEqual(self.search('наташа'), [])
+
+    @override_settings(NOTES_SEARCH_RESULTS_PER_PAGE=1)
+    def test_search_pagination(self):
+        Note.objects.create(
+            title='Небо', text='Текст', slug='sky', author=self.author
+        )
+        response = self.author_client.get(self.url, {'q': 'небо'})
+        self.assertTrue(response.context['has_next'])
+        self.assertEqual(
+            [result.slug for result in self.search('небо', page=2)], ['war']
+        )
+
+    def test_rebuild_command(self):
+        """Команда восстанавливает индекс после прямой правки таблицы."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO notes_note_fts(notes_note_fts) "
+                "VALUES ('delete-all')"
+            )
+        self.assertEqual(self.search('андрей'), [])
+        call_command('rebuild_notes_search', stdout=StringIO())
+        self.assertEqual(len(self.search('андрей')), 1)
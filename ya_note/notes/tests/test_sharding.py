@@ -0,0 +1,204 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from notes.forms import WARNING
+from notes.models import Note, NoteSlug, PurgeTask
+from notes.purge import delete_batch, schedule_purge
+from notes.search import search_notes
+from notes.sharding import database_for_author
+
+User = get_user_model()
+
+SHARDS = ['shard_0', 'shard_1']
+
+
+@override_settings(NOTE_SHARDS=SHARDS)
+class TestNoteSharding(TestCase):
+    """Заметки живут на шарде автора, slug уникальны между шардами."""
+    databases = {'default', *SHARDS}
+
+    @classmethod
+    def setUpTestData(cls):
+        authors = {}
+        index = 0
+        while len(authors) < len(SHARDS):
+            user = User.objects.create(username=f'Автор {index}')
+            authors.setdefault(database_for_author(user.pk), user)
+            index += 1
+        cls.author, cls.another_author = authors['shard_0'], authors['shard_1']
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.another_client = Client()
+        self.another_client.force_login(self.another_author)
+
+    def stored_in(self, slug):
+        return [
+            alias for alias in ('default', *SHARDS)
+            if Note.objects.using(alias).filter(slug=slug).exists()
+        ]
+
+    def test_shard_map_is_stable(self):
+        """Новый шард забирает себе часть авторов, остальные не переезжают."""
+        before = {pk: database_for_author(pk) for pk in range(1000)}
+        self.assertEqual(set(before.values()), set(SHARDS))
+        with self.settings(NOTE_SHARDS=[*SHARDS, 'shard_2']):
+            after = {pk: database_for_author(pk) for pk in range(1000)}
+        moved = {pk for pk in before if before[pk] != after[pk]}
+        self.assertTrue(moved)
+        self.assertEqual({after[pk] for pk in moved}, {'shard_2'})
+
+    def test_failed_save_releases_slug(self):
+        """Если заметка не записалась на шард, slug снова свободен."""
+        note = Note.objects.create(
+            title='Заметка', text='Текст', slug='note', author=self.author
+        )
+        duplicate = Note(
+            pk=note.pk, title='Копия', text='Текст', slug='copy',
+            author=self.author,
+        )
+        with self.assertRaises(IntegrityError):
+            duplicate.save(force_insert=True)
+        self.assertFalse(NoteSlug.objects.filter(slug='copy').exists())
+
+    def test_views_use_author_shard(self):
+        self.author_client.post(
+            reverse('notes:add'),
+            data={'title': 'Заметка', 'text': 'Текст', 'slug': 'note'}
+        )
+        self.assertEqual(self.stored_in('note'), ['shard_0'])
+        detail_url = reverse('notes:detail', args=('note',))
+        self.assertEqual(self.author_client.get(detail_url).status_code, 200)
+        self.assertEqual(self.another_client.get(detail_url).status_code, 404)
+        response = self.author_client.get(reverse('notes:list'))
+        self.assertEqual(
+            [note.slug for note in response.context['object_list']], ['note']
+        )
+
+        self.author_client.post(
+            reverse('notes:edit', args=('note',)),
+            data={'title': 'Заметка', 'text': 'Текст', 'slug': 'renamed'}
+        )
+        self.assertEqual(
+            list(NoteSlug.objects.values_list('slug', flat=True)), ['renamed']
+        )
+        self.author_client.post(reverse('notes:delete', args=('renamed',)))
+        self.assertEqual(self.stored_in('renamed'), [])
+        self.assertFalse(NoteSlug.objects.exists())
+
+    def test_slug_is_unique_across_shards(self):
+        Note.objects.create(
+            title='Заметка', text='Текст', slug='note', author=self.author
+        )
+        response = self.another_client.post(
+            reverse('notes:add'),
+            data={'title': 'Другая', 'text': 'Текст', 'slug': 'note'}
+        )
+        self.assertFormError(response, 'form', 'slug', 'note' + WARNING)
+        self.assertEqual(self.stored_in('note'), ['shard_0'])
+
+    def test_rebalance_moves_notes_to_new_shard(self):
+        with self.settings(NOTE_SHARDS=['shard_0']):
+            for author in (self.author, self.another_author):
+                Note.objects.create(
+                    title='Заметка', text='Текст', author=author,
+                    slug=f'note-{author.pk}',
+                )
+        moved_slug = f'note-{self.another_author.pk}'
+        self.assertEqual(self.stored_in(moved_slug), ['shard_0'])
+
+        output = StringIO()
+        call_command('rebalance_notes', stdout=output)
+        self.assertIn('перенесено заметок: 1', output.getvalue())
+        self.assertEqual(self.stored_in(moved_slug), ['shard_1'])
+        self.assertEqual(
+            self.stored_in(f'note-{self.author.pk}'), ['shard_0']
+        )
+        self.assertTrue(NoteSlug.objects.filter(slug=moved_slug).exists())
+        results = search_notes(
+            self.another_author.pk, 'заметка', limit=10, using='shard_1'
+        )
+        self.assertEqual([result.slug for result in results], [moved_slug])
+
+        output = StringIO()
+        call_command('rebalance_notes', stdout=output)
+        self.assertIn('перенесено заметок: 0', output.getvalue())
+
+    def test_deleting_author_deletes_sharded_notes(self):
+        Note.objects.create(
+            title='Заметка', text='Текст', slug='note',
+            author=self.another_author,
+        )
+        self.another_author.delete()
+        self.assertEqual(self.stored_in('note'), [])
+        self.assertFalse(NoteSlug.objects.exists())
+
+    def test_seed_data_fills_author_shards(self):
+        call_command(
+            'seed_data', users=4, notes_per_user=3, batch_size=2,
+            stdout=StringIO()
+        )
+        seeded = User.objects.filter(username__startswith='seed')
+        self.assertEqual(seeded.count(), 4)
+        for user in seeded:
+            alias = database_for_author(user.pk)
+            self.assertEqual(
+                Note.objects.using(alias).filter(author=user).count(), 3
+            )
+        self.assertEqual(NoteSlug.objects.count(), 12)
+
+    def test_purge_deletes_notes_from_all_databases(self):
+        """Заметки удаляются пачками и с шарда, и не успевшие переехать."""
+        for index in range(3):
+            Note.objects.create(
+                title='Заметка', text='Текст', slug=f'note-{index}',
+                author=self.author,
+            )
+        with self.settings(NOTE_SHARDS=[]):
+            Note.objects.create(
+                title='Заметка', text='Текст', slug='misplaced',
+                author=self.author,
+            )
+        Note.objects.create(
+            title='Чужая', text='Текст', slug='kept',
+            author=self.another_author,
+        )
+        task = schedule_purge(PurgeTask.USER, self.author.pk)
+        self.assertEqual(task.total, 4)
+        self.assertEqual(delete_batch(task, 2), 2)
+
+        output = StringIO()
+        call_command('purge', pending=True, batch_size=2, stdout=output)
+        self.assertIn('заметок 4', output.getvalue())
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        for slug in ('note-0', 'note-1', 'note-2', 'misplaced'):
+            self.assertEqual(self.stored_in(slug), [])
+        self.assertEqual(self.stored_in('kept'), ['shard_1'])
+        self.assertEqual(
+            list(NoteSlug.objects.values_list('slug', flat=True)), ['kept']
+        )
+
+    @override_settings(PURGE_IN_BACKGROUND=False)
+    def test_admin_deletes_user_through_purge(self):
+        Note.objects.create(
+            title='Заметка', text='Текст', slug='note', author=self.author,
+        )
+        admin = User.objects.create_superuser('admin', password='password')
+        client = Client()
+        client.force_login(admin)
+        url = reverse('admin:auth_user_delete', args=(self.author.pk,))
+        self.assertEqual(
+            dict(client.get(url).context['model_count']),
+            {'пользователи': 1, Note._meta.verbose_name_plural: 1},
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(url, {'post': 'yes'})
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(self.stored_in('note'), [])
+        self.assertEqual(PurgeTask.objects.get().deleted, 1)
@@ -1,9 +1,17 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.urls import reverse_lazy
+from django.http import JsonResponse
+from django.urls import reverse, reverse_lazy
+from django.utils.http import urlencode
 from django.views import generic
 
+from yanote.routers import PrimaryWriteMixin, ReplicaReadMixin
+
 from .forms import NoteForm
 from .models import Note
+from .pagination import paginate_by_id
+from .search import search_notes
+from .sharding import database_for_author
 
 
 class Home(generic.TemplateView):
@@ -23,37 +31,111 @@ class NoteBase(LoginRequiredMixin):
 
     def get_queryset(self):
         """Пользователь может работать только со своими заметками."""
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.for_author(self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
+class NoteCreate(NoteBase, PrimaryWriteMixin, generic.CreateView):
     """Добавление заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, PrimaryWriteMixin, generic.UpdateView):
     """Редактирование заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
 
-class NoteDelete(NoteBase, generic.DeleteView):
+class NoteDelete(NoteBase, PrimaryWriteMixin, generic.DeleteView):
     """Удаление заметки."""
     template_name = 'notes/delete.html'
 
 
-class NotesList(NoteBase, generic.ListView):
+class NotesList(ReplicaReadMixin, NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
+    list_fields = ('id', 'slug', 'title')
 
-
-class NoteDetail(NoteBase, generic.DetailView):
+    def get_queryset(self):
+        """Загружаем только поля, которые выводятся в списке."""
+        return super().get_queryset().only(*self.list_fields)
+
+    def get_context_data(self, **kwargs):
+        """
+        Заметки выводятся постранично.
+
+        Размер страницы определяется в настройках проекта.
+        """
+        page = paginate_by_id(
+            self.object_list,
+            settings.NOTES_COUNT_ON_LIST_PAGE,
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+        )
+        return super().get_context_data(
+            object_list=page.object_list, page=page, **kwargs
+        )
+
+
+class NotesListJSON(NotesList):
+    """Список заметок пользователя в JSON с теми же курсорами."""
+
+    def page_url(self, **params):
+        return reverse('notes:list_json') + '?' + urlencode(params)
+
+    def render_to_response(self, context, **response_kwargs):
+        page = context['page']
+        return JsonResponse({
+            'results': [
+                {field: getattr(note, field) for field in self.list_fields}
+                for note in page
+            ],
+            'previous': (
+                self.page_url(before=page.previous_cursor)
+                if page.previous_cursor else None
+            ),
+            'next': (
+                self.page_url(after=page.next_cursor)
+                if page.next_cursor else None
+            ),
+        }, json_dumps_params={'ensure_ascii': False})
+
+
+class NoteDetail(ReplicaReadMixin, NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+
+class NoteSearch(LoginRequiredMixin, generic.TemplateView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_context_data(self, **kwargs):
+        """
+        Результаты выводятся по релевантности постранично.
+
+        Размер страницы определяется в настройках проекта.
+        """
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        try:
+            page = max(int(self.request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        per_page = settings.NOTES_SEARCH_RESULTS_PER_PAGE
+        results = search_notes(
+            self.request.user.pk, query,
+            limit=per_page + 1, offset=(page - 1) * per_page,
+            using=database_for_author(self.request.user.pk),
+        ) if query else []
+        context.update(
+            query=query,
+            results=results[:per_page],
+            page=page,
+            has_next=len(results) > per_page,
+        )
+        return context
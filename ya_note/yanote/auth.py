@@ -0,0 +1,69 @@
+"""
+Кеш пользователя для `AuthenticationMiddleware`.
+
+Вместе с `cached_db`-сессиями авторизованный запрос не ходит в базу,
+пока ни сессия, ни пользователь не менялись. Запись пользователя
+кешируется на `AUTH_USER_CACHE_TIMEOUT` секунд в `AUTH_USER_CACHE_ALIAS`
+и сбрасывается `forget_user` при сохранении и удалении пользователя
+(в том числе при смене пароля) и при выходе.
+
+Кеш `locmem` у каждого процесса свой, и сброс виден только в одном:
+остальные процессы до истечения таймаута видели бы старую запись,
+в том числе старый хеш пароля, и старые сессии оставались бы
+действительными. Поэтому без `DEBUG` такой кеш для пользователей
+отвергает проверка `check_user_cache_is_shared`.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error
+
+USER_KEY = 'auth:user:{pk}'
+
+
+def get_user_cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def user_key(pk):
+    return USER_KEY.format(pk=pk)
+
+
+def forget_user(pk):
+    get_user_cache().delete(user_key(pk))
+
+
+class CachedModelBackend(ModelBackend):
+    """`ModelBackend`, который достаёт пользователя сессии из кеша."""
+
+    def get_user(self, user_id):
+        cache = get_user_cache()
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+        return user if self.user_can_authenticate(user) else None
+
+
+def check_user_cache_is_shared(app_configs, **kwargs):
+    """Кеш пользователей в памяти процесса допустим только при отладке."""
+    backend = f'{__name__}.{CachedModelBackend.__name__}'
+    alias = settings.AUTH_USER_CACHE_ALIAS
+    if (settings.DEBUG
+            or backend not in settings.AUTHENTICATION_BACKENDS
+            or not isinstance(caches[alias], LocMemCache)):
+        return []
+    return [Error(
+        f'Кеш пользователей {alias!r} хранится в памяти процесса.',
+        hint=(
+            'Укажите в AUTH_USER_CACHE_ALIAS общий для процессов кеш, '
+            'например FileBasedCache: иначе смена пароля и блокировка '
+            'доходят только до одного процесса.'
+        ),
+        obj=alias,
+        id='auth_cache.E001',
+    )]
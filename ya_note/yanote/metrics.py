@@ -0,0 +1,286 @@
+"""
+Метрики процесса в текстовом формате Prometheus, view `/metrics`.
+
+Каждый поток пишет в свои словари, поэтому на пути запроса нет
+блокировок: общий замок берётся, только когда поток впервые трогает
+метрику и когда `/metrics` собирает значения. Счётчики живут в памяти
+процесса; при нескольких процессах WSGI каждый отдаёт свои.
+
+Счётчики и гистограммы объявляются на уровне модуля и дальше
+обновляются вызовами `inc` и `observe`. Попадания в кеши снимаются
+при сборке из функций, зарегистрированных через `register_cache`.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+UNRESOLVED = 'unresolved'
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+REGISTRY = []
+CACHE_STATS = {}
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'),
+        )
+        for name, value in pairs
+    ) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    """
+    Метрика с подписями, значения которой разложены по потокам.
+
+    Словарь потока отдаётся ему один раз и дальше меняется только им.
+    Словари завершившихся потоков при сборке сливаются в общий.
+    Подклассы задают тип `kind`, слияние `_merge` и строки `_samples`.
+    """
+    kind: str
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._retired = {}
+        REGISTRY.append(self)
+
+    def _values(self):
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), values))
+            return values
+
+    @abstractmethod
+    def _merge(self, target, values):
+        """Прибавляет значения `values` к `target`."""
+
+    def collect(self):
+        """Сумма значений всех потоков по наборам подписей."""
+        with self._lock:
+            alive = []
+            for thread, values in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, values))
+                else:
+                    self._merge(self._retired, values)
+            self._shards = alive
+            total = {}
+            self._merge(total, self._retired)
+            for _, values in alive:
+                # Копия словаря атомарна, поток может писать дальше.
+                self._merge(total, values.copy())
+        return total
+
+    def expose(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        for labels, value in sorted(self.collect().items()):
+            lines.extend(self._samples(labels, value))
+        return lines
+
+    @abstractmethod
+    def _samples(self, labels, value):
+        """Строки текстового формата для одного набора подписей."""
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        values = self._values()
+        values[labels] = values.get(labels, 0) + amount
+
+    def _merge(self, target, values):
+        for labels, value in values.items():
+            target[labels] = target.get(labels, 0) + value
+
+    def _samples(self, labels, value):
+        return [
+            f'{self.name}{_format_labels(self.labelnames, labels)} '
+            f'{_format_value(value)}'
+        ]
+
+
+class Histogram(Metric):
+    """Гистограмма: счётчик на каждую корзину, сумма и число наблюдений."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = (*buckets, float('inf'))
+
+    def observe(self, value, *labels):
+        values = self._values()
+        state = values.get(labels)
+        if state is None:
+            # Корзины, затем сумма наблюдений.
+            state = values[labels] = [0] * len(self.buckets) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def _merge(self, target, values):
+        for labels, state in values.items():
+            merged = target.setdefault(labels, [0] * len(state))
+            for index, value in enumerate(list(state)):
+                merged[index] += value
+
+    def _samples(self, labels, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state):
+            cumulative += count
+            lines.append(
+                f'{self.name}_bucket'
+                + _format_labels(
+                    self.labelnames, labels, (('le', _format_value(bound)),)
+                )
+                + f' {cumulative}'
+            )
+        suffix = _format_labels(self.labelnames, labels)
+        lines.append(f'{self.name}_sum{suffix} {_format_value(state[-1])}')
+        lines.append(f'{self.name}_count{suffix} {cumulative}')
+        return lines
+
+
+def register_cache(name, stats):
+    """`stats()` возвращает пару (попадания, промахи) кеша `name`."""
+    CACHE_STATS[name] = stats
+
+
+def expose_caches():
+    hits, misses, ratios = [], [], []
+    for name, get_stats in sorted(CACHE_STATS.items()):
+        hit_count, miss_count = get_stats()
+        total = hit_count + miss_count
+        labels = _format_labels(('cache',), (name,))
+        hits.append(f'cache_hits_total{labels} {hit_count}')
+        misses.append(f'cache_misses_total{labels} {miss_count}')
+        ratios.append(
+            f'cache_hit_ratio{labels} '
+            f'{_format_value(hit_count / total if total else 0.0)}'
+        )
+    return [
+        '# HELP cache_hits_total Попадания в кеш.',
+        '# TYPE cache_hits_total counter',
+        *hits,
+        '# HELP cache_misses_total Промахи мимо кеша.',
+        '# TYPE cache_misses_total counter',
+        *misses,
+        '# HELP cache_hit_ratio Доля попаданий в кеш.',
+        '# TYPE cache_hit_ratio gauge',
+        *ratios,
+    ]
+
+
+def expose():
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.expose()
+    lines += expose_caches()
+    return '\n'.join(lines) + '\n'
+
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    'Время обработки запроса.',
+    ('route', 'method'),
+)
+RESPONSES = Counter(
+    'http_responses_total',
+    'Ответы по маршрутам и статусам.',
+    ('route', 'method', 'status'),
+)
+DB_QUERIES = Histogram(
+    'db_queries_per_request',
+    'SQL-запросов на один HTTP-запрос.',
+    ('route',),
+    QUERY_COUNT_BUCKETS,
+)
+DB_DURATION = Histogram(
+    'db_query_duration_seconds',
+    'Суммарное время SQL-запросов одного HTTP-запроса.',
+    ('route',),
+)
+WRITES = Counter(
+    'model_writes_total',
+    'Записанные объекты по моделям и действиям.',
+    ('model', 'action'),
+)
+
+
+class MetricsMiddleware:
+    """
+    Время, статус и SQL каждого запроса с подписью по имени URL.
+
+    Стоит перед `QueryCountMiddleware`: число и время запросов к базе
+    берутся из атрибутов, которые та оставляет на запросе. У потокового
+    ответа они появляются, только когда тело отдано целиком.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        route = match.view_name if match else UNRESOLVED
+        REQUEST_DURATION.observe(duration, route, request.method)
+        RESPONSES.inc(route, request.method, str(response.status_code))
+        if response.streaming:
+            response.streaming_content = self.stream(
+                request, route, response.streaming_content
+            )
+        else:
+            self.observe_queries(request, route)
+        return response
+
+    def stream(self, request, route, content):
+        yield from content
+        self.observe_queries(request, route)
+
+    @staticmethod
+    def observe_queries(request, route):
+        if hasattr(request, 'query_count'):
+            DB_QUERIES.observe(request.query_count, route)
+            DB_DURATION.observe(request.query_duration, route)
+
+
+def metrics_view(request):
+    """Все метрики процесса; доступ по `METRICS_ALLOWED_IPS`."""
+    allowed = settings.METRICS_ALLOWED_IPS
+    if allowed is not None and request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(expose(), content_type=CONTENT_TYPE)
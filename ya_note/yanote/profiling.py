@@ -0,0 +1,274 @@
+"""
+Профилирование отдельных запросов по требованию администратора.
+
+Запрос профилируется, если в заголовке `X-Profile` или параметре
+`?profile=` пришёл подписанный токен со страницы `/admin/profiles/`.
+Для такого запроса сохраняются профиль `cProfile`, снимок
+`tracemalloc` и время каждого SQL-запроса: файлы `<id>.prof`,
+`<id>.tracemalloc` и `<id>.json` в `PROFILING_DIR`, где `id` — время
+и имя URL. Хранятся последние `PROFILING_KEEP` профилей.
+Тело потокового ответа отдаётся уже после профилирования и в профиль
+не попадает. Запросы без токена middleware пропускает сразу.
+"""
+import cProfile
+import json
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core import signing
+from django.db import connections
+from django.http import Http404
+from django.shortcuts import render
+from django.urls import path
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_PARAM = 'profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+SIGNING_SALT = 'profiling'
+PROFILE_ID = re.compile(r'^[\w.-]+$')
+# Кадры самого профилировщика в статистике памяти не нужны.
+MEMORY_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+_tracing_lock = threading.Lock()
+_tracing_requests = 0
+_started_tracing = False
+
+
+def make_token(user):
+    """Токен, включающий профилирование; живёт `PROFILING_TOKEN_MAX_AGE`."""
+    return signing.TimestampSigner(salt=SIGNING_SALT).sign(str(user.pk))
+
+
+def is_profiling_requested(request):
+    token = (
+        request.headers.get(PROFILE_HEADER)
+        or request.GET.get(PROFILE_PARAM)
+    )
+    if not token:
+        return False
+    try:
+        signing.TimestampSigner(salt=SIGNING_SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+@contextmanager
+def tracing_memory():
+    """
+    `tracemalloc` включён, пока идёт хотя бы один профилируемый запрос.
+
+    Трассировка общая для процесса, поэтому её останавливает последний
+    из одновременных запросов и только если запускал её профилировщик.
+    """
+    global _tracing_requests, _started_tracing
+    with _tracing_lock:
+        if not _tracing_requests:
+            _started_tracing = not tracemalloc.is_tracing()
+            if _started_tracing:
+                tracemalloc.start()
+        _tracing_requests += 1
+    try:
+        yield
+    finally:
+        with _tracing_lock:
+            _tracing_requests -= 1
+            if not _tracing_requests and _started_tracing:
+                tracemalloc.stop()
+
+
+class QueryRecorder:
+    """Обёртка `execute_wrapper`, запоминающая каждый запрос и его время."""
+
+    def __init__(self, alias, queries):
+        self.alias = alias
+        self.queries = queries
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': self.alias,
+                'sql': sql,
+                'many': many,
+                'duration_ms': (time.perf_counter() - start) * 1000,
+            })
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует запрос с подписанным токеном и сохраняет результат.
+
+    Стоит первым в `MIDDLEWARE`, чтобы в профиль попала вся обработка.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_profiling_requested(request):
+            return self.get_response(request)
+
+        queries = []
+        profiler = cProfile.Profile()
+        with tracing_memory():
+            start = time.perf_counter()
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(
+                        QueryRecorder(alias, queries)
+                    ))
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.disable()
+            duration = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+
+        match = request.resolver_match
+        profile_id = save_profile(
+            profiler, snapshot, {
+                'url_name': match.view_name if match else None,
+                'path': request.path,
+                'method': request.method,
+                'status': response.status_code,
+                'duration_ms': duration * 1000,
+                'peak_memory_kib': peak / 1024,
+                'queries': queries,
+            }
+        )
+        response[PROFILE_ID_HEADER] = profile_id
+        return response
+
+
+def profile_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def save_profile(profiler, snapshot, meta):
+    """Сохраняет три файла профиля, удаляет лишние старые; вернёт id."""
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    created = datetime.now()
+    url_name = (meta['url_name'] or 'unknown').replace(':', '-')
+    profile_id = f'{created:%Y%m%d-%H%M%S-%f}-{url_name}'
+    profiler.dump_stats(directory / f'{profile_id}.prof')
+    snapshot = snapshot.filter_traces(MEMORY_FILTERS)
+    snapshot.dump(str(directory / f'{profile_id}.tracemalloc'))
+    meta = {
+        'id': profile_id,
+        'created': created.isoformat(),
+        **meta,
+        'query_count': len(meta['queries']),
+        'query_duration_ms': sum(
+            query['duration_ms'] for query in meta['queries']
+        ),
+        'memory': [
+            {
+                'location': str(stat.traceback),
+                'size_kib': stat.size / 1024,
+                'count': stat.count,
+            }
+            for stat in snapshot.statistics('lineno')[
+                :settings.PROFILING_TOP
+            ]
+        ],
+    }
+    with open(directory / f'{profile_id}.json', 'w',
+              encoding='utf-8') as file:
+        json.dump(meta, file, ensure_ascii=False, indent=2)
+    # Id начинается со времени, поэтому имена сортируются по возрасту.
+    saved = sorted(
+        (meta_path.stem for meta_path in directory.glob('*.json')),
+        reverse=True,
+    )
+    for stale_id in saved[settings.PROFILING_KEEP:]:
+        for suffix in ('.json', '.prof', '.tracemalloc'):
+            (directory / f'{stale_id}{suffix}').unlink(missing_ok=True)
+    return profile_id
+
+
+def list_profiles():
+    """Описания сохранённых профилей, новые первыми."""
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    profiles = []
+    for meta_path in sorted(directory.glob('*.json'), reverse=True):
+        with open(meta_path, encoding='utf-8') as file:
+            profiles.append(json.load(file))
+    return profiles
+
+
+def load_profile(profile_id):
+    """Описание профиля и его самые дорогие функции; `None`, если нет."""
+    if not PROFILE_ID.match(profile_id):
+        return None
+    meta_path = profile_dir() / f'{profile_id}.json'
+    if not meta_path.is_file():
+        return None
+    with open(meta_path, encoding='utf-8') as file:
+        meta = json.load(file)
+    stats = pstats.Stats(str(profile_dir() / f'{profile_id}.prof'))
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+    meta['functions'] = []
+    for function in stats.fcn_list[:settings.PROFILING_TOP]:
+        primitive_calls, calls, own, cumulative, _ = stats.stats[function]
+        meta['functions'].append({
+            'function': pstats.func_std_string(function),
+            'calls': calls,
+            'primitive_calls': primitive_calls,
+            'own_ms': own * 1000,
+            'cumulative_ms': cumulative * 1000,
+        })
+    meta['queries'].sort(key=lambda query: -query['duration_ms'])
+    return meta
+
+
+@staff_member_required
+def profile_list(request):
+    return render(request, 'admin/profiles/list.html', {
+        **admin.site.each_context(request),
+        'title': 'Профили запросов',
+        'profiles': list_profiles(),
+        'token': make_token(request.user),
+        'header': PROFILE_HEADER,
+        'param': PROFILE_PARAM,
+    })
+
+
+@staff_member_required
+def profile_detail(request, profile_id):
+    profile = load_profile(profile_id)
+    if profile is None:
+        raise Http404
+    return render(request, 'admin/profiles/detail.html', {
+        **admin.site.each_context(request),
+        'title': f'Профиль {profile_id}',
+        'profile': profile,
+    })
+
+
+urls = ([
+    path('', profile_list, name='list'),
+    path('<str:profile_id>/', profile_detail, name='detail'),
+], 'profiling')
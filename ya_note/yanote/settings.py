@@ -22,6 +22,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanote.profiling.ProfilingMiddleware',
+    'yanote.metrics.MetricsMiddleware',
+    'yanote.middleware.QueryCountMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -52,13 +55,65 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
+# PRAGMA и режим транзакций описаны в yanote.sqlite3.base.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yanote.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'pragmas': {
+                'journal_mode': 'wal',
+                'synchronous': 'normal',
+                'cache_size': -20000,
+                'mmap_size': 128 * 1024 * 1024,
+                'busy_timeout': 5000,
+            },
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+# Локальная реплика: копия основной базы, см. команду `sync_replica`.
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': BASE_DIR / 'db_replica.sqlite3',
+}
+# Локальные шарды заметок, см. notes.sharding.
+for shard in ('shard_0', 'shard_1'):
+    DATABASES[shard] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / f'db_{shard}.sqlite3',
     }
+DATABASE_ROUTERS = [
+    'notes.sharding.NoteShardRouter',
+    'yanote.routers.PrimaryReplicaRouter',
+]
+# Например, ['replica']; пустой список — всё читается с основной базы.
+REPLICA_DATABASES = []
+# Сколько секунд после записи пользователь читает с основной базы.
+REPLICA_PIN_SECONDS = 10
+# Например, ['shard_0', 'shard_1']; пустой список — заметки хранятся
+# в основной базе. После изменения запустите `rebalance_notes`.
+NOTE_SHARDS = []
+
+# Сессии и пользователи; при нескольких процессах нужен общий кеш.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+    },
 }
 
+# Сессия читается из кеша, а пишется и в кеш, и в базу.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
+AUTHENTICATION_BACKENDS = ['yanote.auth.CachedModelBackend']
+AUTH_USER_CACHE_ALIAS = 'sessions'
+AUTH_USER_CACHE_TIMEOUT = 60 * 5
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +142,37 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_LIST_PAGE = 100
+NOTES_SEARCH_RESULTS_PER_PAGE = 20
+
+# Бюджеты SQL-запросов по имени URL, см. yanote.middleware.
+QUERY_BUDGETS = {
+    'notes:home': 2,
+    'notes:list': 3,
+    'notes:list_json': 3,
+    'notes:detail': 3,
+    'notes:add': 6,
+    'notes:edit': 8,
+    'notes:delete': 5,
+    'notes:success': 2,
+    'notes:search': 3,
+}
+QUERY_BUDGET_RAISE = False
+
+# Профилирование запросов по токену, см. yanote.profiling.
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+PROFILING_KEEP = 100
+PROFILING_TOP = 40
+
+# Кому отдаётся /metrics, см. yanote.metrics; None — всем.
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+
+# Прогрев шаблонов, URL и соединений при старте WSGI/ASGI,
+# см. yanote.warmup.
+WARMUP_ON_STARTUP = False
+
+# Удаление пачками пользователей с заметками, см. notes.purge.
+PURGE_BATCH_SIZE = 1000
+PURGE_IN_BACKGROUND = True
@@ -0,0 +1,51 @@
+"""
+Настройки для работы под нагрузкой.
+
+Включаются через `DJANGO_SETTINGS_MODULE=yanote.settings_production`.
+
+Секретный ключ обязателен и берётся из `DJANGO_SECRET_KEY`,
+допустимые хосты — из `DJANGO_ALLOWED_HOSTS` через запятую.
+Кеши общие для всех процессов и лежат в `DJANGO_CACHE_DIR`
+(по умолчанию `cache/` в каталоге проекта).
+"""
+import os
+
+from .settings import *  # noqa: F401, F403
+from .settings import ALLOWED_HOSTS, BASE_DIR, TEMPLATES
+
+DEBUG = False
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+ALLOWED_HOSTS = os.environ.get(
+    'DJANGO_ALLOWED_HOSTS', ','.join(ALLOWED_HOSTS)
+).split(',')
+
+# Шаблоны компилируются один раз на процесс.
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}]
+
+WARMUP_ON_STARTUP = True
+
+# Страницы, сессии и пользователи видны всем процессам: запись или
+# выход в одном процессе сразу действуют в остальных.
+CACHE_DIR = os.environ.get('DJANGO_CACHE_DIR', BASE_DIR / 'cache')
+CACHES = {
+    alias: {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(CACHE_DIR, alias),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+    for alias in ('default', 'sessions')
+}
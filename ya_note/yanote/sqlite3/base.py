@@ -0,0 +1,66 @@
+"""
+SQLite, настроенный на конкурентные запись и чтение.
+
+Подключается как `'ENGINE': 'yanote.sqlite3'`. На каждом новом
+соединении выполняются PRAGMA из `OPTIONS['pragmas']` поверх
+`DEFAULT_PRAGMAS`: журнал WAL не блокирует читателей на время
+записи, а `busy_timeout` заставляет писателя ждать блокировку
+вместо `database is locked`. `OPTIONS['transaction_mode']`
+задаёт режим `BEGIN` для `transaction.atomic`: с `IMMEDIATE`
+блокировка записи берётся в начале транзакции, и SQLite не
+отказывает в ней посреди транзакции без ожидания.
+
+Постоянные соединения включаются обычным `CONN_MAX_AGE`.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    # Отрицательное значение — размер в КиБ, а не в страницах.
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+    'busy_timeout': 5000,
+}
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+BACKEND_OPTIONS = ('pragmas', 'transaction_mode')
+
+
+def apply_pragmas(connection, pragmas):
+    """Выполняет PRAGMA на соединении `sqlite3`."""
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        """Свои параметры не передаются в `sqlite3.connect`."""
+        kwargs = super().get_connection_params()
+        for option in BACKEND_OPTIONS:
+            kwargs.pop(option, None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        options = self.settings_dict['OPTIONS']
+        apply_pragmas(
+            connection, {**DEFAULT_PRAGMAS, **options.get('pragmas', {})}
+        )
+        return connection
+
+    @property
+    def transaction_mode(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        if mode is not None and mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f'transaction_mode должен быть одним из {TRANSACTION_MODES}.'
+            )
+        return mode and mode.upper()
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -4,8 +4,12 @@ from django.contrib.auth.forms import UserCreationForm
 from django.urls import include, path
 from django.views.generic import CreateView
 
+from yanote import metrics, profiling
+
 urlpatterns = [
     path('', include('notes.urls')),
+    path('metrics', metrics.metrics_view, name='metrics'),
+    path('admin/profiles/', include(profiling.urls)),
     path('admin/', admin.site.urls),
 ]
 